@@ -0,0 +1,194 @@
+"""
+Plotly figure builders for the dashboard.
+
+Plotly (and plotly.express, which pulls in a large part of the plotting stack) is imported
+inside each builder, so it only loads once a chart actually renders - the landing page and
+sidebar never pay for it.
+"""
+from f1_core.instrumentation import timed
+
+
+@timed("figure: track map")
+def track_map(subset):
+    import plotly.express as px
+
+    # Renaming columns for clearer tooltip
+    map_df = subset.rename(columns={'x': 'X_coordinate', 'y': 'Y_coordinate'})
+
+    # Using Scatter to allow coloring by speed
+    fig_map = px.scatter(
+        map_df,
+        x='X_coordinate',
+        y='Y_coordinate',
+        color='speed',
+        color_continuous_scale='Turbo',
+        hover_data=['speed', 'Total_distance', 'throttle', 'rpm', 'n_gear', 'brake']
+    )
+    # Keep aspect ratio fixed so the track doesn't look distorted
+    fig_map.update_yaxes(scaleanchor="x", scaleratio=1)
+    fig_map.update_layout(xaxis_visible=False, yaxis_visible=False)  # Hide axes for cleaner map
+    return fig_map
+
+
+@timed("figure: speed heatmap")
+def speed_heatmap(grid, statistic):
+    """grid: an f1_core.heatmap.SpeedGrid; statistic: one of f1_core.heatmap.STATISTICS."""
+    import plotly.graph_objects as go
+    from f1_core.heatmap import STATISTICS
+
+    fig_heat = go.Figure(go.Heatmap(
+        x=grid.x_centers,
+        y=grid.y_centers,
+        z=grid.statistic(statistic),
+        colorscale='Reds' if statistic == 'brake_share' else 'Turbo',
+        colorbar=dict(title=STATISTICS[statistic]),
+        hoverongaps=False,  # empty cells (off track) stay transparent
+    ))
+    # Same fixed aspect ratio and hidden axes as the lap track map
+    fig_heat.update_yaxes(scaleanchor="x", scaleratio=1)
+    fig_heat.update_layout(xaxis_visible=False, yaxis_visible=False)
+    return fig_heat
+
+
+@timed("figure: telemetry subplots")
+def telemetry_chart(subset):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    # 1. Create the Subplots structure (5 rows, sharing X axis)
+    fig_tel = make_subplots(
+        rows=5, cols=1,
+        shared_xaxes=True,  # Critical: Zooming one zooms all
+        vertical_spacing=0.06,  # Gap between charts
+        row_heights=[0.3, 0.15, 0.15, 0.2, 0.2],  # Speed gets more space
+        subplot_titles=("Speed (km/h)", "RPM", "Gear (num)", "Throttle (%)", "Brake (Y/N)")
+    )
+
+    # --- Trace 1: Speed (Blue) ---
+    fig_tel.add_trace(
+        go.Scatter(x=subset['Total_distance'], y=subset['speed'], name='Speed', line=dict(color='cyan', width=2)),
+        row=1, col=1
+    )
+
+    # --- Trace 2: RPM (Yellow) ---
+    fig_tel.add_trace(
+        go.Scatter(x=subset['Total_distance'], y=subset['rpm'], name='RPM', line=dict(color='yellow', width=1)),
+        row=2, col=1
+    )
+
+    # --- Trace 3: Gear (White Step Line) ---
+    fig_tel.add_trace(
+        go.Scatter(x=subset['Total_distance'], y=subset['n_gear'], name='Gear',
+                   line=dict(color='white', width=1.5),
+                   line_shape='hv'),
+        row=3, col=1
+    )
+
+    # --- Trace 4: Throttle (Green Area) ---
+    fig_tel.add_trace(
+        go.Scatter(x=subset['Total_distance'], y=subset['throttle'], name='Throttle',
+                   line=dict(color='lime', width=1), fill='tozeroy'),
+        row=4, col=1
+    )
+
+    # --- Trace 5: Brake (Red Area) ---
+    fig_tel.add_trace(
+        go.Scatter(x=subset['Total_distance'], y=subset['brake'], name='Brake', line=dict(color='red', width=1),
+                   fill='tozeroy'),
+        row=5, col=1
+    )
+
+    # Layout Polish
+    fig_tel.update_layout(
+        height=800,
+        showlegend=False,
+        hovermode="x unified",
+        margin=dict(l=0, r=0, t=20, b=0),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+
+    # Update Axes
+    fig_tel.update_yaxes(showgrid=True, gridcolor='#333')
+    fig_tel.update_xaxes(showgrid=False, visible=False)  # Hide X on top plots
+    fig_tel.update_xaxes(title_text="Total Distance (m)", visible=True, row=5, col=1)  # Show X only on bottom
+    return fig_tel
+
+
+@timed("figure: positions bar")
+def positions_bar(positions_df):
+    import plotly.express as px
+
+    return px.bar(
+        positions_df,
+        x="full_name",
+        y="position",
+        color="type",
+        barmode="group",
+        title="",
+        text_auto=True,
+        labels={"full_name": "Driver", "position": "Position", "type": "Status"}
+    )
+
+
+@timed("figure: comparison chart")
+def comparison_chart(lap_traces):
+    """
+    lap_traces: list of (name, legend_label, color, lap_data) where lap_data
+    already has the normalized 'dist_norm' column.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    # Create subplots structure
+    fig_comp = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.08,
+        row_heights=[0.5, 0.25, 0.25],
+        subplot_titles=("Speed Comparison (km/h)", "Throttle (%)", "Brake (Y/N")
+    )
+
+    for name, legend_label, color, lap_data in lap_traces:
+        # --- Trace 1: Speed ---
+        fig_comp.add_trace(
+            go.Scatter(
+                x=lap_data['dist_norm'], y=lap_data['speed'],
+                name=f"{legend_label}", legendgroup=name,
+                line=dict(color=color, width=2)
+            ), row=1, col=1
+        )
+
+        # --- Trace 2: Throttle ---
+        fig_comp.add_trace(
+            go.Scatter(
+                x=lap_data['dist_norm'], y=lap_data['throttle'],
+                name=f"{name} Throttle", legendgroup=name, showlegend=False,
+                line=dict(color=color, width=1.5)
+            ), row=2, col=1
+        )
+
+        # --- Trace 3: Brake ---
+        fig_comp.add_trace(
+            go.Scatter(
+                x=lap_data['dist_norm'], y=lap_data['brake'],
+                name=f"{name} Brake", legendgroup=name, showlegend=False,
+                line=dict(color=color, width=1.5)
+            ), row=3, col=1
+        )
+
+    # Layout Polish for Comparison Chart
+    fig_comp.update_layout(
+        height=800,
+        hovermode="x unified",
+        margin=dict(l=0, r=0, t=40, b=0),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend=dict(orientation="h", y=1.02, x=0.5, xanchor="center")
+    )
+
+    # Update X-axis (Apply to the bottom chart)
+    fig_comp.update_xaxes(title_text="Lap Distance (m)", visible=True, row=3, col=1)
+    fig_comp.update_xaxes(showgrid=False, visible=False, row=1, col=1)
+    fig_comp.update_xaxes(showgrid=False, visible=False, row=2, col=1)
+    return fig_comp
@@ -0,0 +1,143 @@
+import cProfile
+import io
+import os
+import pstats
+import tempfile
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from f1_core.instrumentation import start_trace, stop_trace
+
+
+# One cProfile at a time per process: since Python 3.12 a second enable() raises ValueError
+_profile_lock = threading.Lock()
+
+
+class _RerunProfiler(cProfile.Profile):
+    """cProfile of one rerun; holds _profile_lock while it runs."""
+    running = False
+
+    def start(self):
+        if not _profile_lock.acquire(blocking=False):
+            st.toast("cProfile skipped: another rerun is being profiled.")
+            return False
+        try:
+            self.enable()
+        except ValueError as e:  # "Another profiling tool is already active"
+            _profile_lock.release()
+            st.toast(f"cProfile skipped: {e}")
+            return False
+        self.running = True
+        return True
+
+    def stop(self):
+        if self.running:
+            self.disable()
+            self.running = False
+            _profile_lock.release()
+
+
+def begin_debug_rerun():
+    """
+    Call at the top of main.py. The panel is hidden unless the URL has ?debug=1
+    (add &profile=1 to also capture a cProfile of this single rerun).
+    Returns (trace, profiler) - both None when debugging is off. end_debug_rerun must run
+    however the rerun ends (main.py calls it in a finally).
+    """
+    stop_trace()
+    if st.query_params.get("debug") not in ("1", "true"):
+        return None, None
+
+    trace = start_trace("rerun")
+    profiler = None
+    if st.query_params.get("profile") in ("1", "true"):
+        profiler = _RerunProfiler()
+        if not profiler.start():
+            profiler = None
+    return trace, profiler
+
+
+def end_debug_rerun(trace, profiler=None):
+    """Stops the profiler and the trace of the rerun (idempotent; also after st.stop() or an exception)."""
+    if profiler is not None:
+        profiler.stop()
+    if trace is not None:
+        stop_trace()
+
+
+def render_debug_panel(trace, profiler=None):
+    """Per-rerun waterfall of every recorded stage. Call at the very end of main.py."""
+    if trace is None:
+        return
+    if profiler is not None:
+        profiler.stop()
+    total_ms = trace.total * 1000
+    stop_trace()
+
+    st.divider()
+    with st.expander("🛠️ Debug: rerun timing", expanded=True):
+        spans = pd.DataFrame(trace.to_records())
+        if spans.empty:
+            st.caption(f"Rerun took {total_ms:.0f} ms (no instrumented stages ran).")
+        else:
+            spans['start_ms'] = spans['start'] * 1000
+            spans['duration_ms'] = spans['duration'] * 1000
+            spans['label'] = [f"{i:03d} " + "· " * depth + name
+                              for i, (depth, name) in enumerate(zip(spans['depth'], spans['name']))]
+
+            # --- Summary Row ---
+            top_level = spans[spans['depth'] == 0]
+            api_calls = spans[spans['kind'] == 'api']
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Rerun total", f"{total_ms:.0f} ms")
+            m2.metric("Instrumented", f"{top_level['duration_ms'].sum():.0f} ms")
+            m3.metric("Downloaded", f"{spans.loc[spans['kind'] == 'network', 'bytes'].sum() / 1e6:.2f} MB")
+            m4.metric("Cache hits", f"{(api_calls['cache'] == 'hit').sum()} / {len(api_calls)}")
+
+            # Time by kind (only the innermost kinds, so nothing is double counted)
+            by_kind = spans[spans['kind'].isin(['network', 'parse', 'stage'])].groupby('kind')['duration_ms'].sum()
+            st.caption(" | ".join(f"{kind}: {ms:.0f} ms" for kind, ms in by_kind.items()))
+
+            # --- Waterfall ---
+            import plotly.graph_objects as go
+
+            colors = {'api': '#1f77b4', 'network': '#d62728', 'parse': '#ff7f0e', 'stage': '#2ca02c'}
+            fig = go.Figure(go.Bar(
+                y=spans['label'],
+                x=spans['duration_ms'],
+                base=spans['start_ms'],
+                orientation='h',
+                marker_color=[colors.get(kind, '#7f7f7f') for kind in spans['kind']],
+                hovertext=[f"{kind} | rows={rows} | bytes={b} | cache={cache} | status={status}"
+                           for kind, rows, b, cache, status in zip(spans['kind'], spans['rows'], spans['bytes'],
+                                                                   spans['cache'], spans['status'])],
+            ))
+            fig.update_yaxes(autorange="reversed")
+            fig.update_layout(height=max(300, 22 * len(spans)), xaxis_title="ms since rerun start",
+                              margin=dict(l=0, r=0, t=10, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+            st.dataframe(
+                spans[['label', 'kind', 'start_ms', 'duration_ms', 'rows', 'bytes', 'cache', 'status', 'error']],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        # --- Optional cProfile capture ---
+        if profiler is not None:
+            out = io.StringIO()
+            stats = pstats.Stats(profiler, stream=out).sort_stats('cumulative')
+            stats.print_stats(40)
+            st.markdown("**cProfile (top 40 by cumulative time)**")
+            st.code(out.getvalue())
+
+            fd, path = tempfile.mkstemp(suffix='.prof')
+            os.close(fd)
+            try:
+                stats.dump_stats(path)
+                with open(path, 'rb') as f:
+                    st.download_button("Download .prof (snakeviz / pstats)", f.read(), file_name="rerun.prof")
+            finally:
+                os.remove(path)
@@ -0,0 +1,17 @@
+"""
+Framework-independent data layer of the dashboard: the OpenF1 client, its caches and the
+race processor. Nothing here imports Streamlit, so the same code runs in the app, in batch
+jobs, CLIs, thread pools and process pools. The Streamlit app uses it through the thin
+adapters in F1_API_importer.py and DataProcessor.py.
+
+    from f1_core import F1Client, Processor
+    laps, session_start = F1Client.get_laps(9472, 1)
+    merged = Processor.get_merged_race_data(9472, 1)
+"""
+from .client import F1Client
+from .errors import F1DataError, NoDataError, ParseError, UpstreamError
+from .processor import Processor
+from .scheduler import SCHEDULER, request_priority
+
+__all__ = ['F1Client', 'Processor', 'F1DataError', 'UpstreamError', 'ParseError', 'NoDataError',
+           'SCHEDULER', 'request_priority']
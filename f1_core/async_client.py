@@ -0,0 +1,233 @@
+"""
+Async OpenF1 client (requires aiohttp, from the optional `async` group: `poetry install --with async`).
+
+Same endpoints and return values as F1Client, as coroutines. One client holds one aiohttp
+session (a shared, keep-alive connection pool) and a semaphore bounding the requests in
+flight, so background jobs can fetch hundreds of sessions concurrently on one event loop:
+
+    async with AsyncF1Client(max_concurrency=32) as client:
+        drivers = await asyncio.gather(*(client.get_drivers(key) for key in session_keys))
+
+Requests go through the same rate-limit scheduler as F1Client (f1_core/scheduler.py), in the
+priority class of the calling task. Concurrent identical requests are coalesced into one. `stream()` yields the items of a JSON
+array payload while it downloads, so large endpoints (car_data, location) can be processed
+without holding the whole body in memory.
+
+Results are not memoized here (F1Client keeps the app's caches), and requests are not timed
+by the instrumentation spans, whose per-thread stacks don't fit interleaved coroutines.
+"""
+import asyncio
+import codecs
+import json
+
+import aiohttp
+
+from .client import (F1Client, drivers_frame, laps_frame, location_frame, positions_frame, records_frame,
+                     sessions_frame, telemetry_frame)
+from .errors import NoDataError, ParseError, UpstreamError
+from .scheduler import SCHEDULER, parse_retry_after
+
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+class AsyncF1Client:
+    def __init__(self, base_url=None, max_concurrency=16, max_connections=32, timeout=20):
+        self.base_url = base_url or F1Client.BASE_URL
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+        self._inflight = {}
+
+    # --- Lifecycle ---
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- Transport ---
+    def url(self, endpoint, **params):
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return f"{self.base_url}/{endpoint}?{query}"
+
+    async def _request(self, url, handle):
+        """
+        Runs `handle(response)` for a successful GET, within the concurrency limit and
+        the shared rate-limit scheduler (throttled requests are retried).
+        """
+        await self.open()
+        endpoint = url.split('?')[0].rsplit('/', 1)[-1]
+        async with self._semaphore:
+            for attempt in range(SCHEDULER.max_retries + 1):
+                await SCHEDULER.acquire_async()
+                try:
+                    async with self._session.get(url) as response:
+                        if response.status == 429:
+                            SCHEDULER.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+                            if attempt < SCHEDULER.max_retries:
+                                SCHEDULER.on_retry()
+                                continue
+                        if response.status != 200:
+                            raise UpstreamError(url, status=response.status)
+                        SCHEDULER.on_success()
+                        return await handle(response)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise UpstreamError(url, message=f"Request to /{endpoint} failed: {e!r}") from e
+
+    async def fetch(self, endpoint, **params):
+        """GET /<endpoint>?<params> and return the decoded JSON."""
+        url = self.url(endpoint, **params)
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._request(url, self._read_json))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        # shield: one caller being cancelled must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _read_json(response):
+        body = await response.read()
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise ParseError(f"Invalid JSON from {response.url}: {e}") from e
+
+    async def stream(self, endpoint, **params):
+        """
+        Async iterator over the items of a JSON array payload, decoded incrementally
+        as chunks arrive.
+        """
+        url = self.url(endpoint, **params)
+        queue = asyncio.Queue(maxsize=1024)
+        done = object()
+
+        async def pump(response):
+            async for item in _iter_json_array(response.content.iter_chunked(STREAM_CHUNK_BYTES), url):
+                await queue.put(item)
+
+        async def produce():
+            try:
+                await self._request(url, pump)
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    # --- Endpoints (same frames as F1Client) ---
+    async def get_sessions(self, year):
+        return sessions_frame(await self.fetch("sessions", year=year))
+
+    async def get_drivers(self, session_key):
+        return drivers_frame(await self.fetch("drivers", session_key=session_key))
+
+    async def get_telemetry(self, session_key, driver_number, date_start_session):
+        data = await self.fetch("car_data", driver_number=driver_number, session_key=session_key)
+        return telemetry_frame(data, date_start_session)
+
+    async def get_laps(self, session_key, driver_number):
+        try:
+            return laps_frame(await self.fetch("laps", session_key=session_key, driver_number=driver_number))
+        except NoDataError:
+            raise NoDataError(f"No laps for driver {driver_number} in session {session_key}") from None
+
+    async def get_location(self, session_key, driver_number, date_start_session):
+        data = await self.fetch("location", driver_number=driver_number, session_key=session_key)
+        return location_frame(data, date_start_session)
+
+    async def get_all_drivers_positions(self, session_key):
+        return positions_frame(await self.fetch("position", session_key=session_key))
+
+    async def get_all_laps(self, session_key):
+        return records_frame(await self.fetch("laps", session_key=session_key), "laps")
+
+    async def get_session_result(self, session_key):
+        return records_frame(await self.fetch("session_result", session_key=session_key), "session_result")
+
+    async def get_championship_drivers(self, session_key):
+        return records_frame(await self.fetch("championship_drivers", session_key=session_key), "championship_drivers")
+
+    async def get_championship_teams(self, session_key):
+        return records_frame(await self.fetch("championship_teams", session_key=session_key), "championship_teams")
+
+    async def get_race_inputs(self, session_key, driver_number):
+        """(lap_df, car data, location) for one driver: the inputs of Processor.get_merged_race_data."""
+        lap_df, date_start_session = await self.get_laps(session_key, driver_number)
+        df_tel, df_loc = await asyncio.gather(
+            self.get_telemetry(session_key, driver_number, date_start_session),
+            self.get_location(session_key, driver_number, date_start_session))
+        return lap_df, df_tel, df_loc
+
+
+async def _iter_json_array(chunks, url):
+    """Yields the elements of a top-level JSON array from an async iterator of byte chunks."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    started = False
+    finished = False
+
+    async for chunk in chunks:
+        buffer = buffer[pos:] + text.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer) or finished:
+                break
+            if not started:
+                if buffer[pos] != '[':
+                    raise ParseError(f"Expected a JSON array from {url}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ',':
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                finished = True
+                pos += 1
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # incomplete item: wait for the next chunk
+            # A scalar cut by the chunk boundary can decode as a prefix ("1." -> 1), so it only
+            # counts once the delimiter after it has arrived
+            if not isinstance(item, (dict, list, str)) and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                break
+            yield item
+            pos = end
+
+    if not finished:
+        raise ParseError(f"Truncated or invalid JSON array from {url}")
@@ -0,0 +1,110 @@
+"""
+Plain-Python memoization for the data layer (replaces st.cache_data outside Streamlit).
+
+Results are kept in a thread-safe LRU with an optional time-to-live. Callers get shallow
+views of cached DataFrames (new frame objects over the same values, like
+frame_store.SHARED_FRAMES), so adding or replacing columns never leaks into the cache, but the
+values themselves are shared and must be treated as read-only. Concurrent calls with the same arguments are coalesced: one computes, the others wait
+for its result. Exceptions are not cached.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import pandas as pd
+
+
+def _copy(value):
+    """New frame objects over the same data (no values are copied)."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+def memoize(maxsize=256, ttl=None):
+    """
+    Decorator caching results by positional/keyword arguments (which must be hashable;
+    calls with unhashable arguments are not cached). `ttl` is in seconds, None = forever.
+    Adds `cache_clear()` and `cache_info()` (hits, misses, entries and their DataFrame bytes)
+    to the wrapped function.
+    """
+    def decorator(func):
+        entries = OrderedDict()  # key -> (stored_at, value, nbytes)
+        key_locks = {}
+        lock = threading.Lock()
+        stats = {'hits': 0, 'misses': 0, 'bytes': 0}
+
+        def lookup(key):
+            with lock:
+                entry = entries.get(key)
+                if entry is None:
+                    return None
+                if ttl is not None and time.monotonic() - entry[0] > ttl:
+                    del entries[key]
+                    stats['bytes'] -= entry[2]
+                    return None
+                entries.move_to_end(key)
+                stats['hits'] += 1
+                return entry
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items())) if kwargs else args
+            try:
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            entry = lookup(key)
+            if entry is not None:
+                return _copy(entry[1])
+
+            with lock:
+                key_lock = key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                # Another thread may have filled the entry while we waited
+                entry = lookup(key)
+                if entry is not None:
+                    return _copy(entry[1])
+
+                value = func(*args, **kwargs)
+                nbytes = _nbytes(value)
+                with lock:
+                    stats['misses'] += 1
+                    previous = entries.pop(key, None)
+                    if previous is not None:
+                        stats['bytes'] -= previous[2]
+                    entries[key] = (time.monotonic(), value, nbytes)
+                    stats['bytes'] += nbytes
+                    while len(entries) > maxsize:
+                        stats['bytes'] -= entries.popitem(last=False)[1][2]
+                    key_locks.pop(key, None)
+            return _copy(value)
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+                stats['hits'] = stats['misses'] = stats['bytes'] = 0
+
+        def cache_info():
+            with lock:
+                return {'hits': stats['hits'], 'misses': stats['misses'], 'size': len(entries),
+                        'maxsize': maxsize, 'ttl': ttl, 'bytes': stats['bytes']}
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        return wrapper
+    return decorator
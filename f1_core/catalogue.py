@@ -0,0 +1,192 @@
+"""
+Local catalogue of OpenF1 sessions, meetings and circuits for every year (SQLite, stdlib only).
+
+The sidebar's year / country / session pickers are answered from this file instead of the
+API, so they cost an indexed local lookup, and a new season shows up as soon as OpenF1 has
+it. Refreshes are incremental: only sessions and meetings starting on or after the latest
+stored date are requested (OpenF1 filter syntax `date_start>=`) and upserted by key.
+
+    from f1_core.catalogue import CATALOGUE
+    CATALOGUE.ensure_fresh()
+    CATALOGUE.years()                      # [2023, 2024, ...]
+    CATALOGUE.sessions(2024, session_type='Race')
+
+Configuration: F1_CATALOGUE (database path, default f1_catalogue.sqlite) and
+F1_CATALOGUE_MAX_AGE (seconds between refreshes, default 3600). The catalogue remembers which
+API it was filled from and starts over if F1Client.BASE_URL points somewhere else.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from .client import F1Client
+from .errors import F1DataError
+from .scheduler import request_priority
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuits (
+    circuit_key INTEGER PRIMARY KEY,
+    circuit_short_name TEXT,
+    location TEXT,
+    country_name TEXT
+);
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_key INTEGER PRIMARY KEY,
+    year INTEGER,
+    meeting_name TEXT,
+    circuit_key INTEGER,
+    country_name TEXT,
+    location TEXT,
+    date_start TEXT
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_key INTEGER PRIMARY KEY,
+    meeting_key INTEGER,
+    year INTEGER,
+    session_name TEXT,
+    session_type TEXT,
+    circuit_key INTEGER,
+    circuit_short_name TEXT,
+    country_name TEXT,
+    location TEXT,
+    date_start TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE INDEX IF NOT EXISTS sessions_year ON sessions (year, date_start);
+CREATE INDEX IF NOT EXISTS sessions_country ON sessions (country_name);
+CREATE INDEX IF NOT EXISTS sessions_circuit ON sessions (circuit_key);
+CREATE INDEX IF NOT EXISTS sessions_type ON sessions (session_type);
+CREATE INDEX IF NOT EXISTS sessions_date ON sessions (date_start);
+CREATE INDEX IF NOT EXISTS meetings_year ON meetings (year);
+"""
+
+SESSION_COLUMNS = ['session_key', 'meeting_key', 'year', 'session_name', 'session_type', 'circuit_key',
+                   'circuit_short_name', 'country_name', 'location', 'date_start']
+MEETING_COLUMNS = ['meeting_key', 'year', 'meeting_name', 'circuit_key', 'country_name', 'location', 'date_start']
+CIRCUIT_COLUMNS = ['circuit_key', 'circuit_short_name', 'location', 'country_name']
+
+
+def _upsert(con, table, columns, rows):
+    placeholders = ", ".join("?" for _ in columns)
+    con.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    [tuple(row.get(c) for c in columns) for row in rows])
+
+
+class SessionCatalogue:
+    def __init__(self, path, max_age=3600):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._background = None
+
+    # --- Storage ---
+    def _connect(self):
+        """One connection per thread (Streamlit runs each session in its own thread)."""
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(SCHEMA)
+            self._local.con = con
+        return con
+
+    def _meta(self, key):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _reset_if_other_source(self, con):
+        if self._meta('base_url') not in (None, F1Client.BASE_URL):
+            log.info("Catalogue was built from %s, rebuilding for %s", self._meta('base_url'), F1Client.BASE_URL)
+            con.executescript("DELETE FROM sessions; DELETE FROM meetings; DELETE FROM circuits; DELETE FROM meta;")
+
+    # --- Refreshing ---
+    def refresh(self):
+        """
+        Fetches sessions and meetings starting on/after the latest stored one. Returns the rows
+        added/updated, or 0 when another thread completed a refresh while this one waited.
+        """
+        requested_at = time.time()
+        with self._refresh_lock:
+            if (self._meta('base_url') == F1Client.BASE_URL
+                    and float(self._meta('refreshed_at') or 0) >= requested_at):
+                return 0
+            con = self._connect()
+            with con:
+                self._reset_if_other_source(con)
+            latest = con.execute("SELECT MAX(date_start) FROM sessions").fetchone()[0]
+            # Day granularity: the timestamp's '+00:00' would need URL-encoding, and the
+            # sessions of that day are simply upserted again
+            params = {'date_start>': latest[:10]} if latest else {}
+            sessions = F1Client.fetch("sessions", **params)
+            meetings = F1Client.fetch("meetings", **params)
+
+            circuits = {row['circuit_key']: row for row in sessions if row.get('circuit_key') is not None}
+            with con:
+                _upsert(con, 'sessions', SESSION_COLUMNS, sessions)
+                _upsert(con, 'meetings', MEETING_COLUMNS, meetings)
+                _upsert(con, 'circuits', CIRCUIT_COLUMNS, circuits.values())
+                con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                [('base_url', F1Client.BASE_URL), ('refreshed_at', str(time.time()))])
+            return len(sessions)
+
+    def ensure_fresh(self):
+        """
+        Fills an empty catalogue (blocking); a stale one is refreshed in a background thread
+        while lookups keep answering from the stored rows.
+        """
+        if self._meta('base_url') != F1Client.BASE_URL:  # empty, or filled from another API
+            self.refresh()
+            return
+        if time.time() - float(self._meta('refreshed_at') or 0) < self.max_age:
+            return
+        if self._background is None or not self._background.is_alive():
+            self._background = threading.Thread(target=self._refresh_in_background, daemon=True,
+                                                name="f1-catalogue-refresh")
+            self._background.start()
+
+    def _refresh_in_background(self):
+        try:
+            with request_priority("prefetch"):
+                self.refresh()
+        except (F1DataError, sqlite3.Error) as e:
+            log.warning("Catalogue refresh failed, serving the stored sessions: %s", e)
+
+    # --- Lookups ---
+    def _query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._connect(), params=params)
+
+    def years(self):
+        return [row[0] for row in self._connect().execute(
+            "SELECT DISTINCT year FROM sessions WHERE year IS NOT NULL ORDER BY year")]
+
+    def sessions(self, year=None, country=None, circuit_key=None, session_type=None):
+        """Same columns as F1Client.get_sessions (plus meeting_key, circuit_short_name), sorted by start."""
+        filters = [("year = ?", int(year) if year is not None else None), ("country_name = ?", country),
+                   ("circuit_key = ?", circuit_key), ("session_type = ?", session_type)]
+        where = [sql for sql, value in filters if value is not None]
+        params = [value for _, value in filters if value is not None]
+        df = self._query(
+            "SELECT session_key, meeting_key, circuit_key, location, country_name, circuit_short_name, session_name, "
+            "date_start, session_type FROM sessions"
+            + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY date_start", params)
+        df['label'] = df['country_name'] + " " + df['session_name']
+        return df
+
+    def meetings(self, year=None):
+        if year is None:
+            return self._query("SELECT * FROM meetings ORDER BY date_start")
+        return self._query("SELECT * FROM meetings WHERE year = ? ORDER BY date_start", (int(year),))
+
+    def circuits(self):
+        return self._query("SELECT * FROM circuits ORDER BY circuit_short_name")
+
+
+CATALOGUE = SessionCatalogue(os.environ.get("F1_CATALOGUE", "f1_catalogue.sqlite"),
+                             max_age=float(os.environ.get("F1_CATALOGUE_MAX_AGE", 3600)))
@@ -0,0 +1,249 @@
+"""
+OpenF1 client without any Streamlit dependency.
+
+Every endpoint is split into fetching (F1Client._get / _parse) and building the DataFrame
+(the *_frame functions below), so other transports can reuse the builders. Failures raise
+f1_core.errors exceptions instead of being reported in the UI; results are memoized in-process.
+"""
+import requests
+import pandas as pd
+
+from .cache import memoize
+from .compressed_frames import TELEMETRY_CACHE, compressed_cache
+from .errors import NoDataError, ParseError, UpstreamError
+from .instrumentation import record_download, stage, timed
+from .normalize import normalize
+from .scheduler import SCHEDULER, parse_retry_after
+
+DRIVER_COLUMNS = ['driver_number', 'full_name', 'name_acronym', 'team_name']
+
+
+# --- Frame builders (payload -> DataFrame) ---
+def sessions_frame(data):
+    df = pd.DataFrame(data)
+    if df.empty:
+        return df
+    cols_to_keep = ['session_key', 'circuit_key', 'location', 'country_name', 'session_name', 'date_start',
+                    'session_type']
+    existing_cols = [c for c in cols_to_keep if c in df.columns]
+    df = df[existing_cols]
+    df['label'] = df['country_name'] + " " + df['session_name']
+    return df.sort_values(by='date_start')
+
+
+def drivers_frame(data):
+    if not data:
+        return pd.DataFrame(columns=DRIVER_COLUMNS)
+    df = pd.DataFrame(data)
+
+    # --- 1. Robust Full Name Creation ---
+    # If 'full_name' is missing, create it from first+last, or broadcast_name, or acronym
+    if 'full_name' not in df.columns:
+        if 'first_name' in df.columns and 'last_name' in df.columns:
+            df['full_name'] = df['first_name'].fillna('') + ' ' + df['last_name'].fillna('')
+        elif 'broadcast_name' in df.columns:
+            df['full_name'] = df['broadcast_name']
+        else:
+            df['full_name'] = "Driver " + df['driver_number'].astype(str)
+
+    # --- 2. Robust Team Name ---
+    # Ensure team_name column exists, default to 'Unknown' if missing
+    if 'team_name' not in df.columns:
+        df['team_name'] = 'Unknown Team'
+    df['team_name'] = df['team_name'].fillna('Unknown Team')
+
+    # --- 3. Handle Acronym ---
+    if 'name_acronym' not in df.columns:
+        df['name_acronym'] = df['full_name'].str.slice(0, 3).str.upper()
+
+    # --- 4. Final Cleanup ---
+    df = normalize(df, 'drivers')
+
+    # Return only safe columns
+    return df[DRIVER_COLUMNS + ['session_key']]
+
+
+def telemetry_frame(data, date_start_session):
+    if not data:
+        return pd.DataFrame()
+    df = normalize(pd.DataFrame(data), 'car_data')
+    df = df[df['date'] > date_start_session]
+
+    df['time_diff'] = df['date'].diff().dt.total_seconds().fillna(0)
+    df['distance'] = df['time_diff'] * df['speed'] / 3.6
+    df['Total_distance'] = df['distance'].cumsum()
+    return df
+
+
+def laps_frame(data):
+    """(lap_df with the start time renamed to 'date', session start time)."""
+    if not data:
+        raise NoDataError("No laps available")
+    lap_df = normalize(pd.DataFrame(data), 'laps')
+    if 1 in lap_df['lap_number'].values:
+        date_start_session = lap_df[lap_df['lap_number'] == 1]['date_start'].iloc[0]
+    else:
+        date_start_session = lap_df['date_start'].iloc[0]
+
+    lap_df = lap_df.rename(columns={'date_start': 'date'})
+    return lap_df, date_start_session
+
+
+def location_frame(data, date_start_session):
+    if not data:
+        return pd.DataFrame()
+    df = normalize(pd.DataFrame(data), 'location')
+    return df[df['date'] > date_start_session]
+
+
+def positions_frame(data):
+    if not data:
+        return pd.DataFrame()
+    return normalize(pd.DataFrame(data), 'position')
+
+
+def records_frame(data, endpoint):
+    return normalize(pd.DataFrame(data), endpoint) if data else pd.DataFrame()
+
+
+def _lap_starts(session_key, driver_number, *_):
+    """(lap start times, lap numbers) so cached telemetry is compressed one block per lap."""
+    try:
+        lap_df, _ = F1Client.get_laps(session_key, driver_number)
+    except NoDataError:
+        return None, None
+    lap_df = lap_df.dropna(subset=['date'])
+    return lap_df['date'], lap_df['lap_number']
+
+
+class F1Client:
+    BASE_URL = "https://api.openf1.org/v1"
+
+    @staticmethod
+    def _get(url, timeout):
+        """
+        Single network entry point for all endpoints.
+        Waits for the rate-limit scheduler, times the request, records the downloaded
+        payload size, retries throttled (429) requests and raises on failures.
+        """
+        endpoint = url.split('?')[0].rsplit('/', 1)[-1]
+        for attempt in range(SCHEDULER.max_retries + 1):
+            SCHEDULER.acquire()
+            with stage(f"GET /{endpoint}", kind="network") as span:
+                try:
+                    response = requests.get(url, timeout=timeout)
+                except requests.RequestException as e:
+                    raise UpstreamError(url, message=f"Request to /{endpoint} failed: {e}") from e
+                record_download(len(response.content))
+                span.status = response.status_code
+            if response.status_code != 429:
+                SCHEDULER.on_success()
+                break
+            SCHEDULER.on_throttled(parse_retry_after(response.headers.get('Retry-After')))
+            if attempt < SCHEDULER.max_retries:
+                SCHEDULER.on_retry()
+        if response.status_code != 200:
+            raise UpstreamError(url, status=response.status_code)
+        return response
+
+    @staticmethod
+    def _parse(response):
+        """Decodes the JSON payload (timed separately from the download)."""
+        with stage("json parse", kind="parse") as span:
+            try:
+                data = response.json()
+            except ValueError as e:
+                raise ParseError(f"Invalid JSON from {response.url}: {e}") from e
+            span.rows = len(data) if isinstance(data, list) else None
+        return data
+
+    @staticmethod
+    def fetch(endpoint, timeout=10, **params):
+        """GET /<endpoint>?<params> and return the decoded JSON."""
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        response = F1Client._get(f"{F1Client.BASE_URL}/{endpoint}?{query}", timeout=timeout)
+        return F1Client._parse(response)
+
+    @staticmethod
+    @timed("F1Client.get_sessions", kind="api")
+    @memoize()
+    def get_sessions(year):
+        return sessions_frame(F1Client.fetch("sessions", year=year))
+
+    @staticmethod
+    @timed("F1Client.get_drivers", kind="api")
+    @memoize()
+    def get_drivers(session_key):
+        return drivers_frame(F1Client.fetch("drivers", session_key=session_key))
+
+    @staticmethod
+    @timed("F1Client.get_telemetry", kind="api")
+    @compressed_cache(TELEMETRY_CACHE, "car_data", split=_lap_starts)
+    def get_telemetry(session_key, driver_number, date_start_session):
+        data = F1Client.fetch("car_data", timeout=20, driver_number=driver_number, session_key=session_key)
+        return telemetry_frame(data, date_start_session)
+
+    @staticmethod
+    @timed("F1Client.get_telemetry_lap", kind="api")
+    def get_telemetry_lap(session_key, driver_number, date_start_session, lap_number):
+        """
+        Car data of a single lap, for scripts that don't need the whole race (the dashboard
+        filters the merged race instead). Served from the compressed telemetry cache, where
+        only that lap's block is decompressed.
+        """
+        key = ("car_data", session_key, driver_number, date_start_session)
+        frame = TELEMETRY_CACHE.get(key)
+        if frame is None:
+            F1Client.get_telemetry(session_key, driver_number, date_start_session)
+            frame = TELEMETRY_CACHE.get(key)
+        if frame is None:
+            return pd.DataFrame()
+        return frame.lap(lap_number)
+
+    @staticmethod
+    @timed("F1Client.get_laps", kind="api")
+    @memoize()
+    def get_laps(session_key, driver_number):
+        try:
+            return laps_frame(F1Client.fetch("laps", session_key=session_key, driver_number=driver_number))
+        except NoDataError:
+            raise NoDataError(f"No laps for driver {driver_number} in session {session_key}") from None
+
+    @staticmethod
+    @timed("F1Client.get_location", kind="api")
+    @compressed_cache(TELEMETRY_CACHE, "location", split=_lap_starts)
+    def get_location(session_key, driver_number, date_start_session):
+        data = F1Client.fetch("location", timeout=20, driver_number=driver_number, session_key=session_key)
+        return location_frame(data, date_start_session)
+
+    @staticmethod
+    @timed("F1Client.get_all_drivers_positions", kind="api")
+    @memoize()
+    def get_all_drivers_positions(session_key):
+        return positions_frame(F1Client.fetch("position", timeout=20, session_key=session_key))
+
+    @staticmethod
+    @timed("F1Client.get_all_laps", kind="api")
+    @memoize()
+    def get_all_laps(session_key):
+        return records_frame(F1Client.fetch("laps", timeout=15, session_key=session_key), "laps")
+
+    @staticmethod
+    @timed("F1Client.get_session_result", kind="api")
+    @memoize()
+    def get_session_result(session_key):
+        return records_frame(F1Client.fetch("session_result", session_key=session_key), "session_result")
+
+    @staticmethod
+    @timed("F1Client.get_championship_drivers", kind="api")
+    @memoize()
+    def get_championship_drivers(session_key):
+        """Driver championship standings, before and after the session."""
+        return records_frame(F1Client.fetch("championship_drivers", session_key=session_key), "championship_drivers")
+
+    @staticmethod
+    @timed("F1Client.get_championship_teams", kind="api")
+    @memoize()
+    def get_championship_teams(session_key):
+        """Constructor (team) championship standings, before and after the session."""
+        return records_frame(F1Client.fetch("championship_teams", session_key=session_key), "championship_teams")
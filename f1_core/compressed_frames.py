@@ -0,0 +1,411 @@
+"""
+Compressed in-memory cache for telemetry frames.
+
+Raw car_data / location frames are mostly redundant: timestamps are almost evenly spaced, gear,
+throttle, brake and DRS change rarely, and the key columns are constant. A CompressedFrame stores
+a DataFrame as blocks of rows (one block per lap when lap start times are known), and inside a
+block every column is encoded by type before the whole block is compressed once:
+
+    delta    timestamps and the index: first value + narrowed int deltas
+    rle      low-cardinality channels: run values + run lengths
+    shuffle  floats: byte-transposed, so exponents/high bytes compress together
+    raw      other integers, narrowed to the smallest int type holding their range
+    pickle   anything else (strings, extension dtypes)
+
+Blocks are compressed with zstd, or lz4 / zlib when zstandard isn't installed, and are only
+decompressed when read: `lap(n)` touches one block, `to_frame()` rebuilds the whole frame.
+CompressedCache keeps its few most recently read frames decompressed as well (F1_TELEMETRY_HOT_FRAMES,
+default 4), so repeat reads of the same races don't pay for to_frame() every time; those decompressed
+copies count toward the cache's byte bound.
+"""
+import os
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+BLOCK_ROWS = 4096  # block size when no lap boundaries are given
+
+try:
+    import zstandard
+
+    CODEC = 'zstd'
+
+    def _compress(data):
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+    def _decompress(data):
+        return zstandard.ZstdDecompressor().decompress(data)
+except ImportError:
+    try:
+        import lz4.frame
+
+        CODEC = 'lz4'
+        _compress = lz4.frame.compress
+        _decompress = lz4.frame.decompress
+    except ImportError:
+        CODEC = 'zlib'
+
+        def _compress(data):
+            return zlib.compress(data, 6)
+
+        _decompress = zlib.decompress
+
+
+def _narrow(values):
+    """Smallest signed int type that holds the range of `values` (a simple form of bit packing)."""
+    values = values.astype('<i8', copy=False)
+    if len(values) == 0:
+        return values.astype('<i1')
+    lo, hi = values.min(), values.max()
+    for dtype in ('<i1', '<i2', '<i4'):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _as_numpy(series):
+    """(plain numpy values, how to rebuild the column) or (None, None) for pickled columns."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype) or (isinstance(dtype, np.dtype) and dtype.kind == 'M'):
+        return series.array.asi8, 'datetime'
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+        return series.to_numpy(), 'numeric'
+    return None, None
+
+
+def _encode_column(values, kind, prefer_delta=False):
+    """Returns (encoding, buffers) for one column's values within a block."""
+    if kind is None:
+        return 'pickle', [np.frombuffer(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL), dtype='u1')]
+
+    if values.dtype.kind == 'b':
+        values = values.view('u1')
+
+    n = len(values)
+    if n > 1:
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        if len(changes) + 1 <= n // 4 and not prefer_delta:
+            starts = np.concatenate(([0], changes))
+            lengths = np.diff(np.concatenate((starts, [n])))
+            run_values = values[starts]
+            if run_values.dtype.kind in 'iu':
+                run_values = _narrow(run_values)
+            return 'rle', [run_values, _narrow(lengths)]
+
+    if values.dtype.kind in 'iu' and (prefer_delta or kind == 'datetime'):
+        first = values[:1].astype('<i8')
+        return 'delta', [first, _narrow(np.diff(values.astype('<i8')))]
+    if values.dtype.kind == 'f':
+        width = values.dtype.itemsize
+        return 'shuffle', [np.ascontiguousarray(values.view('u1').reshape(-1, width).T).reshape(-1)]
+    if values.dtype.kind in 'iu':
+        return 'raw', [_narrow(values)]
+    return 'raw', [values]
+
+
+def _decode_column(encoding, buffers, n, dtype):
+    if encoding == 'pickle':
+        return pickle.loads(buffers[0].tobytes())
+    if encoding == 'rle':
+        values = np.repeat(buffers[0], buffers[1])
+    elif encoding == 'delta':
+        first, deltas = buffers
+        values = np.empty(n, dtype='<i8')
+        if n:
+            values[0] = first[0]
+            np.cumsum(deltas, dtype='<i8', out=values[1:])
+            values[1:] += first[0]
+    elif encoding == 'shuffle':
+        width = np.dtype(dtype).itemsize
+        values = np.ascontiguousarray(buffers[0].reshape(width, -1).T).reshape(-1).view(dtype)
+    else:
+        values = buffers[0]
+    return values
+
+
+def _restore(values, kind, dtype):
+    if kind == 'datetime':
+        unit = getattr(dtype, 'unit', None) or np.datetime_data(dtype)[0]
+        stamps = values.astype('<i8', copy=False).view(f'M8[{unit}]')
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return pd.DatetimeIndex(stamps).tz_localize('UTC').tz_convert(dtype.tz)
+        return stamps
+    if kind == 'numeric':
+        if np.dtype(dtype).kind == 'b':
+            return values.view('?') if values.dtype.itemsize == 1 else values.astype('?')
+        return values.astype(dtype, copy=False)
+    return values
+
+
+class _Block:
+    __slots__ = ('data', 'rows', 'layout', 'label')
+
+    def __init__(self, data, rows, layout, label):
+        self.data = data      # compressed bytes
+        self.rows = rows
+        self.layout = layout  # [(column, encoding, [(dtype, length), ...]), ...]
+        self.label = label    # lap number, or None
+
+
+class CompressedFrame:
+    """A DataFrame held as independently compressed row blocks."""
+
+    INDEX = '__index__'
+
+    def __init__(self, blocks, columns, kinds, dtypes, index_name, raw_nbytes):
+        self.blocks = blocks
+        self.columns = columns
+        self.kinds = kinds
+        self.dtypes = dtypes
+        self.index_name = index_name
+        self.raw_nbytes = raw_nbytes
+        self.nbytes = sum(len(block.data) for block in blocks)
+        self.rows = sum(block.rows for block in blocks)
+        self._laps = {block.label: i for i, block in enumerate(blocks) if block.label is not None}
+
+    @classmethod
+    def from_frame(cls, df, time_column='date', split_times=None, split_labels=None):
+        """
+        Compresses `df`. With `split_times` (sorted timestamps, e.g. lap starts) and a
+        time-sorted `time_column`, each block holds the rows of one lap and is labelled
+        with the matching entry of `split_labels`.
+        """
+        kinds = {}
+        arrays = {}
+        for column in df.columns:
+            values, kind = _as_numpy(df[column])
+            kinds[column] = kind
+            arrays[column] = values if kind is not None else df[column].to_numpy(dtype=object)
+        arrays[cls.INDEX] = df.index.to_numpy()
+        kinds[cls.INDEX] = 'numeric' if df.index.dtype.kind in 'iu' else None
+        if kinds[cls.INDEX] is None:
+            arrays[cls.INDEX] = df.index.to_numpy(dtype=object)
+
+        bounds, labels = cls._block_bounds(df, time_column, split_times, split_labels)
+
+        blocks = []
+        for (start, end), label in zip(bounds, labels):
+            layout = []
+            buffers = []
+            for column, values in arrays.items():
+                encoding, column_buffers = _encode_column(
+                    values[start:end], kinds[column], prefer_delta=(column == cls.INDEX))
+                layout.append((column, encoding, [(b.dtype.str, len(b)) for b in column_buffers]))
+                buffers.extend(np.ascontiguousarray(b).tobytes() for b in column_buffers)
+            blocks.append(_Block(_compress(b''.join(buffers)), end - start, layout, label))
+
+        dtypes = {column: df[column].dtype for column in df.columns}
+        dtypes[cls.INDEX] = df.index.dtype
+        return cls(blocks, list(df.columns), kinds, dtypes, df.index.name,
+                   int(df.memory_usage(index=True, deep=False).sum()))
+
+    @staticmethod
+    def _block_bounds(df, time_column, split_times, split_labels):
+        n = len(df)
+        if (split_times is not None and len(split_times) and time_column in df.columns
+                and df[time_column].is_monotonic_increasing):
+            positions = np.asarray(df[time_column].searchsorted(pd.Series(split_times).dropna(), side='left'))
+            edges = np.concatenate(([0], positions, [n]))
+            if split_labels is None:
+                split_labels = range(1, len(positions) + 1)
+            labels = [None] + [int(label) for label in split_labels]
+            pairs = [((int(edges[i]), int(edges[i + 1])), labels[i]) for i in range(len(edges) - 1)]
+            # Empty blocks (laps with no samples) are dropped, except to keep an empty frame readable
+            pairs = [p for p in pairs if p[0][1] > p[0][0]] or [((0, 0), None)]
+            return [p[0] for p in pairs], [p[1] for p in pairs]
+
+        starts = list(range(0, n, BLOCK_ROWS)) or [0]
+        return [(s, min(s + BLOCK_ROWS, n)) for s in starts], [None] * len(starts)
+
+    def _decode_block(self, block):
+        raw = _decompress(block.data)
+        columns = {}
+        offset = 0
+        for column, encoding, shapes in block.layout:
+            buffers = []
+            for dtype, length in shapes:
+                size = np.dtype(dtype).itemsize * length
+                buffers.append(np.frombuffer(raw, dtype=dtype, count=length, offset=offset))
+                offset += size
+            columns[column] = _decode_column(encoding, buffers, block.rows, self.dtypes[column])
+        return columns
+
+    def _build(self, decoded):
+        """DataFrame from a list of decoded blocks (restores dtypes and the index)."""
+        data = {}
+        for column in self.columns + [self.INDEX]:
+            parts = [block[column] for block in decoded]
+            values = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            data[column] = _restore(values, self.kinds[column], self.dtypes[column])
+        index = pd.Index(data.pop(self.INDEX), name=self.index_name)
+        if self.kinds[self.INDEX] == 'numeric':
+            index = index.astype(self.dtypes[self.INDEX], copy=False)
+        frame = pd.DataFrame(data, index=index, columns=self.columns)
+        for column in self.columns:
+            if self.kinds[column] is None and frame[column].dtype != self.dtypes[column]:
+                frame[column] = frame[column].astype(self.dtypes[column])
+        return frame
+
+    def to_frame(self):
+        """Decompresses every block (one at a time) into a fresh DataFrame."""
+        return self._build([self._decode_block(block) for block in self.blocks])
+
+    def lap(self, lap_number):
+        """Rows of one lap; only that lap's block is decompressed."""
+        index = self._laps.get(lap_number)
+        if index is None:
+            return self._build([self._decode_block(self.blocks[0])]).iloc[0:0]
+        return self._build([self._decode_block(self.blocks[index])])
+
+    @property
+    def ratio(self):
+        return self.raw_nbytes / self.nbytes if self.nbytes else 0.0
+
+
+class CompressedCache:
+    """
+    Thread-safe LRU of CompressedFrames, bounded by the bytes it holds.
+
+    Decompressing a whole race (to_frame) costs tens of ms per frame, so the `hot_frames` most
+    recently read frames are also kept decompressed; hits on them return a shallow view
+    (the values are shared and must be treated as read-only, as in frame_store.py). The bound
+    covers both tiers: compressed frames plus the decompressed hot copies, and when it is
+    exceeded hot copies are dropped before compressed frames are evicted.
+    """
+
+    def __init__(self, max_bytes, hot_frames=4):
+        self.max_bytes = max_bytes
+        self.hot_frames = hot_frames
+        self._entries = OrderedDict()
+        self._hot = OrderedDict()  # key -> decompressed DataFrame
+        self._lock = threading.Lock()
+        self._building = {}
+        self.nbytes = 0      # compressed frames
+        self.raw_nbytes = 0  # their uncompressed size
+        self.hot_nbytes = 0  # decompressed hot copies
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            frame = self._entries.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def get_frame(self, key):
+        """The decompressed DataFrame for `key` (from the hot tier when possible), or None."""
+        with self._lock:
+            hot = self._hot.get(key)
+            if hot is not None:
+                self._hot.move_to_end(key)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hot.copy(deep=False)
+        frame = self.get(key)
+        if frame is None:
+            return None
+        decompressed = frame.to_frame()
+        if self.hot_frames:
+            with self._lock:
+                if self._entries.get(key) is frame and key not in self._hot:  # not evicted or replaced meanwhile
+                    self._hot[key] = decompressed
+                    self.hot_nbytes += frame.raw_nbytes
+                    while len(self._hot) > self.hot_frames:
+                        self._drop_hot(next(iter(self._hot)))
+                    self._trim()
+        return decompressed.copy(deep=False)
+
+    def _drop_hot(self, key):
+        """Forgets the decompressed copy of `key`, if any (call with the lock held)."""
+        if self._hot.pop(key, None) is not None:
+            self.hot_nbytes -= self._entries[key].raw_nbytes
+
+    def _trim(self):
+        """Evicts until both tiers fit max_bytes: oldest hot copies first (call with the lock held)."""
+        while self.nbytes + self.hot_nbytes > self.max_bytes and self._hot:
+            self._drop_hot(next(iter(self._hot)))
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.raw_nbytes -= evicted.raw_nbytes
+
+    def build_lock(self, key):
+        """Per-key lock, so concurrent misses on one key run a single build (as memoize does)."""
+        with self._lock:
+            return self._building.setdefault(key, threading.Lock())
+
+    def _build_done(self, key):
+        with self._lock:
+            self._building.pop(key, None)
+
+    def put(self, key, frame):
+        with self._lock:
+            if key in self._entries:
+                self._drop_hot(key)
+                old = self._entries.pop(key)
+                self.nbytes -= old.nbytes
+                self.raw_nbytes -= old.raw_nbytes
+            self._entries[key] = frame
+            self.nbytes += frame.nbytes
+            self.raw_nbytes += frame.raw_nbytes
+            self._trim()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hot.clear()
+            self.nbytes = self.raw_nbytes = self.hot_nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes + self.hot_nbytes,
+                    'compressed_bytes': self.nbytes, 'raw_bytes': self.raw_nbytes,
+                    'hot': len(self._hot), 'hot_bytes': self.hot_nbytes, 'hits': self.hits, 'misses': self.misses, 'codec': CODEC}
+
+
+# Shared by every session of the app process (like st.cache_data)
+TELEMETRY_CACHE = CompressedCache(int(float(os.environ.get("F1_TELEMETRY_CACHE_MB", 512)) * 1024 * 1024),
+                                  hot_frames=int(os.environ.get("F1_TELEMETRY_HOT_FRAMES", 4)))
+
+
+def compressed_cache(cache, name, split=None):
+    """
+    Memoizes a DataFrame-returning function in `cache`, keyed by (name, *args).
+    `split(*args)` may return (lap start times, lap numbers) to compress one block per lap.
+    Empty results (failed requests) are not cached. Concurrent misses on one key are coalesced
+    into a single call of the function.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            key = (name,) + args
+            frame = cache.get_frame(key)
+            if frame is not None:
+                return frame
+
+            with cache.build_lock(key):
+                # Another thread may have built it while we waited
+                frame = cache.get_frame(key)
+                if frame is not None:
+                    return frame
+                try:
+                    result = func(*args)
+                    if isinstance(result, pd.DataFrame) and not result.empty:
+                        split_times, split_labels = split(*args) if split is not None else (None, None)
+                        cache.put(key, CompressedFrame.from_frame(result, split_times=split_times,
+                                                                  split_labels=split_labels))
+                finally:
+                    cache._build_done(key)
+            return result
+        return wrapper
+    return decorator
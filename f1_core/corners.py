@@ -0,0 +1,165 @@
+"""
+Corner index of a circuit, and per-corner metrics for every lap of every driver.
+
+The index is derived once per circuit from one reference lap of merged telemetry (x, y, speed,
+Total_distance). The reference lap is resampled to REFERENCE_POINTS points along its distance,
+which gives a track coordinate: any telemetry sample is placed at the distance (m) of its
+nearest reference point. Corners are the speed valleys of the reference lap that drop at least
+MIN_SPEED_DROP km/h below the straights around them:
+
+    entry   end of the preceding straight (the speed peak before the valley)
+    apex    lowest speed of the valley
+    exit    where the speed has recovered EXIT_RECOVERY of the way to the next peak
+
+Everything outside [entry - BRAKE_MARGIN, exit] of some corner is a straight.
+
+`CornerIndex.metrics(df)` segments any number of laps and drivers at once and returns one row
+per (driver, lap, corner) with compact dtypes:
+
+    brake_point      m before the apex where the brakes first went on (NaN: no braking)
+    apex_speed       minimum speed in the corner (km/h)
+    exit_speed       speed when leaving the corner (km/h)
+    throttle_point   m after the apex where the throttle reached THROTTLE_ON % again
+
+The nearest-point lookup assumes the track doesn't cross itself (a figure-eight circuit like
+Suzuka can put samples near the crossing on the wrong branch).
+"""
+import numpy as np
+import pandas as pd
+
+REFERENCE_POINTS = 500
+MIN_SPEED_DROP = 30
+EXIT_RECOVERY = 0.8
+BRAKE_MARGIN = 100
+THROTTLE_ON = 90
+_CHUNK = 8192
+
+CORNER_COLUMNS = ['corner', 'entry', 'apex', 'exit', 'apex_x', 'apex_y', 'reference_speed']
+METRIC_COLUMNS = ['driver_number', 'lap_number', 'corner', 'brake_point', 'apex_speed', 'exit_speed',
+                  'throttle_point']
+
+
+class CornerIndex:
+    def __init__(self, track_x, track_y, track_distance, corners):
+        self.track_x = track_x
+        self.track_y = track_y
+        self.track_distance = track_distance
+        self.corners = corners
+
+    @classmethod
+    def empty(cls):
+        none = np.array([], dtype=np.float32)
+        return cls(none, none, none, pd.DataFrame(columns=CORNER_COLUMNS))
+
+    # --- Segmentation ---
+    def locate(self, x, y):
+        """Track distance (m) of each (x, y) sample: that of its nearest reference point."""
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        nearest = np.empty(len(x), dtype=np.int64)
+        for start in range(0, len(x), _CHUNK):
+            dx = x[start:start + _CHUNK, None] - self.track_x[None, :]
+            dy = y[start:start + _CHUNK, None] - self.track_y[None, :]
+            nearest[start:start + _CHUNK] = np.argmin(dx * dx + dy * dy, axis=1)
+        return self.track_distance[nearest]
+
+    def corner_of(self, distance):
+        """Corner number at each track distance, 0 on straights."""
+        if self.corners.empty:
+            return np.zeros(len(distance), dtype=np.int8)
+        exits = self.corners['exit'].to_numpy()
+        starts = np.maximum(self.corners['entry'].to_numpy() - BRAKE_MARGIN, np.r_[0, exits[:-1]])
+        zone = np.searchsorted(starts, distance, side='right') - 1
+        inside = (zone >= 0) & (distance <= exits[np.maximum(zone, 0)])
+        return np.where(inside, zone + 1, 0).astype(np.int8)
+
+    # --- Metrics ---
+    def metrics(self, df):
+        """
+        Per-corner metrics of every (driver_number, lap_number) in `df`, a merged telemetry frame
+        of one or more drivers (x, y, speed, brake, throttle, lap_number, driver_number).
+        """
+        if df.empty or self.corners.empty:
+            return pd.DataFrame(columns=METRIC_COLUMNS)
+        df = df.dropna(subset=['x', 'y', 'lap_number'])
+        distance = self.locate(df['x'].to_numpy(), df['y'].to_numpy())
+        corner = self.corner_of(distance)
+        keep = corner > 0
+        apex = self.corners['apex'].to_numpy()[corner[keep] - 1]
+        distance = distance[keep]
+
+        samples = pd.DataFrame({
+            'driver_number': df['driver_number'].to_numpy()[keep],
+            'lap_number': df['lap_number'].to_numpy()[keep],
+            'corner': corner[keep],
+            'speed': df['speed'].to_numpy()[keep],
+            # distances only where the event happened, so max() / min() find the first one
+            'brake_point': np.where((df['brake'].to_numpy()[keep] > 0) & (distance <= apex), apex - distance, np.nan),
+            'throttle_point': np.where((df['throttle'].to_numpy()[keep] >= THROTTLE_ON) & (distance >= apex),
+                                       distance - apex, np.nan),
+        })
+        grouped = samples.groupby(['driver_number', 'lap_number', 'corner'], sort=True)
+        result = pd.DataFrame({
+            'brake_point': grouped['brake_point'].max(),
+            'apex_speed': grouped['speed'].min(),
+            'exit_speed': grouped['speed'].last(),
+            'throttle_point': grouped['throttle_point'].min(),
+        }).reset_index()
+        return result.astype({'driver_number': np.int16, 'lap_number': np.int16, 'corner': np.int8,
+                              'brake_point': np.float32, 'apex_speed': np.float32, 'exit_speed': np.float32,
+                              'throttle_point': np.float32})[METRIC_COLUMNS]
+
+
+def build_corner_index(reference_lap, points=REFERENCE_POINTS, min_drop=MIN_SPEED_DROP):
+    """reference_lap: merged telemetry of one clean lap (x, y, speed, Total_distance), in time order."""
+    lap = reference_lap.dropna(subset=['x', 'y', 'speed', 'Total_distance'])
+    if len(lap) < 10:
+        return CornerIndex.empty()
+
+    # Resample evenly along the lap distance
+    raw_distance = (lap['Total_distance'] - lap['Total_distance'].iloc[0]).to_numpy()
+    distance = np.linspace(0, raw_distance[-1], points)
+    x = np.interp(distance, raw_distance, lap['x'].to_numpy(dtype=float))
+    y = np.interp(distance, raw_distance, lap['y'].to_numpy(dtype=float))
+    speed = pd.Series(np.interp(distance, raw_distance, lap['speed'].to_numpy(dtype=float))) \
+        .rolling(5, center=True, min_periods=1).mean().to_numpy()
+
+    corners = _corners(distance, x, y, speed, min_drop)
+    return CornerIndex(x.astype(np.float32), y.astype(np.float32), distance.astype(np.float32), corners)
+
+
+def _corners(distance, x, y, speed, min_drop):
+    # Alternating speed peaks and valleys (the lap ends count as peaks)
+    slope = np.sign(np.diff(speed))
+    slope = pd.Series(np.where(slope == 0, np.nan, slope)).ffill().bfill().to_numpy()
+    turns = np.flatnonzero(slope[1:] != slope[:-1]) + 1
+    extrema = [0]
+    for i in turns:
+        if (slope[i - 1] < 0) == (len(extrema) % 2 == 1):
+            extrema.append(i)
+        else:  # a peak right after the start replaces the start
+            extrema[-1] = i
+    if len(extrema) % 2 == 0:
+        extrema.append(len(speed) - 1)
+
+    # Drop shallow valleys, merging their neighbouring peaks into the higher one
+    changed = True
+    while changed and len(extrema) > 2:
+        changed = False
+        for k in range(1, len(extrema) - 1, 2):
+            before, valley, after = extrema[k - 1], extrema[k], extrema[k + 1]
+            if min(speed[before], speed[after]) - speed[valley] < min_drop:
+                keep = before if speed[before] >= speed[after] else after
+                extrema[k - 1:k + 2] = [keep]
+                changed = True
+                break
+
+    rows = []
+    for k in range(1, len(extrema) - 1, 2):
+        before, valley, after = extrema[k - 1], extrema[k], extrema[k + 1]
+        target = speed[valley] + EXIT_RECOVERY * (speed[after] - speed[valley])
+        exit_ = valley + int(np.argmax(speed[valley:after + 1] >= target))
+        rows.append({'corner': len(rows) + 1, 'entry': distance[before], 'apex': distance[valley],
+                     'exit': distance[exit_], 'apex_x': x[valley], 'apex_y': y[valley],
+                     'reference_speed': speed[valley]})
+    return pd.DataFrame(rows, columns=CORNER_COLUMNS)
@@ -0,0 +1,21 @@
+class F1DataError(Exception):
+    """Base class for every failure of the data layer."""
+
+
+class UpstreamError(F1DataError):
+    """The OpenF1 API could not be reached or answered with an error status."""
+
+    def __init__(self, url, status=None, message=None):
+        self.url = url
+        self.status = status
+        if message is None:
+            message = f"Server Error: {status} ({url})" if status is not None else f"Request failed ({url})"
+        super().__init__(message)
+
+
+class ParseError(F1DataError):
+    """The upstream answered, but not with the JSON payload we expect."""
+
+
+class NoDataError(F1DataError):
+    """The upstream has no data for the request (e.g. a session without laps yet)."""
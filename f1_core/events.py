@@ -0,0 +1,136 @@
+"""
+Position-change event index of a session, built in one vectorized pass over the position stream.
+
+The OpenF1 /position stream only reports a driver when their position changes, and the two
+drivers of a swap can arrive at slightly different timestamps (briefly sharing a position).
+The index therefore works on pairwise order: for every pair of drivers it forward-fills who was
+ahead, and an event is every moment that relation flips. Each event says who passed whom,
+when, on which lap (of the passer), and both drivers' new positions.
+
+Alongside the events, the index keeps
+    start_positions / finish_positions   first and last reported position per driver
+    matrix                               driver x time-bucket positions (int8, 0 = unknown)
+so timelines, "biggest mover" and lap-range questions are array lookups instead of merges.
+"""
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ['date', 'lap_number', 'driver_number', 'passed_driver_number', 'position', 'passed_position']
+BUCKET_SECONDS = 10
+
+
+class EventIndex:
+    def __init__(self, drivers, start_positions, finish_positions, events, bucket_starts, matrix):
+        self.drivers = drivers
+        self.start_positions = start_positions
+        self.finish_positions = finish_positions
+        self.events = events
+        self.bucket_starts = bucket_starts
+        self.matrix = matrix
+
+    @classmethod
+    def empty(cls):
+        none = np.array([], dtype=np.int64)
+        return cls(none, none, none, pd.DataFrame(columns=EVENT_COLUMNS), pd.DatetimeIndex([], tz='UTC'),
+                   np.zeros((0, 0), dtype=np.int8))
+
+    # --- Lookups ---
+    def positions_at(self, date):
+        """Position of every driver at `date` (bucket resolution), indexed by driver number; 0 = unknown."""
+        if not len(self.bucket_starts):
+            return pd.Series(dtype=np.int8)
+        bucket = np.clip(self.bucket_starts.searchsorted(date, side='right') - 1, 0, len(self.bucket_starts) - 1)
+        return pd.Series(self.matrix[:, bucket], index=self.drivers)
+
+    def gains(self):
+        """Positions gained from first to last report (negative = lost), indexed by driver number."""
+        return pd.Series(self.start_positions - self.finish_positions, index=self.drivers)
+
+    def biggest_mover(self):
+        """(driver number, positions gained) of the biggest gainer (best start position on ties), or (None, 0)."""
+        if not len(self.drivers):
+            return None, 0
+        gains = self.start_positions - self.finish_positions
+        best = int(np.lexsort((self.start_positions, -gains))[0])
+        return int(self.drivers[best]), int(gains[best])
+
+    def events_between(self, first_lap=None, last_lap=None, driver_number=None):
+        """Events on laps first_lap..last_lap (inclusive), optionally only those involving one driver."""
+        events = self.events
+        mask = np.ones(len(events), dtype=bool)
+        if first_lap is not None:
+            mask &= (events['lap_number'] >= first_lap).fillna(False).to_numpy(dtype=bool)
+        if last_lap is not None:
+            mask &= (events['lap_number'] <= last_lap).fillna(False).to_numpy(dtype=bool)
+        if driver_number is not None:
+            mask &= ((events['driver_number'] == driver_number) |
+                     (events['passed_driver_number'] == driver_number)).to_numpy()
+        return events[mask]
+
+
+def build_event_index(positions, laps=None, bucket_seconds=BUCKET_SECONDS):
+    """
+    positions: the normalized /position frame (sorted by date); laps: the normalized /laps frame
+    of the session, used to put a lap number on each event.
+    """
+    if positions.empty:
+        return EventIndex.empty()
+
+    tz = positions['date'].dt.tz
+    driver_numbers = positions['driver_number'].to_numpy()
+    reported = positions['position'].to_numpy()
+    drivers, driver_idx = np.unique(driver_numbers, return_inverse=True)
+    times, time_idx = np.unique(positions['date'].to_numpy(dtype='datetime64[ns]'), return_inverse=True)
+
+    # First / last report per driver (the stream is in time order)
+    first = np.unique(driver_idx, return_index=True)[1]
+    last = len(driver_idx) - 1 - np.unique(driver_idx[::-1], return_index=True)[1]
+    start_positions = reported[first].astype(np.int64)
+    finish_positions = reported[last].astype(np.int64)
+
+    # Position of every driver after each timestamp (time x driver)
+    state = np.full((len(times), len(drivers)), np.nan)
+    state[time_idx, driver_idx] = reported
+    state = pd.DataFrame(state).ffill().to_numpy()
+
+    # Pairwise order (-1: a ahead of b), ties carry the previous order forward
+    a, b = np.triu_indices(len(drivers), k=1)
+    order = np.sign(state[:, a] - state[:, b])
+    order[order == 0] = np.nan
+    order = pd.DataFrame(order).ffill().to_numpy()
+    step, pair = np.nonzero(order[1:] * order[:-1] < 0)
+    row = step + 1
+    a_ahead = order[row, pair] < 0
+    passer = np.where(a_ahead, a[pair], b[pair])
+    passed = np.where(a_ahead, b[pair], a[pair])
+
+    events = pd.DataFrame({
+        'date': pd.DatetimeIndex(times[row]).tz_localize(tz),
+        'driver_number': drivers[passer],
+        'passed_driver_number': drivers[passed],
+        'position': state[row, passer].astype(np.int64),
+        'passed_position': state[row, passed].astype(np.int64),
+    }).sort_values(['date', 'position'], kind='stable', ignore_index=True)
+    events['lap_number'] = _lap_numbers(events, laps)
+    events = events[EVENT_COLUMNS]
+
+    # Driver x bucket matrix: the state at the end of each bucket, carried through empty buckets
+    offsets = (times - times[0]) // np.timedelta64(bucket_seconds, 's')
+    last_in_bucket = np.r_[offsets[1:] != offsets[:-1], True]
+    rows = np.full(offsets[-1] + 1, -1)
+    rows[offsets[last_in_bucket]] = np.nonzero(last_in_bucket)[0]
+    rows = np.maximum.accumulate(rows)
+    matrix = np.nan_to_num(state[rows].T, nan=0).astype(np.int8)
+    bucket_starts = pd.DatetimeIndex(times[0] + np.arange(len(rows)) * np.timedelta64(bucket_seconds, 's')).tz_localize(tz)
+
+    return EventIndex(drivers, start_positions, finish_positions, events, bucket_starts, matrix)
+
+
+def _lap_numbers(events, laps):
+    """Lap of the passer at each event (nullable; None before their first lap start)."""
+    if events.empty or laps is None or laps.empty:
+        return pd.array([pd.NA] * len(events), dtype='Int64')
+    lap_starts = laps.dropna(subset=['date_start'])[['date_start', 'driver_number', 'lap_number']]
+    merged = pd.merge_asof(events[['date', 'driver_number']], lap_starts, left_on='date', right_on='date_start',
+                           by='driver_number', direction='backward')
+    return merged['lap_number'].astype('Int64').array
@@ -0,0 +1,148 @@
+"""
+Export of a session's computed frames as Arrow IPC or Parquet (requires pyarrow, which
+Streamlit already depends on).
+
+An export is one zip archive (stored, not compressed) holding a file per table and a
+manifest.json:
+
+    telemetry            race telemetry of the exported drivers: TELEMETRY_SCHEMA
+    laps                 every lap of every driver
+    lap_positions        get_race_positions: laps with the position at their start
+    positions            get_race_positions: the position stream with driver names
+    championship_drivers / championship_teams   standings before and after the session
+
+Telemetry and positions are taken from SHARED_FRAMES under the keys the dashboard leases them
+with, so exporting what a session has loaded reuses its frames and only a frame no session holds
+is built (and dropped again afterwards). Arrow wraps numeric columns that already have the
+export dtype (memory-mapped telemetry) without copying; other columns are converted once, and
+the telemetry of several drivers is chunked rather than concatenated. Every table and the manifest carry SCHEMA_VERSION; it changes when a
+table's columns change meaning, and read_export refuses archives with a newer one.
+
+The telemetry table always has TELEMETRY_SCHEMA, the channels and on-disk dtypes of the
+memory-mapped layout (f1_core/telemetry_mmap.py) plus driver_number, whether or not F1_MMAP_DIR
+is set: the merged frame's other columns (drs, z, time_diff, ...) are left out and its channels
+narrowed, so an archive's columns don't depend on how the exporting app was configured.
+
+    from f1_core.export import export_session, read_export
+    with open("race.zip", "wb") as f:
+        export_session(9472, [1, 44], f, fmt="arrow")
+    tables = read_export("race.zip")          # {"telemetry": DataFrame, ...}
+"""
+import io
+import json
+import zipfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from .client import F1Client
+from .errors import NoDataError
+from .frame_store import SHARED_FRAMES
+from .processor import Processor
+from .telemetry_mmap import CHANNELS
+
+SCHEMA_VERSION = 2
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+_CHANNEL_FIELDS = [pa.field('date', pa.timestamp('ns', tz='UTC'))] + \
+    [pa.field(column, pa.from_numpy_dtype(np.dtype(dtype))) for channel, (column, dtype) in CHANNELS.items()
+     if channel != 'date']
+TELEMETRY_SCHEMA = pa.schema(_CHANNEL_FIELDS + [pa.field('driver_number', pa.int16())])
+
+
+def _with_metadata(table, name, session_key):
+    metadata = dict(table.schema.metadata or {})
+    metadata.update({b'f1.schema_version': str(SCHEMA_VERSION).encode(), b'f1.table': name.encode(),
+                     b'f1.session_key': str(session_key).encode()})
+    return table.replace_schema_metadata(metadata)
+
+
+def _telemetry(session_key, driver_numbers):
+    tables = []
+    for driver_number in driver_numbers:
+        try:
+            df = Processor.get_shared_race_telemetry(session_key, driver_number)
+        except NoDataError:
+            continue
+        if df.empty:
+            continue
+        table = pa.Table.from_pandas(df, schema=pa.schema(_CHANNEL_FIELDS), preserve_index=False)
+        table = table.append_column(TELEMETRY_SCHEMA.field('driver_number'),
+                                    pa.array(np.full(len(table), driver_number, np.int16)))
+        tables.append(table.replace_schema_metadata(None))
+    if not tables:
+        return None
+    return pa.concat_tables(tables)
+
+
+def session_tables(session_key, driver_numbers):
+    """The export's tables (pyarrow.Table, with schema metadata) by name; empty ones are left out."""
+    tables = {}
+    telemetry = _telemetry(session_key, [int(d) for d in driver_numbers])
+    if telemetry is not None:
+        tables['telemetry'] = _with_metadata(telemetry, 'telemetry', session_key)
+
+    lap_positions, positions = SHARED_FRAMES.frame(('race_positions', session_key),
+                                                   lambda: Processor.get_race_positions(session_key))
+    frames = {
+        'laps': F1Client.get_all_laps(session_key),
+        'lap_positions': lap_positions,
+        'positions': positions,
+        'championship_drivers': F1Client.get_championship_drivers(session_key),
+        'championship_teams': F1Client.get_championship_teams(session_key),
+    }
+    for name, df in frames.items():
+        if not df.empty:
+            tables[name] = _with_metadata(pa.Table.from_pandas(df, preserve_index=False), name, session_key)
+    return tables
+
+
+def export_session(session_key, driver_numbers, sink, fmt='arrow'):
+    """Writes the session's export archive to `sink` (a path or a binary file object)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    tables = session_tables(session_key, driver_numbers)
+    manifest = {'schema_version': SCHEMA_VERSION, 'session_key': int(session_key), 'format': fmt,
+                'drivers': [int(d) for d in driver_numbers],
+                'tables': {name: {'file': name + FORMATS[fmt], 'rows': table.num_rows}
+                           for name, table in tables.items()}}
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, table in tables.items():
+            with archive.open(name + FORMATS[fmt], 'w', force_zip64=True) as member:
+                if fmt == 'arrow':
+                    with ipc.new_file(member, table.schema) as writer:
+                        writer.write_table(table)
+                else:
+                    pq.write_table(table, member, compression='zstd')
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    return manifest
+
+
+def export_bytes(session_key, driver_numbers, fmt='arrow'):
+    buffer = io.BytesIO()
+    export_session(session_key, driver_numbers, buffer, fmt)
+    return buffer.getvalue()
+
+
+def read_export(source, as_pandas=True):
+    """Tables of an export archive (path, file object or bytes) by name, as DataFrames or pyarrow.Tables."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        if manifest['schema_version'] > SCHEMA_VERSION:
+            raise ValueError(f"Export has schema version {manifest['schema_version']}, "
+                             f"this reader supports up to {SCHEMA_VERSION}")
+        tables = {}
+        for name, entry in manifest['tables'].items():
+            buffer = pa.py_buffer(archive.read(entry['file']))
+            if manifest['format'] == 'arrow':
+                tables[name] = ipc.open_file(buffer).read_all()
+            else:
+                tables[name] = pq.read_table(pa.BufferReader(buffer))
+    if as_pandas:
+        return {name: table.to_pandas() for name, table in tables.items()}
+    return tables
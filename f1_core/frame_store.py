@@ -0,0 +1,154 @@
+"""
+Process-wide store of shared, read-only frames.
+
+Every browser session looking at the same race needs the same merged telemetry, positions and
+lap tables. Instead of each session keeping its own copy in session state, the frames live
+here once, keyed by what they were built from, e.g. ("race_telemetry", session_key, driver_number),
+and a session only keeps a FrameLease: the key plus a reference count on the entry.
+
+    lease = SHARED_FRAMES.lease(("race_telemetry", 9472, 1),
+                                lambda: Processor.get_race_telemetry(9472, 1))
+    st.session_state['race'] = lease        # a few bytes per user
+    race_df = lease.frame                   # the shared frame
+
+When the last lease on a key is released (explicitly, or because the session that held it was
+dropped and the lease garbage collected), the frame is evicted. `lease.frame` returns a shallow
+copy, so adding columns never leaks into other sessions; the values themselves are shared and
+must be treated as read-only. Empty results (failed loads) are not shared, so they are rebuilt
+on the next request instead of being served to everyone.
+"""
+import threading
+import weakref
+
+import pandas as pd
+
+
+def _is_empty(value):
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    if isinstance(value, tuple):
+        return all(_is_empty(item) for item in value)
+    return value is None
+
+
+def _view(value):
+    """New frame objects over the same data (no values are copied)."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_view(item) for item in value)
+    return value
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, tuple):
+        return sum(_nbytes(item) for item in value)
+    return 0
+
+
+class FrameLease:
+    """One holder's reference on a shared frame. Holds the key, not the frame."""
+    __slots__ = ('key', '_store', '_local', '_finalizer', '__weakref__')
+
+    def __init__(self, store, key, local=None):
+        self.key = key
+        self._store = store
+        self._local = local
+        # Released when the lease is garbage collected (e.g. its Streamlit session ended)
+        self._finalizer = weakref.finalize(self, store._release, key) if key is not None else None
+
+    @property
+    def frame(self):
+        if self.key is None:
+            return _view(self._local)
+        return self._store.get(self.key)
+
+    def release(self):
+        """Drops the reference now (idempotent)."""
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+class FrameStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [value, lease count, nbytes]
+        self._building = {}
+        self.builds = 0
+        self.hits = 0
+
+    def lease(self, key, build):
+        """A lease on the frame for `key`, calling build() only if no one holds it yet."""
+        with self._lock:
+            if self._retain(key):
+                return FrameLease(self, key)
+            key_lock = self._building.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another session may have built it while we waited
+            with self._lock:
+                if self._retain(key):
+                    return FrameLease(self, key)
+            try:
+                value = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            with self._lock:
+                self._building.pop(key, None)
+                self.builds += 1
+                if _is_empty(value):
+                    return FrameLease(self, None, local=value)
+                self._entries[key] = [value, 1, _nbytes(value)]
+                return FrameLease(self, key)
+
+    def frame(self, key, build):
+        """
+        The frame for `key` without keeping a lease: the one sessions already hold, or build()
+        (coalesced with concurrent builds of the key) and dropped again unless someone leased it meanwhile.
+        """
+        lease = self.lease(key, build)
+        try:
+            return lease.frame
+        finally:
+            lease.release()
+
+    def _retain(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry[1] += 1
+        self.hits += 1
+        return True
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._entries[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return _view(entry[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'leases': sum(entry[1] for entry in self._entries.values()),
+                'bytes': sum(entry[2] for entry in self._entries.values()),
+                'builds': self.builds,
+                'hits': self.hits,
+            }
+
+
+SHARED_FRAMES = FrameStore()
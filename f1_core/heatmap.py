@@ -0,0 +1,90 @@
+"""
+Whole-race speed heatmap: every merged telemetry sample of one or more drivers binned into a
+fixed 2D grid over the track (NumPy histogramming, no per-lap work).
+
+Per cell the grid keeps the sample count, mean and max speed and the share of samples with the
+brakes on. Cells are square and the grid has at most BINS cells along the longer side of the
+track, so the figure built from it costs the same whether it holds one lap or the whole field's
+race. Empty cells are NaN (transparent in the heatmap).
+"""
+import numpy as np
+
+BINS = 160
+STATISTICS = {'mean_speed': "Mean speed (km/h)", 'max_speed': "Max speed (km/h)", 'brake_share': "Braking (%)"}
+
+
+class SpeedGrid:
+    def __init__(self, x_edges, y_edges, count, mean_speed, max_speed, brake_share):
+        self.x_edges = x_edges
+        self.y_edges = y_edges
+        self.count = count
+        self.mean_speed = mean_speed
+        self.max_speed = max_speed
+        self.brake_share = brake_share
+
+    @classmethod
+    def empty_grid(cls):
+        none = np.zeros((0, 0), dtype=np.float32)
+        return cls(np.zeros(1), np.zeros(1), np.zeros((0, 0), dtype=np.uint32), none, none, none)
+
+    @property
+    def x_centers(self):
+        return (self.x_edges[:-1] + self.x_edges[1:]) / 2
+
+    @property
+    def y_centers(self):
+        return (self.y_edges[:-1] + self.y_edges[1:]) / 2
+
+    @property
+    def empty(self):
+        return not self.count.any()
+
+    def statistic(self, name):
+        """One of STATISTICS as a (y, x) array, the orientation plotly's Heatmap expects."""
+        if name not in STATISTICS:
+            raise ValueError(f"Unknown statistic: {name}")
+        return getattr(self, name).T
+
+
+def build_speed_grid(frames, bins=BINS):
+    """
+    frames: merged telemetry frames (x, y, speed, brake), e.g. one per driver. They share one
+    grid, sized to the track they cover together.
+    """
+    frames = [df.dropna(subset=['x', 'y', 'speed']) for df in frames]
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return SpeedGrid.empty_grid()
+
+    x = np.concatenate([df['x'].to_numpy(dtype=np.float64) for df in frames])
+    y = np.concatenate([df['y'].to_numpy(dtype=np.float64) for df in frames])
+    speed = np.concatenate([df['speed'].to_numpy(dtype=np.float64) for df in frames])
+    braking = np.concatenate([df['brake'].to_numpy(dtype=np.float64) > 0 for df in frames])
+
+    # Square cells: the longer side of the track gets `bins` of them
+    cell = max(x.max() - x.min(), y.max() - y.min(), 1.0) / bins
+    x_edges = _edges(x, cell)
+    y_edges = _edges(y, cell)
+
+    count, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges))
+    speed_sum, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges), weights=speed)
+    brake_count, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges), weights=braking)
+
+    # histogram2d has no max: scatter it into the same cells
+    xi = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, len(x_edges) - 2)
+    yi = np.clip(np.searchsorted(y_edges, y, side='right') - 1, 0, len(y_edges) - 2)
+    max_speed = np.full(count.shape, -np.inf)
+    np.maximum.at(max_speed, (xi, yi), speed)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        occupied = count > 0
+        mean_speed = np.where(occupied, speed_sum / count, np.nan).astype(np.float32)
+        brake_share = np.where(occupied, 100 * brake_count / count, np.nan).astype(np.float32)
+    max_speed = np.where(occupied, max_speed, np.nan).astype(np.float32)
+    return SpeedGrid(x_edges, y_edges, count.astype(np.uint32), mean_speed, max_speed, brake_share)
+
+
+def _edges(values, cell):
+    edges = values.min() + cell * np.arange(max(int(np.ceil((values.max() - values.min()) / cell)), 1) + 1)
+    edges[-1] = max(edges[-1], values.max())  # rounding must not leave the last sample outside
+    return edges
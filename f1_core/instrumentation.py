@@ -0,0 +1,163 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Span:
+    """One timed stage of a rerun (an API fetch, a merge, a figure build...)."""
+
+    __slots__ = ('name', 'kind', 'start', 'duration', 'depth', 'bytes', 'rows', 'cache', 'error', 'status', 'memory')
+
+    def __init__(self, name, kind, start, depth):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.duration = 0.0
+        self.depth = depth
+        self.bytes = 0
+        self.rows = None
+        self.cache = None
+        self.error = None
+        self.status = None
+        self.memory = None
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Trace:
+    """All spans recorded during one script rerun, in start order."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.spans = []
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def to_records(self):
+        """Span list with start times relative to the beginning of the rerun."""
+        records = []
+        for span in self.spans:
+            record = span.as_dict()
+            record['start'] = span.start - self.started
+            records.append(record)
+        return records
+
+
+# Streamlit runs every browser session's script in its own thread, and cached function
+# bodies run in the caller's thread, so per-thread state is enough to nest spans correctly.
+_local = threading.local()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# Callbacks invoked with every finished span (whether or not a trace is active)
+_listeners = []
+
+
+def add_listener(callback):
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def start_trace(label="rerun"):
+    """Starts recording spans for the current thread/context and returns the Trace."""
+    trace = Trace(label)
+    _local.trace = trace
+    return trace
+
+
+def stop_trace():
+    _local.trace = None
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def stage(name, kind="stage"):
+    """
+    Times a block of code. Usage:
+        with stage("merge_asof telemetry+location") as span:
+            ...
+            span.rows = len(df)
+    """
+    trace = current_trace()
+    stack = _stack()
+    span = Span(name, kind, time.perf_counter(), len(stack))
+    if trace is not None:
+        trace.spans.append(span)
+    stack.append(span)
+    try:
+        yield span
+    except Exception as e:
+        span.error = repr(e)
+        raise
+    finally:
+        span.duration = time.perf_counter() - span.start
+        stack.pop()
+        for callback in _listeners:
+            callback(span)
+
+
+def record_download(num_bytes):
+    """
+    Called by the network layer. Adds bytes to the enclosing spans and marks the
+    enclosing cached call as a cache miss (the body of a cached function only runs on a miss).
+    """
+    for span in _stack():
+        span.bytes += num_bytes
+        if span.kind == 'api':
+            span.cache = 'miss'
+
+
+def _frame_memory(result):
+    frames = result if isinstance(result, tuple) else (result,)
+    return sum(int(f.memory_usage(deep=True).sum()) for f in frames if hasattr(f, 'memory_usage')) or None
+
+
+def _count_rows(result):
+    if hasattr(result, 'columns') and hasattr(result, '__len__'):
+        return len(result)
+    if isinstance(result, tuple):
+        counts = [len(item) for item in result if hasattr(item, 'columns')]
+        return sum(counts) if counts else None
+    return None
+
+
+def timed(name, kind="stage"):
+    """
+    Decorator version of `stage`. Records the row count of returned DataFrames.
+    With kind="api" the wrapped function is assumed to be cached: if no download
+    happened inside it, the call is recorded as a cache hit; on a miss the memory of
+    the newly cached frames is recorded.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, kind) as span:
+                result = func(*args, **kwargs)
+                span.rows = _count_rows(result)
+                if kind == 'api':
+                    if span.cache is None:
+                        span.cache = 'hit'
+                    else:
+                        span.memory = _frame_memory(result)
+                return result
+        return wrapper
+    return decorator
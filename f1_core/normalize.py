@@ -0,0 +1,92 @@
+"""
+Ingest-time normalization of OpenF1 frames.
+
+Every frame F1Client builds goes through `normalize(df, endpoint)` exactly once, before it is
+cached, so everything downstream can rely on these invariants instead of re-parsing,
+re-sorting and re-casting on each call:
+
+    time        the endpoint's time column is datetime64[ns, UTC], sorted ascending (stable).
+                Rows without a time are dropped - except in laps, where they sort last
+                (a lap with a missing start still has a duration)
+    ids         driver_number, and lap_number / position where the endpoint has them, are
+                int64; rows without them are dropped
+    durations   lap_duration is timedelta64[ns]
+
+`violations(df, endpoint)` lists the invariants a frame breaks (tests/test_engine_parity.py
+checks the client frames of the stub sessions).
+"""
+from collections import namedtuple
+
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_integer_dtype, is_timedelta64_dtype
+
+Spec = namedtuple('Spec', ['time', 'ids', 'durations', 'keep_missing_time'], defaults=(None, (), (), False))
+
+SPECS = {
+    'sessions': Spec(ids=('session_key',)),
+    'drivers': Spec(ids=('driver_number',)),
+    'car_data': Spec('date', ids=('driver_number',)),
+    'location': Spec('date', ids=('driver_number',)),
+    'laps': Spec('date_start', ids=('driver_number', 'lap_number'), durations=('lap_duration',),
+                 keep_missing_time=True),
+    'position': Spec('date', ids=('driver_number', 'position')),
+    'session_result': Spec(ids=('driver_number',)),
+    'championship_drivers': Spec(ids=('driver_number',)),
+    'championship_teams': Spec(),
+}
+
+
+def normalize(df, endpoint):
+    """Returns `df` (a freshly built frame, modified in place where possible) in canonical form."""
+    spec = SPECS[endpoint]
+    if df.empty:
+        return df
+
+    ids = [c for c in spec.ids if c in df.columns and not is_integer_dtype(df[c])]
+    if ids:
+        df = df.dropna(subset=ids)
+        df[ids] = df[ids].astype('int64')
+
+    for column in spec.durations:
+        if column in df.columns and not is_timedelta64_dtype(df[column]):
+            df[column] = pd.to_timedelta(df[column], unit='s')
+
+    time = spec.time
+    if time and time in df.columns:
+        if not is_datetime64_any_dtype(df[time]):
+            df[time] = pd.to_datetime(df[time], format='ISO8601', errors='coerce', utc=True)
+        if not spec.keep_missing_time:
+            df = df.dropna(subset=[time])
+        if not df[time].is_monotonic_increasing:
+            df = df.sort_values(time, kind='stable', na_position='last')
+    return df
+
+
+def violations(df, endpoint, time=None):
+    """
+    Invariants of SPECS[endpoint] that `df` breaks (empty list if none). `time` overrides the
+    time column's name (laps_frame renames date_start to date).
+    """
+    spec = SPECS[endpoint]
+    time = time or spec.time
+    found = []
+    if df.empty:
+        return found
+    for column in spec.ids:
+        if column in df.columns and df[column].dtype != 'int64':
+            found.append(f"{endpoint}.{column} is {df[column].dtype}, not int64")
+    for column in spec.durations:
+        if column in df.columns and not is_timedelta64_dtype(df[column]):
+            found.append(f"{endpoint}.{column} is {df[column].dtype}, not timedelta64")
+    if time and time in df.columns:
+        column = df[time]
+        if str(column.dtype) != 'datetime64[ns, UTC]':
+            found.append(f"{endpoint}.{time} is {column.dtype}, not datetime64[ns, UTC]")
+        else:
+            missing = column.isna().to_numpy()
+            # sorted, with any missing times only at the end
+            if not column.dropna().is_monotonic_increasing or (missing[:-1] & ~missing[1:]).any():
+                found.append(f"{endpoint}.{time} is not sorted")
+        if not spec.keep_missing_time and column.isna().any():
+            found.append(f"{endpoint}.{time} has missing values")
+    return found
@@ -0,0 +1,127 @@
+"""
+Stint and race-pace analytics for every driver of a session, computed in one vectorized pass
+over the /laps frame (no per-driver loops).
+
+    laps     one row per lap: stint, tyre age, seconds, clean flag and rolling pace
+    stints   one row per (driver, stint): laps, mean pace and degradation slope (s/lap)
+    drivers  one row per driver: best lap, sector bests, theoretical best, pace, consistency
+
+Stints are split at pit-out laps. A lap is "clean" (counts towards pace, consistency and
+degradation) when it has a duration, is not the opening lap or a pit-out lap, and is within
+CLEAN_THRESHOLD of the driver's median lap (which drops in-laps and safety-car laps).
+Degradation is the least-squares slope of lap time against tyre age, solved for all stints at
+once from per-stint sums.
+"""
+import numpy as np
+import pandas as pd
+
+SECTORS = ['duration_sector_1', 'duration_sector_2', 'duration_sector_3']
+ROLLING_LAPS = 5
+CLEAN_THRESHOLD = 1.07
+MIN_STINT_LAPS = 3
+
+DRIVER_COLUMNS = ['driver_number', 'laps', 'stints', 'best_lap', 'best_sector_1', 'best_sector_2', 'best_sector_3',
+                  'theoretical_best', 'pace', 'consistency', 'degradation']
+
+
+class PaceAnalysis:
+    def __init__(self, laps, stints, drivers):
+        self.laps = laps
+        self.stints = stints
+        self.drivers = drivers
+
+    @classmethod
+    def empty(cls):
+        return cls(pd.DataFrame(), pd.DataFrame(), pd.DataFrame(columns=DRIVER_COLUMNS))
+
+
+def build_pace_analysis(laps, window=ROLLING_LAPS):
+    """laps: the normalized /laps frame of a session (lap_duration is a timedelta)."""
+    if laps.empty or 'lap_duration' not in laps.columns:
+        return PaceAnalysis.empty()
+
+    laps = laps.reindex(columns=['driver_number', 'lap_number', 'lap_duration', 'is_pit_out_lap'] + SECTORS)
+    laps = laps.sort_values(['driver_number', 'lap_number'], kind='stable', ignore_index=True)
+    driver = laps['driver_number'].to_numpy()
+    seconds = laps['lap_duration'].dt.total_seconds().to_numpy()
+    pit_out = laps['is_pit_out_lap'].fillna(False).to_numpy(dtype=bool)
+
+    # --- Stints: a new one starts at every pit-out lap ---
+    new_driver = np.r_[True, driver[1:] != driver[:-1]]
+    stint_id = np.cumsum(new_driver | pit_out) - 1                     # global id of (driver, stint)
+    stint_first_row = np.flatnonzero(new_driver | pit_out)
+    driver_first_stint = np.maximum.accumulate(np.where(new_driver, stint_id, 0))
+    stint = stint_id - driver_first_stint + 1
+    tyre_age = np.arange(len(laps)) - stint_first_row[stint_id]
+
+    # --- Clean laps ---
+    codes, driver_idx = np.unique(driver, return_inverse=True)
+    median = pd.Series(seconds).groupby(driver_idx).transform('median').to_numpy()
+    clean = ~np.isnan(seconds) & ~pit_out & (laps['lap_number'].to_numpy() > 1) & \
+        (seconds <= CLEAN_THRESHOLD * median)
+
+    # --- Rolling pace: lap x driver matrix, rolled down all columns at once ---
+    lap_numbers, lap_idx = np.unique(laps['lap_number'].to_numpy(), return_inverse=True)
+    matrix = np.full((len(lap_numbers), len(codes)), np.nan)
+    matrix[lap_idx[clean], driver_idx[clean]] = seconds[clean]
+    rolling = pd.DataFrame(matrix).rolling(window, min_periods=min(3, window)).mean().to_numpy()
+
+    laps_out = pd.DataFrame({
+        'driver_number': driver,
+        'lap_number': laps['lap_number'].to_numpy(),
+        'stint': stint,
+        'tyre_age': tyre_age,
+        'seconds': seconds,
+        'clean': clean,
+        'rolling_pace': np.where(clean, rolling[lap_idx, driver_idx], np.nan),
+    })
+
+    # --- Degradation: batched least squares over clean laps of each stint ---
+    n_stints = stint_id[-1] + 1
+    x, y, g = tyre_age[clean].astype(float), seconds[clean], stint_id[clean]
+    n = np.bincount(g, minlength=n_stints).astype(float)
+    sx, sy = np.bincount(g, x, n_stints), np.bincount(g, y, n_stints)
+    sxx, sxy = np.bincount(g, x * x, n_stints), np.bincount(g, x * y, n_stints)
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where((n >= MIN_STINT_LAPS) & (denominator > 0), (n * sxy - sx * sy) / denominator, np.nan)
+        mean = sy / n
+    stints = pd.DataFrame({
+        'driver_number': driver[stint_first_row],
+        'stint': stint[stint_first_row],
+        'first_lap': laps['lap_number'].to_numpy()[stint_first_row],
+        'laps': np.bincount(stint_id, minlength=n_stints),
+        'clean_laps': n.astype(np.int64),
+        'mean_pace': mean,
+        'degradation': slope,
+    })
+
+    # --- Per driver ---
+    clean_times = np.where(clean, seconds, np.nan)
+    grouped = pd.DataFrame({'driver': driver_idx, 'seconds': seconds, 'clean': clean_times}) \
+        .join(laps[SECTORS].astype(float)).groupby('driver')
+    drivers = pd.DataFrame({
+        'driver_number': codes,
+        'laps': np.bincount(driver_idx, minlength=len(codes)),
+        'stints': stints.groupby('driver_number')['stint'].max().reindex(codes).to_numpy(),
+        'best_lap': grouped['seconds'].min().to_numpy(),
+    })
+    sector_bests = grouped[SECTORS].min().to_numpy()
+    for i in range(len(SECTORS)):
+        drivers[f'best_sector_{i + 1}'] = sector_bests[:, i]
+    # Sum of the driver's best sectors (unknown if any sector never had a time)
+    drivers['theoretical_best'] = sector_bests.sum(axis=1)
+    drivers['pace'] = grouped['clean'].median().to_numpy()
+    drivers['consistency'] = grouped['clean'].std().to_numpy()
+
+    # Lap-weighted mean of the driver's stint slopes
+    fitted = stints.dropna(subset=['degradation'])
+    weights = fitted['clean_laps'].to_numpy(dtype=float)
+    fitted_driver = np.searchsorted(codes, fitted['driver_number'].to_numpy())
+    weight_sum = np.bincount(fitted_driver, weights, len(codes))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drivers['degradation'] = np.bincount(fitted_driver, weights * fitted['degradation'].to_numpy(),
+                                             len(codes)) / weight_sum
+    drivers.loc[weight_sum == 0, 'degradation'] = np.nan
+
+    return PaceAnalysis(laps_out, stints, drivers[DRIVER_COLUMNS])
@@ -0,0 +1,198 @@
+"""
+Polars execution engine for Processor.
+
+Implements the heavy Processor methods (the asof joins, the start/finish group-bys and the
+driver-name merges) as lazy Polars query plans, which run multi-threaded and get optimized as a
+whole before execution. F1Client still returns pandas frames, and every method here returns exactly
+what the pandas implementation returns (same columns, dtypes and row order), so the app only sees
+pandas at the plotting boundary.
+
+Select it with F1_ENGINE=polars (or Processor.set_engine("polars")) after installing the optional
+`polars` dependency group (`poetry install --with polars`); tests/test_engine_parity.py checks both
+engines against each other.
+"""
+import pandas as pd
+import polars as pl
+
+from .client import F1Client
+from .errors import NoDataError
+from .instrumentation import stage, timed
+from .processor import Processor
+
+
+def _promote_introduced_nulls(frame, columns):
+    """
+    pandas turns an integer column into float64 as soon as a join leaves a row unmatched.
+    Reproduce that, so the pandas output of both engines has identical dtypes.
+    """
+    casts = [pl.col(c).cast(pl.Float64) for c in columns
+             if frame.schema[c].is_integer() and frame[c].null_count() > 0]
+    return frame.with_columns(casts) if casts else frame
+
+
+def _suffix_overlaps(left, right, on):
+    """Rename clashing columns the way pandas merges do (_x for left, _y for right)."""
+    overlap = [c for c in left.collect_schema().names() if c in right.collect_schema().names() and c != on]
+    return (left.rename({c: f"{c}_x" for c in overlap}),
+            right.rename({c: f"{c}_y" for c in overlap}))
+
+
+def _driver_names(drivers_df):
+    return pl.from_pandas(drivers_df[['driver_number', 'full_name']]).lazy().with_columns(
+        pl.col('driver_number').cast(pl.Int64))
+
+
+class PolarsEngine:
+    """Same API (and return values) as the matching Processor methods."""
+
+    @staticmethod
+    @timed("PolarsEngine.get_merged_race_data")
+    def get_merged_race_data(session_key, driver_number):
+        lap_df, date_start_session = F1Client.get_laps(session_key, driver_number)
+        df_tel = F1Client.get_telemetry(session_key, driver_number, date_start_session)
+        df_loc = F1Client.get_location(session_key, driver_number, date_start_session)
+        if df_tel.empty or df_loc.empty:
+            raise NoDataError(f"No car data or location for driver {driver_number} in session {session_key}")
+
+        # Drop rows with missing dates and sort by date (join_asof needs sorted keys)
+        tel = pl.from_pandas(df_tel).lazy().drop_nulls('date').sort('date', maintain_order=True)
+        loc = pl.from_pandas(df_loc).lazy().drop_nulls('date').sort('date', maintain_order=True)
+        laps = (pl.from_pandas(lap_df[['date', 'lap_number']]).lazy()
+                .drop_nulls('date').sort('date', maintain_order=True))
+
+        tel, loc = _suffix_overlaps(tel, loc, on='date')
+        loc_columns = [c for c in loc.collect_schema().names() if c != 'date']
+
+        with stage("polars join_asof car_data+location"):
+            # Merge based on nearest timestamp (car data and location)
+            combined = tel.join_asof(loc, on='date', strategy='nearest', tolerance='500ms').collect()
+
+        combined = _promote_introduced_nulls(combined, loc_columns)
+
+        with stage("polars join_asof laps"):
+            # Drop rows where location matching failed, then attach lap numbers (backward direction)
+            merged = (combined.lazy()
+                      .drop_nulls(['x', 'y'])
+                      .join_asof(laps, on='date', strategy='backward')
+                      .collect())
+
+        merged = _promote_introduced_nulls(merged, ['lap_number'])
+        return merged.to_pandas()
+
+    @staticmethod
+    @timed("PolarsEngine.get_position_data")
+    def get_position_data(session_key):
+        lap_pos_df = F1Client.get_all_drivers_positions(session_key)
+        if lap_pos_df.empty:
+            return pd.DataFrame()
+
+        drivers_df = Processor._drivers(session_key)
+        positions = pl.from_pandas(lap_pos_df[['driver_number', 'position']]).lazy()
+
+        # Determine start (first timestamp) and finish (last timestamp) positions
+        # (pandas' groupby first/last skip missing values, hence drop_nulls)
+        grouped = positions.group_by('driver_number').agg(
+            pl.col('position').drop_nulls().first().alias('start'),
+            pl.col('position').drop_nulls().last().alias('finish'),
+        ).sort('driver_number')
+
+        position_table = pl.concat([
+            grouped.select('driver_number', pl.col('start').alias('position'), pl.lit("Grid Start").alias('type')),
+            grouped.select('driver_number', pl.col('finish').alias('position'), pl.lit("Race Finish").alias('type')),
+        ])
+
+        if not drivers_df.empty:
+            position_table = position_table.with_columns(pl.col('driver_number').cast(pl.Int64)).join(
+                _driver_names(drivers_df), on='driver_number', how='left', maintain_order='left')
+        else:
+            position_table = position_table.with_columns(
+                (pl.lit("Driver ") + pl.col('driver_number').cast(pl.String)).alias('full_name'))
+
+        position_df = position_table.sort(['type', 'position'], descending=[True, False],
+                                          maintain_order=True).collect()
+        return position_df.to_pandas()
+
+    @staticmethod
+    @timed("PolarsEngine.get_race_positions")
+    def get_race_positions(session_key):
+        lap_pos_df = F1Client.get_all_drivers_positions(session_key)
+        drivers_df = Processor._drivers(session_key)
+        all_laps_df = F1Client.get_all_laps(session_key)
+
+        if lap_pos_df.empty or all_laps_df.empty:
+            return pd.DataFrame(), pd.DataFrame()
+
+        # Dates are parsed and sorted at ingest (f1_core/normalize.py), identically for both engines
+        all_laps_df = all_laps_df.dropna(subset=['date_start'])
+
+        # Only the join keys go through Polars; the (wide, partly nested) lap rows are
+        # gathered once at the end by row number.
+        lap_keys = pl.from_pandas(all_laps_df[['date_start', 'driver_number']]).lazy().with_row_index('row')
+        positions = pl.from_pandas(lap_pos_df[['date', 'driver_number', 'position']]).lazy()
+
+        with stage("polars join_asof laps+positions"):
+            matched = lap_keys.join_asof(
+                positions,
+                left_on='date_start',
+                right_on='date',
+                by='driver_number',
+                strategy='nearest',
+                tolerance='2s',
+                check_sortedness=False,
+            ).collect()
+
+        matched = _promote_introduced_nulls(matched, ['position']).filter(pl.col('position').is_not_null())
+
+        with_names = not drivers_df.empty
+        if with_names:
+            matched = matched.lazy().with_columns(pl.col('driver_number').cast(pl.Int64)).join(
+                _driver_names(drivers_df), on='driver_number', how='left', maintain_order='left').collect()
+
+        merged_laps = all_laps_df.iloc[matched['row'].to_numpy()].reset_index(drop=True)
+        merged_laps['date'] = matched['date'].to_pandas()
+        merged_laps['position'] = matched['position'].to_pandas()
+
+        dates = pl.from_pandas(lap_pos_df).lazy()
+        if with_names:
+            merged_laps['full_name'] = matched['full_name'].to_pandas()
+            merged_dates = dates.with_columns(pl.col('driver_number').cast(pl.Int64)).join(
+                _driver_names(drivers_df), on='driver_number', how='left', maintain_order='left').collect().to_pandas()
+        else:
+            merged_laps['full_name'] = merged_laps['driver_number'].astype(str)
+            merged_dates = dates.with_columns(
+                pl.col('driver_number').cast(pl.String).alias('full_name')).collect().to_pandas()
+
+        return merged_laps, merged_dates
+
+    @staticmethod
+    @timed("PolarsEngine.get_session_fastest_lap")
+    def get_session_fastest_lap(session_key):
+        all_laps = F1Client.get_all_laps(session_key)
+        drivers = Processor._drivers(session_key)
+
+        if all_laps.empty: return None
+
+        valid_laps = (pl.from_pandas(all_laps[['driver_number', 'lap_number', 'lap_duration']]).lazy()
+                      .with_columns(pl.col('lap_duration').dt.total_nanoseconds())
+                      .filter(pl.col('lap_duration') > 30 * 10 ** 9)
+                      .collect())
+
+        if valid_laps.is_empty(): return None
+
+        # Find the fastest lap (first occurrence of the minimum, like idxmin)
+        fastest_row = valid_laps.row(valid_laps['lap_duration'].arg_min(), named=True)
+        driver_num = int(fastest_row['driver_number'])
+
+        # Find driver name safely
+        driver_name = f"#{driver_num}"
+        if not drivers.empty:
+            match = drivers[drivers['driver_number'] == driver_num]
+            if not match.empty:
+                driver_name = match['full_name'].iloc[0]
+
+        # Format time nicely (same rounding path as the pandas engine: via Timedelta)
+        total_seconds = pd.Timedelta(fastest_row['lap_duration'], unit='ns').total_seconds()
+        minutes, seconds = divmod(total_seconds, 60)
+        time_str = f"{int(minutes)}:{seconds:06.3f}"
+
+        return {"driver": driver_name, "time": time_str, "lap": int(fastest_row['lap_number'])}
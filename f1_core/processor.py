@@ -0,0 +1,519 @@
+"""
+Race analysis on top of F1Client: merged telemetry, positions, fastest laps, standings.
+Framework-independent; failures of required inputs propagate as f1_core.errors exceptions.
+"""
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from .cache import memoize
+from .client import DRIVER_COLUMNS, F1Client
+from .corners import build_corner_index
+from .errors import F1DataError, NoDataError
+from .events import build_event_index
+from .frame_store import SHARED_FRAMES
+from .heatmap import build_speed_grid
+from .instrumentation import stage, timed
+from .pace import build_pace_analysis
+
+log = logging.getLogger(__name__)
+
+
+class Processor:
+    # Execution engine for the heavy methods: "pandas" (default) or "polars" (see polars_engine.py)
+    ENGINE = os.environ.get("F1_ENGINE", "pandas")
+    # Directory for memory-mapped per-channel telemetry (see telemetry_mmap.py); unset = disabled
+    MMAP_DIR = os.environ.get("F1_MMAP_DIR")
+    # Corner indexes by circuit key (by session key when the circuit is unknown), see corners.py
+    _corner_indexes = {}
+    _corner_building = {}  # key -> lock held while that circuit's index is built
+    _corner_lock = threading.Lock()
+
+    @staticmethod
+    def set_engine(name):
+        if name not in ("pandas", "polars"):
+            raise ValueError(f"Unknown engine: {name}")
+        Processor.ENGINE = name
+
+    @staticmethod
+    def _polars_engine():
+        """
+        Returns the Polars engine when it is selected, None otherwise.
+        Polars is optional: if it isn't installed we fall back to pandas.
+        """
+        if Processor.ENGINE != "polars":
+            return None
+        try:
+            from .polars_engine import PolarsEngine
+        except ImportError as e:
+            log.warning("Polars engine unavailable (%s), falling back to pandas", e)
+            Processor.ENGINE = "pandas"
+            return None
+        return PolarsEngine
+
+    @staticmethod
+    def _drivers(session_key):
+        """Driver names only enrich the results, so a failed lookup falls back to driver numbers."""
+        try:
+            return F1Client.get_drivers(session_key)
+        except F1DataError as e:
+            log.warning("Driver names unavailable for session %s: %s", session_key, e)
+            return pd.DataFrame(columns=DRIVER_COLUMNS)
+
+    @staticmethod
+    @timed("Processor.get_race_telemetry")
+    def get_race_telemetry(session_key, driver_number):
+        """
+        Full-race telemetry for the dashboard. With F1_MMAP_DIR set, the merged frame is written
+        once as memory-mapped channel files and every worker process reads the same pages;
+        otherwise this is get_merged_race_data.
+        """
+        if not Processor.MMAP_DIR:
+            return Processor.get_merged_race_data(session_key, driver_number)
+        try:
+            from .telemetry_mmap import open_or_build
+            mapped = open_or_build(Processor.MMAP_DIR, session_key, driver_number,
+                                   lambda: Processor.get_merged_race_data(session_key, driver_number))
+        except (OSError, ValueError) as e:
+            log.warning("Mapped telemetry unavailable (%s), using the merged frame", e)
+            return Processor.get_merged_race_data(session_key, driver_number)
+        return mapped.frame() if mapped is not None else pd.DataFrame()
+
+    @staticmethod
+    def get_shared_race_telemetry(session_key, driver_number):
+        """
+        get_race_telemetry through SHARED_FRAMES, under the key the dashboard leases it with: the
+        frame a loaded session already holds, merged (and dropped again) only if none does.
+        """
+        return SHARED_FRAMES.frame(('race_telemetry', session_key, int(driver_number)),
+                                   lambda: Processor.get_race_telemetry(session_key, driver_number))
+
+    @staticmethod
+    def get_lap_telemetry(session_key, driver_number, race_df, lap_number):
+        """
+        One lap of get_race_telemetry; from the mapped files only that lap's bytes are read.
+        session_key / driver_number must be the ones race_df was loaded for (the mapped file is
+        looked up by them).
+        """
+        if Processor.MMAP_DIR:
+            from .telemetry_mmap import MappedTelemetry, mapped_path
+            try:
+                return MappedTelemetry(mapped_path(Processor.MMAP_DIR, session_key, driver_number)).lap(lap_number)
+            except (OSError, ValueError):
+                pass
+        return race_df[race_df['lap_number'] == lap_number]
+
+    @staticmethod
+    @timed("Processor.get_merged_race_data")
+    def get_merged_race_data(session_key, driver_number):
+        engine = Processor._polars_engine()
+        if engine is not None:
+            return engine.get_merged_race_data(session_key, driver_number)
+
+        lap_df, date_start_session = F1Client.get_laps(session_key, driver_number)
+        df_tel = F1Client.get_telemetry(session_key, driver_number, date_start_session)
+        df_loc = F1Client.get_location(session_key, driver_number, date_start_session)
+        if df_tel.empty or df_loc.empty:
+            raise NoDataError(f"No car data or location for driver {driver_number} in session {session_key}")
+
+        # Frames arrive typed and sorted by date (f1_core/normalize.py); only laps may have
+        # missing start times (sorted last), which merge_asof can't take
+        lap_df = lap_df.dropna(subset=['date'])
+
+        # Merge based on nearest timestamp (car data and location)
+        with stage("merge_asof car_data+location"):
+            df_combined = pd.merge_asof(
+                df_tel,
+                df_loc,
+                on='date',
+                direction='nearest',
+                tolerance=pd.Timedelta('500ms')
+            )
+
+        # Drop rows where location matching failed (no x, y data)
+        df_combined = df_combined.dropna(subset=['x', 'y'])
+
+        # Merge lap info based on timestamp, adding lap numbers (backward direction)
+        with stage("merge_asof laps"):
+            df_combined_2 = pd.merge_asof(
+                df_combined,
+                lap_df[['date', 'lap_number']],
+                on='date',
+                direction='backward'
+            )
+
+        return df_combined_2
+
+    @staticmethod
+    @timed("Processor.get_position_data")
+    def get_position_data(session_key):
+        """
+        Calculates Start vs Finish positions based on telemetry timestamps.
+        This is reliable even when the official grid info is missing.
+        """
+        engine = Processor._polars_engine()
+        if engine is not None:
+            return engine.get_position_data(session_key)
+
+        index = Processor.get_event_index(session_key)
+        if not len(index.drivers):
+            return pd.DataFrame()
+
+        drivers_df = Processor._drivers(session_key)
+
+        # Start (first report) and finish (last report) positions come straight from the event index
+        start_position = pd.DataFrame({'driver_number': index.drivers, 'position': index.start_positions})
+        finish_position = pd.DataFrame({'driver_number': index.drivers, 'position': index.finish_positions})
+
+        start_position['type'] = "Grid Start"
+        finish_position['type'] = "Race Finish"
+
+        position_table = pd.concat([start_position, finish_position])
+
+        # Merge with driver names
+        if not drivers_df.empty:
+            position_df = pd.merge(position_table, drivers_df[['driver_number', 'full_name']], on='driver_number',
+                                   how='left')
+        else:
+            position_df = position_table
+            position_df['full_name'] = "Driver " + position_df['driver_number'].astype(str)
+
+        position_df = position_df.sort_values(by=['type', 'position'], ascending=[False, True])
+
+        return position_df
+
+    @staticmethod
+    @timed("Processor.get_event_index")
+    @memoize(maxsize=32)
+    def get_event_index(session_key):
+        """
+        Overtake / position-change index of the session (see events.py). Built once per session
+        and shared by the position table, the summary stats and the position-change list.
+        """
+        return build_event_index(F1Client.get_all_drivers_positions(session_key), F1Client.get_all_laps(session_key))
+
+    @staticmethod
+    @timed("Processor.get_position_changes")
+    def get_position_changes(session_key, driver_number):
+        """Every position the driver gained or lost, with the lap and the rival involved."""
+        events = Processor.get_event_index(session_key).events_between(driver_number=int(driver_number))
+        if events.empty:
+            return pd.DataFrame(columns=['Lap', 'Change', 'Rival', 'Position'])
+
+        drivers_df = Processor._drivers(session_key)
+        names = dict(zip(drivers_df['driver_number'], drivers_df['full_name'])) if not drivers_df.empty else {}
+
+        gained = (events['driver_number'] == int(driver_number)).to_numpy()
+        rivals = events['passed_driver_number'].where(gained, events['driver_number'])
+        return pd.DataFrame({
+            'Lap': events['lap_number'].to_numpy(),
+            'Change': pd.Series(gained).map({True: "Gained", False: "Lost"}).to_numpy(),
+            'Rival': [names.get(r, f"#{r}") for r in rivals],
+            'Position': events['position'].where(gained, events['passed_position']).to_numpy(),
+        })
+
+    @staticmethod
+    @timed("Processor.get_pace_analysis")
+    @memoize(maxsize=32)
+    def get_pace_analysis(session_key):
+        """Stints, rolling pace, degradation and sector bests of every driver (see pace.py), once per session."""
+        return build_pace_analysis(F1Client.get_all_laps(session_key))
+
+    @staticmethod
+    @timed("Processor.get_pace_table")
+    def get_pace_table(session_key):
+        """Full-field race pace table, fastest median pace first."""
+        table = Processor.get_pace_analysis(session_key).drivers
+        if table.empty:
+            return pd.DataFrame()
+
+        drivers_df = Processor._drivers(session_key)
+        names = dict(zip(drivers_df['driver_number'], drivers_df['full_name'])) if not drivers_df.empty else {}
+
+        table = table.sort_values(['pace', 'best_lap'], na_position='last', kind='stable')
+        return pd.DataFrame({
+            'Driver': [names.get(d, f"#{d}") for d in table['driver_number']],
+            'Stints': table['stints'].to_numpy(),
+            'Best Lap': table['best_lap'].to_numpy(),
+            'Theoretical Best': table['theoretical_best'].to_numpy(),
+            'Race Pace': table['pace'].to_numpy(),
+            'Consistency': table['consistency'].to_numpy(),
+            'Degradation': table['degradation'].to_numpy(),
+        })
+
+    @staticmethod
+    @timed("Processor.get_corner_index")
+    def get_corner_index(session_key, driver_number, circuit_key=None):
+        """
+        Corners of the circuit (see corners.py), derived once per circuit from the fastest clean
+        lap of the first driver analysed there.
+        """
+        key = ('circuit', int(circuit_key)) if circuit_key is not None else ('session', session_key)
+        with Processor._corner_lock:
+            index = Processor._corner_indexes.get(key)
+            if index is not None:
+                return index
+            build_lock = Processor._corner_building.setdefault(key, threading.Lock())
+
+        # Only builds of the same circuit wait for each other (and for the downloads they need)
+        with build_lock:
+            with Processor._corner_lock:
+                index = Processor._corner_indexes.get(key)
+            if index is not None:
+                return index
+            try:
+                laps = Processor.get_pace_analysis(session_key).laps
+                clean = laps[(laps['driver_number'] == int(driver_number)) & laps['clean']] \
+                    if not laps.empty else laps
+                if clean.empty:
+                    raise NoDataError(f"No clean lap of driver {driver_number} in session {session_key}")
+                reference_lap = int(clean.loc[clean['seconds'].idxmin(), 'lap_number'])
+                race_df = Processor.get_shared_race_telemetry(session_key, driver_number)
+                index = build_corner_index(race_df[race_df['lap_number'] == reference_lap])
+                # An empty index (too short a reference lap) is not kept: the next driver may have a usable one.
+                # Stored before the build lock is dropped, so no caller arriving in between builds it again.
+                if not index.corners.empty:
+                    with Processor._corner_lock:
+                        Processor._corner_indexes[key] = index
+            finally:
+                with Processor._corner_lock:
+                    Processor._corner_building.pop(key, None)
+            return index
+
+    @staticmethod
+    @timed("Processor.get_corner_metrics")
+    @memoize(maxsize=32)
+    def get_corner_metrics(session_key, driver_number, circuit_key=None):
+        """Brake point, apex / exit speed and throttle pickup of every corner on every lap of the driver."""
+        index = Processor.get_corner_index(session_key, driver_number, circuit_key)
+        race_df = Processor.get_shared_race_telemetry(session_key, driver_number)
+        return index.metrics(race_df.assign(driver_number=int(driver_number)))
+
+    @staticmethod
+    @timed("Processor.get_corner_table")
+    def get_corner_table(session_key, driver_number, lap_number, circuit_key=None):
+        """One lap's corners next to the driver's best apex speed of the race at each corner."""
+        metrics = Processor.get_corner_metrics(session_key, driver_number, circuit_key)
+        lap = metrics[metrics['lap_number'] == lap_number]
+        if lap.empty:
+            return pd.DataFrame()
+
+        best_apex = metrics.groupby('corner')['apex_speed'].max()
+        return pd.DataFrame({
+            'Corner': lap['corner'].to_numpy(),
+            'Brake Point': lap['brake_point'].to_numpy(),
+            'Apex Speed': lap['apex_speed'].to_numpy(),
+            'Best Apex': best_apex.reindex(lap['corner']).to_numpy(),
+            'Exit Speed': lap['exit_speed'].to_numpy(),
+            'Throttle Pickup': lap['throttle_point'].to_numpy(),
+        })
+
+    @staticmethod
+    @timed("Processor.get_speed_grid")
+    @memoize(maxsize=16)
+    def get_speed_grid(session_key, driver_numbers):
+        """
+        Whole-race speed heatmap (see heatmap.py) of the drivers in `driver_numbers` (a tuple),
+        binned into one fixed-size grid however many laps and drivers it covers. Loaded drivers are
+        binned from their shared frames; the others are merged without being kept in SHARED_FRAMES.
+        """
+        frames = []
+        for driver_number in driver_numbers:
+            try:
+                frames.append(Processor.get_shared_race_telemetry(session_key, driver_number))
+            except NoDataError as e:
+                # A driver without car data (e.g. did not start) just isn't on the map
+                log.info("Skipping driver %s in the speed heatmap: %s", driver_number, e)
+        return build_speed_grid(frames)
+
+    @staticmethod
+    @timed("Processor.get_race_positions")
+    def get_race_positions(session_key):
+        """
+        Used for the Line Charts (Position changes over laps/time).
+        """
+        engine = Processor._polars_engine()
+        if engine is not None:
+            return engine.get_race_positions(session_key)
+
+        lap_pos_df = F1Client.get_all_drivers_positions(session_key)
+        drivers_df = Processor._drivers(session_key)
+        all_laps_df = F1Client.get_all_laps(session_key)
+
+        if lap_pos_df.empty or all_laps_df.empty:
+            return pd.DataFrame(), pd.DataFrame()
+
+        # Both frames are sorted by time already; laps without a start time can't be matched
+        all_laps_df = all_laps_df.dropna(subset=['date_start'])
+
+        # Prepare subset for merging
+        pos_subset = lap_pos_df[['date', 'driver_number', 'position']]
+
+        # Merge positions with laps
+        with stage("merge_asof laps+positions"):
+            merged_laps = pd.merge_asof(
+                all_laps_df,
+                pos_subset,
+                left_on='date_start',
+                right_on='date',
+                by='driver_number',
+                direction='nearest',
+                tolerance=pd.Timedelta('2s')
+            )
+
+        merged_laps = merged_laps.dropna(subset=['position'])
+
+        # Add driver names if available
+        if not drivers_df.empty:
+            merged_laps = pd.merge(merged_laps, drivers_df[['driver_number', 'full_name']], on='driver_number',
+                                   how='left')
+            merged_dates = pd.merge(lap_pos_df, drivers_df[['driver_number', 'full_name']], on='driver_number',
+                                    how='left')
+        else:
+            merged_laps['full_name'] = merged_laps['driver_number'].astype(str)
+            merged_dates = lap_pos_df.assign(full_name=lap_pos_df['driver_number'].astype(str))
+
+        return merged_laps, merged_dates
+
+    @staticmethod
+    @timed("Processor.get_session_fastest_lap")
+    def get_session_fastest_lap(session_key):
+        """
+        Retrieves details of the fastest lap (lap_duration is a timedelta from ingest).
+        """
+        engine = Processor._polars_engine()
+        if engine is not None:
+            return engine.get_session_fastest_lap(session_key)
+
+        all_laps = F1Client.get_all_laps(session_key)
+        drivers = Processor._drivers(session_key)
+
+        if all_laps.empty: return None
+
+        # Filter valid laps (missing durations compare False)
+        valid_laps = all_laps[all_laps['lap_duration'] > pd.Timedelta(seconds=30)]
+
+        if valid_laps.empty: return None
+
+        # Find the fastest lap
+        fastest_idx = valid_laps['lap_duration'].idxmin()
+        fastest_row = valid_laps.loc[fastest_idx]
+        driver_num = int(fastest_row['driver_number'])
+
+        # Find driver name safely
+        driver_name = f"#{driver_num}"
+        if not drivers.empty:
+            match = drivers[drivers['driver_number'] == driver_num]
+            if not match.empty:
+                driver_name = match['full_name'].iloc[0]
+
+        # Format time nicely
+        total_seconds = fastest_row['lap_duration'].total_seconds()
+        minutes, seconds = divmod(total_seconds, 60)
+        time_str = f"{int(minutes)}:{seconds:06.3f}"
+
+        return {"driver": driver_name, "time": time_str, "lap": int(fastest_row['lap_number'])}
+
+    @staticmethod
+    @timed("Processor.get_session_summary_stats")
+    def get_session_summary_stats(session_key):
+        """
+        Calculates Race Winner, DNFs, and Biggest Mover.
+        Movers use the first/last reported positions (the graph data) instead of API grid_position.
+        """
+        results_df = F1Client.get_session_result(session_key)
+        drivers_df = Processor._drivers(session_key)
+
+        if results_df.empty: return None
+
+        # Merge for names
+        if not drivers_df.empty:
+            results_df = pd.merge(results_df, drivers_df[['driver_number', 'full_name']], on='driver_number',
+                                  how='left')
+        else:
+            results_df['full_name'] = "Driver " + results_df['driver_number'].astype(str)
+
+        stats = {}
+
+        # --- A. The Winner ---
+        winner_row = results_df[results_df['position'] == 1]
+        if not winner_row.empty:
+            stats['winner'] = winner_row['full_name'].iloc[0]
+        else:
+            stats['winner'] = "N/A"
+
+        # --- B. DNFs ---
+        if 'dnf' in results_df.columns:
+            dnf_rows = results_df[results_df['dnf'] == True]
+            stats['dnf_count'] = len(dnf_rows)
+            stats['dnf_names'] = ", ".join(dnf_rows['full_name'].tolist()) if not dnf_rows.empty else "None"
+        else:
+            stats['dnf_count'] = 0
+            stats['dnf_names'] = "None"
+
+        # --- C. Biggest Mover (first vs last reported position, from the event index) ---
+        best_driver_num, max_gain = Processor.get_event_index(session_key).biggest_mover()
+        if best_driver_num is not None:
+            # Get Name
+            mover_name = f"#{best_driver_num}"
+            if not drivers_df.empty:
+                name_match = drivers_df[drivers_df['driver_number'] == best_driver_num]
+                if not name_match.empty:
+                    mover_name = name_match['full_name'].iloc[0]
+
+            stats['mover_name'] = mover_name
+            stats['mover_gain'] = max_gain
+        else:
+            stats['mover_name'] = "N/A"
+            stats['mover_gain'] = 0
+
+        return stats
+
+    @staticmethod
+    @timed("Processor.get_championship_tables")
+    def get_championship_tables(session_key):
+        """
+        Generates clean Driver and Constructor standings tables using official API data.
+        Note: This data is only available for RACE sessions, not Qualifying.
+        """
+        drivers_standings = F1Client.get_championship_drivers(session_key)
+        teams_standings = F1Client.get_championship_teams(session_key)
+        driver_info = Processor._drivers(session_key)
+
+        df_drivers_final = pd.DataFrame()
+        df_teams_final = pd.DataFrame()
+
+        # --- 1. Process Constructors (Teams) ---
+        if not teams_standings.empty:
+            teams_standings['Points Added'] = teams_standings['points_current'] - teams_standings['points_start']
+
+            df_teams_final = teams_standings[['team_name', 'points_start', 'points_current', 'Points Added']].copy()
+            df_teams_final.columns = ['Team', 'Points Before', 'Points After', 'Points Added']
+            df_teams_final = df_teams_final.sort_values(by='Points After', ascending=False)
+
+        # --- 2. Process Drivers ---
+        if not drivers_standings.empty:
+            if not driver_info.empty:
+                merged_drivers = pd.merge(drivers_standings, driver_info, on='driver_number', how='left')
+            else:
+                merged_drivers = drivers_standings
+                merged_drivers['full_name'] = "Driver " + merged_drivers['driver_number'].astype(str)
+                merged_drivers['team_name'] = "Unknown"
+
+            merged_drivers['Points Added'] = merged_drivers['points_current'] - merged_drivers['points_start']
+
+            if 'full_name' not in merged_drivers.columns:
+                merged_drivers['full_name'] = "Driver " + merged_drivers['driver_number'].astype(str)
+            if 'team_name' not in merged_drivers.columns:
+                merged_drivers['team_name'] = "Unknown"
+
+            merged_drivers['team_name'] = merged_drivers['team_name'].fillna('Unknown')
+
+            df_drivers_final = merged_drivers[
+                ['full_name', 'team_name', 'points_start', 'points_current', 'Points Added']].copy()
+            df_drivers_final.columns = ['Driver', 'Team', 'Points Before', 'Points After', 'Points Added']
+            df_drivers_final = df_drivers_final.sort_values(by='Points After', ascending=False)
+
+        return df_drivers_final, df_teams_final
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Rate-limit-aware request scheduler shared by every OpenF1 request of the process.
+
+A token bucket (rate requests/s, `burst` requests at once) paces the upstream calls, and
+callers queue for tokens strictly by priority class, first-come first-served within a class:
+
+    interactive  a user is waiting on the result (the default)
+    prefetch     speculative loads
+    batch        ingestion jobs, backfills
+
+so a batch job can't starve the get_telemetry call a user is waiting on. The class is taken
+from a context variable:
+
+    with request_priority("batch"):
+        store.ingest_year(2024)
+
+On a 429 the bucket is paused for the Retry-After delay (or an exponential backoff) and the
+rate is halved; every success afterwards raises it again step by step up to the configured
+rate (AIMD), which converges on the highest rate the upstream accepts.
+
+Configuration: F1_RATE_LIMIT (requests/s, default 3, 0 = unlimited), F1_RATE_BURST (default 6),
+F1_MAX_RETRIES (retries after a 429, default 3). Waits show up as "queue:<priority>" spans.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from .instrumentation import stage
+
+PRIORITIES = ('interactive', 'prefetch', 'batch')
+
+_priority = contextvars.ContextVar('f1_request_priority', default='interactive')
+
+
+@contextmanager
+def request_priority(name):
+    """Runs the enclosed requests (in this thread / task) in priority class `name`."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {name}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    POLL_SECONDS = 0.01  # async waiters re-check the queue head this often
+    MAX_BACKOFF = 60.0
+
+    def __init__(self, rate=3.0, burst=6, max_retries=3, min_rate=0.2):
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority rank, sequence)
+        self._seq = itertools.count()
+        self.configure(rate, burst, max_retries, min_rate)
+
+    def configure(self, rate=None, burst=None, max_retries=None, min_rate=None):
+        """(Re)sets the limits; rate 0/None disables pacing (429 handling stays active)."""
+        with self._cond:
+            if rate is not None or not hasattr(self, 'max_rate'):
+                self.max_rate = float(rate or 0)
+                self.rate = self.max_rate
+            if burst is not None:
+                self.burst = max(1.0, float(burst))
+            if max_retries is not None:
+                self.max_retries = int(max_retries)
+            if min_rate is not None:
+                self.min_rate = float(min_rate)
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+            self._paused_until = 0.0
+            self._consecutive_throttles = 0
+            self.throttled = 0
+            self.retries = 0
+            self._cond.notify_all()
+
+    # --- Token bucket (all called with the lock held) ---
+    def _refill(self, now):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, ticket, now):
+        """0 if `ticket` got a token, else seconds until it could (None: not at the head of the queue)."""
+        if self._waiting[0] != ticket:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate > 0:
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        heapq.heappop(self._waiting)
+        self._cond.notify_all()
+        return 0
+
+    def _enqueue(self, priority):
+        ticket = (PRIORITIES.index(priority), next(self._seq))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _abandon(self, ticket):
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+
+    # --- Acquiring ---
+    def acquire(self, priority=None):
+        """Blocks until this request may be sent. Returns the seconds waited."""
+        priority = priority or current_priority()
+        started = time.monotonic()
+        with stage(f"queue:{priority}", kind="queue"):
+            with self._cond:
+                ticket = self._enqueue(priority)
+                try:
+                    while True:
+                        delay = self._try_take(ticket, time.monotonic())
+                        if delay == 0:
+                            break
+                        self._cond.wait(delay)
+                except BaseException:
+                    self._abandon(ticket)
+                    raise
+        return time.monotonic() - started
+
+    async def acquire_async(self, priority=None):
+        """acquire() for coroutines: waits on the event loop instead of blocking the thread."""
+        priority = priority or current_priority()
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._try_take(ticket, time.monotonic())
+                if delay == 0:
+                    break
+                await asyncio.sleep(self.POLL_SECONDS if delay is None else min(delay, 1.0))
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+        return time.monotonic() - started
+
+    # --- Feedback from responses ---
+    def on_throttled(self, retry_after=None):
+        """A 429: pause the bucket and halve the rate."""
+        with self._cond:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            if retry_after is None:
+                retry_after = min(self.MAX_BACKOFF, 0.5 * 2 ** (self._consecutive_throttles - 1))
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + retry_after)
+            if self.rate > 0:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0
+            self._updated = now
+            self._cond.notify_all()
+
+    def on_success(self):
+        """Additive increase back towards the configured rate."""
+        with self._cond:
+            self._consecutive_throttles = 0
+            if 0 < self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_retry(self):
+        with self._cond:
+            self.retries += 1
+
+    def stats(self):
+        with self._cond:
+            queued = {p: 0 for p in PRIORITIES}
+            for rank, _ in self._waiting:
+                queued[PRIORITIES[rank]] += 1
+            return {
+                'rate': self.rate,
+                'max_rate': self.max_rate,
+                'queued': queued,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'paused_for': max(0.0, self._paused_until - time.monotonic()),
+            }
+
+
+SCHEDULER = RequestScheduler(
+    rate=float(os.environ.get("F1_RATE_LIMIT", 3)),
+    burst=float(os.environ.get("F1_RATE_BURST", 6)),
+    max_retries=int(os.environ.get("F1_MAX_RETRIES", 3)),
+)
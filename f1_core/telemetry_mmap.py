@@ -0,0 +1,166 @@
+"""
+Memory-mapped, per-channel telemetry files.
+
+A merged race frame (Processor.get_merged_race_data) is written once as one fixed-width
+binary file per channel plus a small JSON header:
+
+    <root>/<session_key>/<driver_number>/
+        meta.json          rows, channel dtypes, lap -> [start, end) row ranges
+        date.i8            int64 nanoseconds since epoch (UTC)
+        speed.i2  rpm.i2  n_gear.i1  throttle.f4  brake.f4
+        x.f4  y.f4  lap_number.f4  distance.f4
+
+Files are opened with numpy.memmap (read-only), so every Streamlit worker process shares the same
+physical pages through the OS page cache instead of deserializing its own copy, and slicing one
+lap only touches that lap's byte range in each file.
+"""
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+# channel -> (source column in the merged frame, on-disk dtype). Car-data channels come from the
+# left side of the asof join and are never missing, so they keep compact integer types.
+CHANNELS = {
+    'date': ('date', '<i8'),
+    'speed': ('speed', '<i2'),
+    'rpm': ('rpm', '<i2'),
+    'n_gear': ('n_gear', '<i1'),
+    'throttle': ('throttle', '<f4'),
+    'brake': ('brake', '<f4'),
+    'x': ('x', '<f4'),
+    'y': ('y', '<f4'),
+    'lap_number': ('lap_number', '<f4'),
+    'distance': ('Total_distance', '<f4'),
+}
+
+_SUFFIX = {'<i8': 'i8', '<f4': 'f4', '<i2': 'i2', '<i1': 'i1'}
+
+
+def _channel_file(path, channel):
+    return os.path.join(path, f"{channel}.{_SUFFIX[CHANNELS[channel][1]]}")
+
+
+def _lap_index(lap_numbers):
+    """lap -> [start, end) rows. Rows are time-ordered, so each lap is one contiguous run."""
+    if len(lap_numbers) == 0:
+        return {}
+    valid = ~np.isnan(lap_numbers)
+    boundaries = np.flatnonzero(np.diff(lap_numbers) != 0) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(lap_numbers)]))
+    index = {}
+    for start, end in zip(starts, ends):
+        if valid[start]:
+            index[str(int(lap_numbers[start]))] = [int(start), int(end)]
+    return index
+
+
+def write_mapped_telemetry(df, path):
+    """
+    Writes a merged race frame as per-channel files. The directory appears atomically,
+    so readers in other processes never see a half-written layout.
+    """
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(tmp, exist_ok=True)
+
+    df = df.sort_values('date', kind='stable')
+    dates = df['date']
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+
+    for channel, (column, dtype) in CHANNELS.items():
+        if channel == 'date':
+            values = dates.to_numpy(dtype='datetime64[ns]').view('<i8')
+        elif np.dtype(dtype).kind == 'i':
+            values = df[column].fillna(0).to_numpy(dtype=dtype)
+        else:
+            values = df[column].to_numpy(dtype='float64', na_value=np.nan).astype(dtype)
+        np.ascontiguousarray(values).tofile(_channel_file(tmp, channel))
+
+    lap_numbers = df['lap_number'].to_numpy(dtype='float64', na_value=np.nan)
+    meta = {
+        'version': FORMAT_VERSION,
+        'rows': int(len(df)),
+        'channels': {channel: dtype for channel, (_, dtype) in CHANNELS.items()},
+        'laps': _lap_index(lap_numbers),
+    }
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        # Another process finished the same layout first - keep theirs
+        shutil.rmtree(tmp, ignore_errors=True)
+    return MappedTelemetry(path)
+
+
+class MappedTelemetry:
+    """Read-only view over one driver's per-channel files."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported telemetry layout version in {path}")
+        self.rows = self.meta['rows']
+        self.laps = {int(lap): tuple(bounds) for lap, bounds in self.meta['laps'].items()}
+        self._maps = {}
+
+    def channel(self, name):
+        """Zero-copy, read-only memmap of a whole channel."""
+        if name not in self._maps:
+            if self.rows == 0:
+                self._maps[name] = np.empty(0, dtype=self.meta['channels'][name])
+            else:
+                self._maps[name] = np.memmap(_channel_file(self.path, name), mode='r',
+                                             dtype=self.meta['channels'][name], shape=(self.rows,))
+        return self._maps[name]
+
+    def _frame(self, start, end):
+        columns = {}
+        for channel, (column, _) in CHANNELS.items():
+            values = self.channel(channel)[start:end]
+            if channel == 'date':
+                values = pd.DatetimeIndex(values.view('datetime64[ns]')).tz_localize('UTC')
+            columns[column] = values
+        return pd.DataFrame(columns, copy=False)
+
+    def lap(self, lap_number):
+        """One lap's rows; only that lap's byte range is read from each file."""
+        start, end = self.laps.get(int(lap_number), (0, 0))
+        return self._frame(start, end)
+
+    def frame(self):
+        """The whole race, with numeric columns backed by the shared memory maps."""
+        return self._frame(0, self.rows)
+
+
+def mapped_path(root, session_key, driver_number):
+    return os.path.join(root, str(int(session_key)), str(int(driver_number)))
+
+
+def open_or_build(root, session_key, driver_number, build):
+    """
+    Opens the mapped layout for (session, driver), building it from `build()` (a merged
+    race frame) the first time. Returns None if there is no data.
+    """
+    path = mapped_path(root, session_key, driver_number)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        try:
+            return MappedTelemetry(path)
+        except ValueError:
+            shutil.rmtree(path, ignore_errors=True)
+
+    df = build()
+    if df is None or df.empty:
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return write_mapped_telemetry(df, path)
@@ -0,0 +1,102 @@
+"""
+Cache of finished Plotly figures, shared by every session of the app process.
+
+Figures are keyed by what they show, (kind, session_key, drivers, lap, point budget), so repeat
+views of the same lap by any user skip building the figure (px.scatter / make_subplots and their
+validation). Entries are evicted least recently used once the trace data held exceeds
+F1_FIGURE_CACHE_MB (default 64).
+
+Traces are downsampled to at most F1_FIGURE_POINTS points (default 4000) before building, which
+also bounds the JSON st.plotly_chart sends to the browser. Streamlit still serializes the
+figure on every render (st.plotly_chart has no way to accept a pre-serialized spec), so cached
+figures must never be modified: st.plotly_chart only reads them.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from f1_core.instrumentation import stage
+
+POINT_BUDGET = int(os.environ.get("F1_FIGURE_POINTS", 4000))
+
+
+def downsample(df, budget=POINT_BUDGET):
+    """Evenly spaced rows, at most `budget` of them (the first and last row are kept)."""
+    if not budget or len(df) <= budget:
+        return df
+    rows = np.unique(np.linspace(0, len(df) - 1, budget).round().astype(np.int64))
+    return df.iloc[rows]
+
+
+def _nbytes(value):
+    """Approximate memory of a figure dict (dominated by the trace arrays)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value) if value and isinstance(value[0], (dict, list, tuple)) \
+            else 8 * len(value)
+    if isinstance(value, str):
+        return len(value)
+    return 8
+
+
+class FigureCache:
+    """Thread-safe LRU of Plotly figures, bounded by the bytes of their trace data."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (figure, nbytes)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, kind, session_key, drivers, lap, build):
+        """
+        The cached figure for (kind, session_key, drivers, lap, POINT_BUDGET), or build() it.
+        `drivers` is a driver number or a sequence of them (order matters: it sets the colors).
+        """
+        if not isinstance(drivers, (list, tuple)):
+            drivers = (drivers,)
+        key = (kind, session_key, tuple(int(d) for d in drivers), lap, POINT_BUDGET)
+        with stage(f"figure cache: {kind}") as span:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    span.cache = 'hit'
+                    return entry[0]
+                self.misses += 1
+            span.cache = 'miss'
+            figure = build()
+            self.put(key, figure)
+            return figure
+
+    def put(self, key, figure):
+        nbytes = _nbytes(figure.to_dict()['data'])
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (figure, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits, 'misses': self.misses}
+
+
+FIGURE_CACHE = FigureCache(int(float(os.environ.get("F1_FIGURE_CACHE_MB", 64)) * 1024 * 1024))
@@ -0,0 +1,271 @@
+"""
+Load-test harness for the dashboard data pipeline.
+
+Simulates N concurrent dashboard users driving F1_API / DataProcessor exactly the way
+main.py does when "Load Data" is clicked, against a local OpenF1 stand-in: the same
+DataProcessor.load_session leases on the shared frames (held until the user's next load), then
+the rerun that renders them, with the lap, corner, overtake and pace tables, the figure cache and
+(for some loads) the whole-race heatmap.
+
+Usage:
+    python load_test.py --users 50 --loads 5
+"""
+import argparse
+import json
+import logging
+import random
+import resource
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openf1_stub import OpenF1Stub
+
+
+# --- Process memory ---
+def read_rss_mb():
+    """Returns (current RSS, peak RSS) of this process in MB."""
+    current, peak = None, None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if peak is None:
+        # ru_maxrss is KB on Linux (bytes on macOS, close enough for a report)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return current if current is not None else peak, peak
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class CallCounter:
+    """Counts logical F1Client calls, so cache hits = calls that never reached the upstream."""
+
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, name, func):
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.counts[name] = self.counts.get(name, 0) + 1
+            return func(*args, **kwargs)
+        return counted
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+class SimulatedUser:
+    """
+    One dashboard viewer. Picks sessions/drivers from a skewed popularity distribution,
+    so many users overlap on the same race (like a real race weekend).
+    """
+
+    def __init__(self, user_id, sessions, drivers, rivals_max, think_time, seed, heatmap_share=0.25):
+        self.user_id = user_id
+        self.sessions = sessions
+        self.drivers = drivers
+        self.rivals_max = rivals_max
+        self.think_time = think_time
+        self.heatmap_share = heatmap_share  # loads that switch the track map to the whole-race heatmap
+        self.rng = random.Random(seed)
+        self.frames, self.rival_leases = {}, {}
+
+    def _pick(self, options):
+        # Zipf-like weights: the first options are much more popular than the tail
+        weights = [1 / (rank + 1) for rank in range(len(options))]
+        return self.rng.choices(options, weights=weights, k=1)[0]
+
+    def run_load(self):
+        import charts
+        from DataProcessor import DataProcessor
+        from F1_API_importer import F1_API
+        from figure_cache import FIGURE_CACHE, downsample
+
+        year, session_key, circuit_key = self._pick(self.sessions)
+        driver_number = self._pick(self.drivers)
+        rivals = self.rng.sample([d for d in self.drivers if d != driver_number],
+                                 self.rng.randint(0, self.rivals_max))
+
+        start = time.perf_counter()
+
+        # --- Sidebar ---
+        F1_API.get_sessions(year)
+        F1_API.get_drivers(session_key)
+
+        # --- "Load Data" button: the leases replace this user's previous ones, like session state ---
+        self.frames, self.rival_leases = DataProcessor.load_session(session_key, driver_number, rivals)
+
+        # --- Visualization pass ---
+        race_df = self.frames['race_data'].frame
+        positions_df = self.frames['positions_data'].frame
+        DataProcessor.get_session_fastest_lap(session_key)
+        DataProcessor.get_session_summary_stats(session_key)
+        F1_API.get_laps(session_key, driver_number)
+        if not race_df.empty and race_df['lap_number'].max() > 1:
+            lap = 1  # the slider's default
+            subset = DataProcessor.get_lap_telemetry(session_key, driver_number, race_df, lap)
+            if self.rng.random() < self.heatmap_share:
+                heat_drivers = [driver_number] + list(self.rival_leases)
+                speed_grid = DataProcessor.get_speed_grid(session_key, heat_drivers)
+                if speed_grid is not None and not speed_grid.empty:
+                    FIGURE_CACHE.get_or_build('speed_heatmap:mean_speed', session_key, heat_drivers, None,
+                                              lambda: charts.speed_heatmap(speed_grid, 'mean_speed'))
+            else:
+                FIGURE_CACHE.get_or_build('track_map', session_key, driver_number, lap,
+                                          lambda: charts.track_map(downsample(subset)))
+            FIGURE_CACHE.get_or_build('telemetry', session_key, driver_number, lap,
+                                      lambda: charts.telemetry_chart(downsample(subset)))
+            DataProcessor.get_corner_table(session_key, driver_number, lap, circuit_key)
+            if not positions_df.empty:
+                FIGURE_CACHE.get_or_build('positions_bar', session_key, (), None,
+                                          lambda: charts.positions_bar(positions_df))
+            DataProcessor.get_position_changes(session_key, driver_number)
+            DataProcessor.get_pace_table(session_key)
+            DataProcessor.get_championship_tables(session_key)
+            for rival in self.rival_leases:
+                F1_API.get_laps(session_key, rival)
+
+        elapsed = time.perf_counter() - start
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, self.think_time))
+        return elapsed
+
+    def run_loads(self, loads):
+        """`loads` clicks on "Load Data" in a row. Returns (latencies, failed loads)."""
+        latencies, errors = [], 0
+        for _ in range(loads):
+            try:
+                latencies.append(self.run_load())
+            except Exception as e:
+                errors += 1
+                print(f"Load failed: {e}")
+        return latencies, errors
+
+
+def run(users, loads, n_sessions, rivals_max, think_time, laps, latency, seed, rate_limit=0, upstream_limit=None):
+    from f1_core import F1Client
+    from f1_core.scheduler import SCHEDULER
+
+    # The Streamlit adapters work outside a running app, but warn loudly about it
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    counter = CallCounter()
+    for name, attr in list(vars(F1Client).items()):
+        if isinstance(attr, staticmethod) and name.startswith('get_'):
+            setattr(F1Client, name, staticmethod(counter.wrap(name, attr.__func__)))
+
+    # The stub is local: by default don't pace requests, so the numbers measure the app
+    SCHEDULER.configure(rate=rate_limit)
+
+    with OpenF1Stub(laps=laps, latency=latency, rate_limit=upstream_limit) as stub:
+        original_url = F1Client.BASE_URL
+        F1Client.BASE_URL = stub.url
+
+        all_sessions = [(str(s['year']), s['session_key'], s['circuit_key']) for s in stub.sessions()
+                        if s['session_name'] in ('Race', 'Qualifying')]
+        random.Random(seed).shuffle(all_sessions)
+        sessions = all_sessions[:n_sessions]
+        drivers = list(OpenF1Stub.DRIVER_NUMBERS)
+
+        rss_before, _ = read_rss_mb()
+        simulated = [SimulatedUser(i, sessions, drivers, rivals_max, think_time, seed + i) for i in range(users)]
+
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as pool:
+            # One worker per user, running that user's loads one after another
+            futures = [pool.submit(user.run_loads, loads) for user in simulated]
+            for future in futures:
+                user_latencies, user_errors = future.result()
+                latencies.extend(user_latencies)
+                errors += user_errors
+        wall = time.perf_counter() - started
+        rss_after, rss_peak = read_rss_mb()
+
+        F1Client.BASE_URL = original_url
+
+        upstream = stub.total_requests
+        return {
+            'users': users,
+            'loads': len(latencies),
+            'errors': errors,
+            'wall_s': wall,
+            'throughput_loads_per_s': len(latencies) / wall if wall else 0.0,
+            'latency_s': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'mean': statistics.fmean(latencies) if latencies else 0.0,
+                'max': max(latencies, default=0.0),
+            },
+            'upstream_requests': dict(stub.request_counts, total=upstream),
+            'upstream_mb': stub.bytes_sent / 1e6,
+            'upstream_throttled': stub.throttled,
+            'scheduler': SCHEDULER.stats(),
+            'api_calls': dict(counter.counts, total=counter.total),
+            'cache_hit_rate': 1 - upstream / counter.total if counter.total else 0.0,
+            'rss_mb': {'before': rss_before, 'after': rss_after, 'peak': rss_peak},
+        }
+
+
+def print_report(report):
+    lat = report['latency_s']
+    print("\n=== Load test report ===")
+    print(f"Users: {report['users']}   Loads: {report['loads']}   Errors: {report['errors']}")
+    print(f"Wall time: {report['wall_s']:.2f}s   Throughput: {report['throughput_loads_per_s']:.2f} loads/s")
+    print(f"Load latency  p50 {lat['p50']:.3f}s | p95 {lat['p95']:.3f}s | p99 {lat['p99']:.3f}s | max {lat['max']:.3f}s")
+
+    print("\nUpstream requests (per endpoint):")
+    for endpoint, count in sorted(report['upstream_requests'].items()):
+        print(f"  {endpoint:<24}{count}")
+    print(f"Upstream payload: {report['upstream_mb']:.1f} MB")
+    sched = report['scheduler']
+    print(f"Throttled (429): {report['upstream_throttled']}   Retries: {sched['retries']}   "
+          f"Scheduler rate: {sched['rate']:.2f}/{sched['max_rate']:.2f} req/s")
+
+    print(f"\nF1Client calls: {report['api_calls']['total']}   Cache hit rate: {report['cache_hit_rate']:.1%}")
+    rss = report['rss_mb']
+    print(f"RSS: before {rss['before']:.0f} MB | after {rss['after']:.0f} MB | peak {rss['peak']:.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard users against a local OpenF1 stub.")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--loads", type=int, default=3, help="'Load Data' clicks per user")
+    parser.add_argument("--sessions", type=int, default=4, help="Number of distinct sessions users pick from")
+    parser.add_argument("--rivals-max", type=int, default=2, help="Max rivals per load (main.py allows 2)")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Max pause between loads (s)")
+    parser.add_argument("--laps", type=int, default=20, help="Laps per synthetic session")
+    parser.add_argument("--latency", type=float, default=0.05, help="Artificial upstream latency (s)")
+    parser.add_argument("--rate-limit", type=float, default=0,
+                        help="Client-side request rate (req/s) for the scheduler, 0 = unlimited")
+    parser.add_argument("--upstream-limit", type=float, default=None,
+                        help="Requests/s the stub accepts before answering 429")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    result = run(args.users, args.loads, args.sessions, args.rivals_max, args.think_time,
+                 args.laps, args.latency, args.seed, args.rate_limit, args.upstream_limit)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
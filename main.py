@@ -1,548 +1,513 @@
-import matplotlib.pyplot as plt
-import plotly.express as px
+import time
 import streamlit as st
 from DataProcessor import DataProcessor
 from F1_API_importer import F1_API
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from debug_panel import begin_debug_rerun, end_debug_rerun, render_debug_panel
+from f1_core.heatmap import STATISTICS as HEATMAP_STATISTICS
+from f1_core.instrumentation import stage
+import metrics
+# Plotly is imported lazily inside charts.py, only when a chart actually renders
+import charts
+from figure_cache import FIGURE_CACHE, downsample
 
 
+rerun_started = time.perf_counter()
+
 # 1. Page Configuration
 st.set_page_config(page_title="F1 Analytics", layout="wide")
 
-st.title("F1 Analytics App 🏎️")
-st.markdown("Analyze F1 data for specific Drivers and Races")
-
-# 2. Sidebar - User Inputs
-# We put inputs in the sidebar to keep the main view clean
-with st.sidebar:
-  st.header("Session Settings")
-
-
-  selected_year = st.selectbox("Select Year", options= ['2023', '2024'])
-  df_session = F1_API.get_sessions(selected_year)
-
-  selected_country = st.selectbox("Select Country", options= df_session['country_name'].unique() )
-  df_filtered_country = df_session[df_session['country_name'] == selected_country]
-  valid_races = df_filtered_country[df_filtered_country['session_name'].str.contains('Race|Qualifying', case=False)]
-  selected_race = st.selectbox("Select Race", options=  valid_races['session_name'].unique())
-  session_row = valid_races[valid_races['session_name'] == selected_race]
-  session_key = int(session_row['session_key'].iloc[0]) # an unique key for each race type in every countery
-
-  # 3. Load Drivers for this session
-  df_driver = F1_API.get_drivers(session_key)
-
-  #protection against crash
-  if df_driver.empty or 'full_name' not in df_driver.columns:
-    st.warning("⚠️ No driver data available for this specific session via OpenF1 API.")
-    st.stop()
-
-    # Sort the unique driver names alphabetically
-  sorted_driver_list = sorted(df_driver['full_name'].unique())
-  selected_driver = st.selectbox("Select Driver", options=sorted_driver_list)
-  # Get the driver number based on the selection
-  driver_number = df_driver.loc[df_driver['full_name'] == selected_driver, 'driver_number'].iloc[0]
-  #lap_df, date_start_session = F1_API.get_laps(session_key, driver_number)
-
-  st.markdown("---")
-  st.markdown("### ⚔️ Compare Drivers")
+# Metrics scrape endpoint / file dump (once per process, see metrics.py)
+metrics.start_exporters_from_env()
 
-# Removing the selected driver to avoid duplicates
-  available_drivers = sorted(df_driver[df_driver['full_name'] != selected_driver]['full_name'].unique())
+# Hidden debug panel: add ?debug=1 to the URL (and &profile=1 for a cProfile of the rerun)
+debug_trace, debug_profiler = begin_debug_rerun()
 
-  comparison_names = st.multiselect(
-    "Select rivals (Max 2)",
-    options=available_drivers,
-    max_selections=2
-  )
+try:
+  st.title("F1 Analytics App 🏎️")
+  st.markdown("Analyze F1 data for specific Drivers and Races")
 
-  st.markdown("---")
+  # 2. Sidebar - User Inputs
+  # We put inputs in the sidebar to keep the main view clean
+  with st.sidebar:
+    st.header("Session Settings")
 
-  # The Button!
-  # The app waits here until the user clicks this button
-  run_btn=st.button("Load Data")
 
-# --- 3. Main Logic Flow ---
+    # Years come from the local session catalogue, so new seasons appear on their own
+    years = F1_API.get_years()
+    if not years:
+      st.warning("⚠️ No sessions available from the OpenF1 API.")
+      st.stop()
+    selected_year = st.selectbox("Select Year", options= [str(year) for year in years])
+    df_session = F1_API.get_sessions(selected_year)
 
-if run_btn:
-  # Fetching data
-  race_df = DataProcessor.get_merged_race_data(session_key, driver_number)
-  positions_df = DataProcessor.get_position_data(session_key)
-  laps_data, dates_data = DataProcessor.get_race_positions(session_key)
+    selected_country = st.selectbox("Select Country", options= df_session['country_name'].unique() )
+    df_filtered_country = df_session[df_session['country_name'] == selected_country]
+    valid_races = df_filtered_country[df_filtered_country['session_name'].str.contains('Race|Qualifying', case=False)]
+    selected_race = st.selectbox("Select Race", options=  valid_races['session_name'].unique())
+    session_row = valid_races[valid_races['session_name'] == selected_race]
+    session_key = int(session_row['session_key'].iloc[0]) # an unique key for each race type in every countery
+    # Corners are detected once per circuit (None: unknown circuit, detected per session)
+    circuit_key = session_row['circuit_key'].iloc[0] if 'circuit_key' in session_row.columns else None
+    circuit_key = None if circuit_key is None or circuit_key != circuit_key else int(circuit_key)
 
-  # Save to session state
-  st.session_state['race_data'] = race_df
-  st.session_state['positions_data'] = positions_df
-  st.session_state['laps_data'] = laps_data
-  st.session_state['dates_data'] = dates_data
+    # 3. Load Drivers for this session
+    df_driver = F1_API.get_drivers(session_key)
 
+    #protection against crash
+    if df_driver.empty or 'full_name' not in df_driver.columns:
+      st.warning("⚠️ No driver data available for this specific session via OpenF1 API.")
+      st.stop()
 
+      # Sort the unique driver names alphabetically
+    sorted_driver_list = sorted(df_driver['full_name'].unique())
+    selected_driver = st.selectbox("Select Driver", options=sorted_driver_list)
+    # Get the driver number based on the selection
+    driver_number = df_driver.loc[df_driver['full_name'] == selected_driver, 'driver_number'].iloc[0]
+    #lap_df, date_start_session = F1_API.get_laps(session_key, driver_number)
 
-  comp_data = {}
+    st.markdown("---")
+    st.markdown("### ⚔️ Compare Drivers")
 
-  if comparison_names:
-    for comp_driver_name in comparison_names:
+  # Removing the selected driver to avoid duplicates
+    available_drivers = sorted(df_driver[df_driver['full_name'] != selected_driver]['full_name'].unique())
 
-      comp_num = df_driver.loc[df_driver['full_name'] == comp_driver_name, 'driver_number'].iloc[0]
-      comp_race_df = DataProcessor.get_merged_race_data(session_key, comp_num)
+    comparison_names = st.multiselect(
+      "Select rivals (Max 2)",
+      options=available_drivers,
+      max_selections=2
+    )
 
+    st.markdown("---")
 
-      if not comp_race_df.empty:
-        comp_data[comp_driver_name] = comp_race_df
+    # The Button!
+    # The app waits here until the user clicks this button
+    run_btn=st.button("Load Data")
 
-  st.session_state['comp_data'] = comp_data
+  # --- 3. Main Logic Flow ---
 
-if not run_btn:
-  # Displayed when no data is loaded yet
-  st.divider()
+  if not run_btn:
+    # Displayed when no data is loaded yet
+    st.divider()
 
-  # 1. Hero Section with Image
-  # Using a high-quality F1 related placeholder or local image
+    # 1. Hero Section with Image
+    # Using a high-quality F1 related placeholder or local image
 
-  st.markdown("""
+    st.markdown("""
     #### Ready to analyze?
 
     This dashboard provides data and insights for Formula 1 Races. 
     To get started, please use the **sidebar on the left**:
-    """)
-
-  # 2. Feature Showcase (3 Columns)
-  col1, col2, col3 = st.columns(3)
-
-  with col1:
-    st.markdown("#### 📉 Car data")
-    st.markdown("Compare speed, throttle, and brake traces lap-by-lap.")
-
-  with col2:
-    st.markdown("#### 🗺️ Track Map")
-    st.markdown("Visualize driver lines and corner speeds on the actual circuit.")
-
-  with col3:
-    st.markdown("#### ⚔️ Rivals")
-    st.markdown("Head-to-head comparison between any two drivers.")
-
-  # 3. Call to Action (Instruction)
-  st.info("👈  Select a Year, Country, and Driver in the sidebar to begin.")
-
-# --- 4. Visualization Logic (Runs on every reload/slider move) ---
-
-# Check if we have data in memory
-if 'race_data' in st.session_state and 'positions_data' in st.session_state:
-
-  # Retrieve data from "The Backpack" (Session State)
-  race_df = st.session_state['race_data']
-  positions_df = st.session_state['positions_data']
-  laps_data = st.session_state['laps_data']
-  dates_data = st.session_state['dates_data']
-
-# --- 3. Main Logic Flow: Data Loading ---
-if run_btn:
-  # Fetching data
-  # We fetch all necessary datasets at once when the button is clicked
-  race_df = DataProcessor.get_merged_race_data(session_key, driver_number)
-  positions_df = DataProcessor.get_position_data(session_key)
-  laps_data, dates_data = DataProcessor.get_race_positions(session_key)
-
-  # Save to session state ("The Backpack")
-  st.session_state['race_data'] = race_df
-  st.session_state['positions_data'] = positions_df
-  st.session_state['laps_data'] = laps_data
-  st.session_state['dates_data'] = dates_data
-
-  # Logic for loading comparison drivers
-  comp_data = {}
-  if comparison_names:
-    for comp_driver_name in comparison_names:
-      # Find the driver number based on the name
-      comp_num = df_driver.loc[df_driver['full_name'] == comp_driver_name, 'driver_number'].iloc[0]
-      comp_race_df = DataProcessor.get_merged_race_data(session_key, comp_num)
-
-      if not comp_race_df.empty:
-        comp_data[comp_driver_name] = comp_race_df
-
-  st.session_state['comp_data'] = comp_data
-
-# --- 4. Visualization Logic (Runs on every reload/slider move) ---
-
-# Check if we have data in memory before trying to plot
-if 'race_data' in st.session_state and 'positions_data' in st.session_state:
-
-  # Retrieve data from Session State
-  race_df = st.session_state['race_data']
-  positions_df = st.session_state['positions_data']
-  laps_data = st.session_state['laps_data']
-  dates_data = st.session_state['dates_data']
-
-  if not race_df.empty:
+      """)
+
+    # 2. Feature Showcase (3 Columns)
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+      st.markdown("#### 📉 Car data")
+      st.markdown("Compare speed, throttle, and brake traces lap-by-lap.")
+
+    with col2:
+      st.markdown("#### 🗺️ Track Map")
+      st.markdown("Visualize driver lines and corner speeds on the actual circuit.")
+
+    with col3:
+      st.markdown("#### ⚔️ Rivals")
+      st.markdown("Head-to-head comparison between any two drivers.")
+
+    # 3. Call to Action (Instruction)
+    st.info("👈  Select a Year, Country, and Driver in the sidebar to begin.")
+
+  # --- 3. Main Logic Flow: Data Loading ---
+  if run_btn:
+    # Fetching data
+    # We fetch all necessary datasets at once when the button is clicked.
+    # The frames are shared by every session viewing the same race; session state only keeps
+    # leases (keys) on them, so they are freed once no session uses them (f1_core/frame_store.py).
+    # load_test.py loads through the same DataProcessor.load_session.
+    comp_numbers = {name: int(df_driver.loc[df_driver['full_name'] == name, 'driver_number'].iloc[0])
+                    for name in comparison_names or []}
+    st.session_state['frames'], rival_leases = DataProcessor.load_session(
+      session_key, driver_number, comp_numbers.values())
+
+    # Comparison drivers with telemetry, by name
+    st.session_state['comp_frames'] = {
+      name: rival_leases[number] for name, number in comp_numbers.items() if number in rival_leases}
+    st.session_state['loaded_circuit_key'] = circuit_key
+
+  # --- 4. Visualization Logic (Runs on every reload/slider move) ---
+
+  # Check if we have data in memory before trying to plot
+  if 'frames' in st.session_state:
+
+    # Retrieve the shared frames this session holds leases on
+    frames = st.session_state['frames']
+    race_df = frames['race_data'].frame
+    positions_df = frames['positions_data'].frame
+    laps_data, dates_data = frames['race_positions'].frame
+    # The session and driver these frames were loaded for: the sidebar may have changed since the
+    # last "Load Data", and figures are cached for every user under what they actually show
+    race_key = frames['race_data'].key  # ('race_telemetry', session_key, driver_number); None if nothing loaded
+    loaded_session_key, loaded_driver = race_key[1:] if race_key else (session_key, int(driver_number))
+    loaded_circuit_key = st.session_state.get('loaded_circuit_key', circuit_key)
+
+    # Hand the computed frames to notebooks as Arrow IPC / Parquet (f1_core/export.py)
+    st.sidebar.markdown("### 📦 Export")
+    export_fmt = st.sidebar.radio("Format", ["arrow", "parquet"], horizontal=True,
+                                  format_func={"arrow": "Arrow IPC", "parquet": "Parquet"}.get)
+    # The loaded drivers, so the export reuses the frames this session leases
+    export_drivers = [loaded_driver] + [lease.key[2] for lease in st.session_state.get('comp_frames', {}).values()]
+    st.sidebar.download_button(
+      "⬇️ Download session data",
+      data=lambda: DataProcessor.export_session(loaded_session_key, export_drivers, export_fmt),
+      file_name=f"f1_session_{loaded_session_key}_{export_fmt}.zip",
+      mime="application/zip",
+      help="Telemetry, laps, positions and championship tables, with a schema version"
+    )
 
     if not race_df.empty:
-      #st.success("✅ Data Loaded Successfully!")
-
-      # =========================================================
-      # 1. SESSION INSIGHTS (Global Race Stats)
-      # =========================================================
 
-      # Calculate stats
-      fastest_lap = DataProcessor.get_session_fastest_lap(session_key)
-      race_stats = DataProcessor.get_session_summary_stats(session_key)
+      if not race_df.empty:
+        #st.success("✅ Data Loaded Successfully!")
+
+        # =========================================================
+        # 1. SESSION INSIGHTS (Global Race Stats)
+        # =========================================================
+
+        # Calculate stats
+        fastest_lap = DataProcessor.get_session_fastest_lap(session_key)
+        race_stats = DataProcessor.get_session_summary_stats(session_key)
+
+        st.markdown("### 🏆 Race Highlights")
+
+        # Row 1: Winner & Fastest Lap, Highlights using standard Markdown for better font control
+        col_h1, col_h2, col_h3, col_h4 = st.columns(4)
+
+        # 1. Winner
+        with col_h1:
+          st.caption("🥇 Winner")
+          # Using markdown headers (#####) makes text smaller than st.metric but still bold
+          st.markdown(f"##### {race_stats.get('winner', 'N/A')}")
+
+        # 2. Highest Climber
+        with col_h2:
+          st.caption("🚀 Highest Climber")
+          mover_name = race_stats.get('mover_name', 'N/A')
+          gain = race_stats.get('mover_gain', 0)
+
+          # Display Name
+          st.markdown(f"##### {mover_name}")
+
+          # Display Gain in Green if positive
+          if gain > 0:
+            st.markdown(f":green[▲ {gain} Positions]")
+          else:
+            st.markdown("No Change")
+
+        # 3. DNFs
+        with col_h3:
+          st.caption("❌ DNFs")
+          dnf_count = race_stats.get('dnf_count', 0)
+          st.markdown(f"##### {dnf_count} Drivers")
+          # Use an expander or help tooltip for details to keep UI clean
+          if dnf_count > 0:
+            st.markdown(f"_{race_stats.get('dnf_names', '')}_")
+
+        # 4. Fastest Lap
+        with col_h4:
+          st.caption("⚡ Fastest Lap")
+          if fastest_lap:
+            st.markdown(f"##### {fastest_lap['time']}")
+            st.markdown(f"_{fastest_lap['driver']}_")
+          else:
+            st.markdown("##### N/A")
+
+        st.markdown("---")
+
+        # =========================================================
+        # 2. DRIVER SPECIFIC STATS (Selected Driver)
+        # =========================================================
+        st.markdown(f"### 📊 Stats for {selected_driver}")
+
+        # --- Top Metrics Row  ---
+        # 1. Fetch accurate time (race_df is telemetry, so we use F1_API for timing)
+        laps_official, _ = F1_API.get_laps(session_key, driver_number)
+        best_lap_str = str(laps_official['lap_duration'].min()).split('days ')[-1][:-3]
+
+        # 2. Calculate Positions (Extracting directly from your existing positions_df)
+        d_pos = positions_df[positions_df['full_name'] == selected_driver]
+        # We filter assuming 'type' contains 'Grid'/'Start' for start and 'Finish'/'Race' for end
+        p_start = d_pos[d_pos['type'].str.contains('Grid|Start', case=False)]['position'].min()
+        p_finish = d_pos[d_pos['type'].str.contains('Finish|Race', case=False)]['position'].min()
+        p_change = int(p_start - p_finish)  # Positive = Improvement
+
+        # 3. Display Metrics
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Top Speed", f"{race_df['speed'].max()} km/h")
+        m2.metric("Fastest Lap", best_lap_str)
+        m3.metric("Finish Pos", f"P{int(p_finish)}")
+        m4.metric("Pos Change", p_change, delta=p_change)
+
+        st.divider()  # Visual separation
+
+      # --- The Tabs Architecture ---
+        # ---------------------------------------------------------
+        # Safety Check: Ensure driver has enough laps to visualize
+        # ---------------------------------------------------------
+        max_lap = int(race_df['lap_number'].max())
+
+        if max_lap <= 1:
+          # Scenario: Driver retired on Lap 1 or data is insufficient for a slider
+          st.warning(f"⚠️ Insufficient telemetry data for {selected_driver}. The driver likely retired on the first lap.")
 
-      st.markdown("### 🏆 Race Highlights")
-
-      # Row 1: Winner & Fastest Lap, Highlights using standard Markdown for better font control
-      col_h1, col_h2, col_h3, col_h4 = st.columns(4)
-
-      # 1. Winner
-      with col_h1:
-        st.caption("🥇 Winner")
-        # Using markdown headers (#####) makes text smaller than st.metric but still bold
-        st.markdown(f"##### {race_stats.get('winner', 'N/A')}")
-
-      # 2. Highest Climber
-      with col_h2:
-        st.caption("🚀 Highest Climber")
-        mover_name = race_stats.get('mover_name', 'N/A')
-        gain = race_stats.get('mover_gain', 0)
-
-        # Display Name
-        st.markdown(f"##### {mover_name}")
-
-        # Display Gain in Green if positive
-        if gain > 0:
-          st.markdown(f":green[▲ {gain} Positions]")
-        else:
-          st.markdown("No Change")
-
-      # 3. DNFs
-      with col_h3:
-        st.caption("❌ DNFs")
-        dnf_count = race_stats.get('dnf_count', 0)
-        st.markdown(f"##### {dnf_count} Drivers")
-        # Use an expander or help tooltip for details to keep UI clean
-        if dnf_count > 0:
-          st.markdown(f"_{race_stats.get('dnf_names', '')}_")
-
-      # 4. Fastest Lap
-      with col_h4:
-        st.caption("⚡ Fastest Lap")
-        if fastest_lap:
-          st.markdown(f"##### {fastest_lap['time']}")
-          st.markdown(f"_{fastest_lap['driver']}_")
         else:
-          st.markdown("##### N/A")
-
-      st.markdown("---")
-
-      # =========================================================
-      # 2. DRIVER SPECIFIC STATS (Selected Driver)
-      # =========================================================
-      st.markdown(f"### 📊 Stats for {selected_driver}")
-
-      # --- Top Metrics Row  ---
-      # 1. Fetch accurate time (race_df is telemetry, so we use F1_API for timing)
-      laps_official, _ = F1_API.get_laps(session_key, driver_number)
-      best_lap_str = str(laps_official['lap_duration'].min()).split('days ')[-1][:-3]
-
-      # 2. Calculate Positions (Extracting directly from your existing positions_df)
-      d_pos = positions_df[positions_df['full_name'] == selected_driver]
-      # We filter assuming 'type' contains 'Grid'/'Start' for start and 'Finish'/'Race' for end
-      p_start = d_pos[d_pos['type'].str.contains('Grid|Start', case=False)]['position'].min()
-      p_finish = d_pos[d_pos['type'].str.contains('Finish|Race', case=False)]['position'].min()
-      p_change = int(p_start - p_finish)  # Positive = Improvement
-
-      # 3. Display Metrics
-      m1, m2, m3, m4 = st.columns(4)
-      m1.metric("Top Speed", f"{race_df['speed'].max()} km/h")
-      m2.metric("Fastest Lap", best_lap_str)
-      m3.metric("Finish Pos", f"P{int(p_finish)}")
-      m4.metric("Pos Change", p_change, delta=p_change)
-
-      st.divider()  # Visual separation
-
-    # --- The Tabs Architecture ---
-      # ---------------------------------------------------------
-      # Safety Check: Ensure driver has enough laps to visualize
-      # ---------------------------------------------------------
-      max_lap = int(race_df['lap_number'].max())
-
-      if max_lap <= 1:
-        # Scenario: Driver retired on Lap 1 or data is insufficient for a slider
-        st.warning(f"⚠️ Insufficient telemetry data for {selected_driver}. The driver likely retired on the first lap.")
-
-      else:
-        # Proceed with Tabs and Visualization only if we have valid data
-
-        # --- The Tabs Architecture ---
-        tab_telemetry, tab_overview, tab_compare = st.tabs(
-          ["📉 Car data Deep Dive", "🏁 Race Overview", "⚔️ Head-to-Head"])
-
-        # === TAB 1: TELEMETRY (The slider lives here) ===
-        with tab_telemetry:
-          st.subheader("Lap-by-Lap Analysis")
-
-          # 1. The Slider (Now safe because max_lap > 1)
-          selected_lap = st.slider("Select Lap", min_value=1, max_value=max_lap, value=1)
-
-          # 2. Filter Data (Fast in-memory operation)
-          subset = race_df[race_df['lap_number'] == selected_lap]
-
-          # 3. Split View (Map vs Graph)
-          col_map, col_graph = st.columns([1, 1])  # 1:1 ratio
-
-          with col_map:
-            st.markdown("**Track Map** (Speed Visualization)")
-
-            # Renaming columns for clearer tooltip
-            map_df = subset.rename(columns={'x': 'X_coordinate', 'y': 'Y_coordinate'})
-
-            # Using Scatter to allow coloring by speed
-            fig_map = px.scatter(
-              map_df,
-              x='X_coordinate',
-              y='Y_coordinate',
-              color='speed',
-              color_continuous_scale='Turbo',
-              hover_data=['speed', 'Total_distance', 'throttle', 'rpm', 'n_gear', 'brake']
-            )
-            # Keep aspect ratio fixed so the track doesn't look distorted
-            fig_map.update_yaxes(scaleanchor="x", scaleratio=1)
-            fig_map.update_layout(xaxis_visible=False, yaxis_visible=False)  # Hide axes for cleaner map
-            st.plotly_chart(fig_map, use_container_width=True)
-
-          with col_graph:
-            # 1. Create the Subplots structure (5 rows, sharing X axis)
-            fig_tel = make_subplots(
-              rows=5, cols=1,
-              shared_xaxes=True,  # Critical: Zooming one zooms all
-              vertical_spacing=0.06,  # Gap between charts
-              row_heights=[0.3, 0.15, 0.15, 0.2, 0.2],  # Speed gets more space
-              subplot_titles=("Speed (km/h)", "RPM", "Gear (num)", "Throttle (%)", "Brake (Y/N)")
-            )
-
-            # --- Trace 1: Speed (Blue) ---
-            fig_tel.add_trace(
-              go.Scatter(x=subset['Total_distance'], y=subset['speed'], name='Speed', line=dict(color='cyan', width=2)),
-              row=1, col=1
-            )
-
-            # --- Trace 2: RPM (Yellow) ---
-            fig_tel.add_trace(
-              go.Scatter(x=subset['Total_distance'], y=subset['rpm'], name='RPM', line=dict(color='yellow', width=1)),
-              row=2, col=1
-            )
-
-            # --- Trace 3: Gear (White Step Line) ---
-            fig_tel.add_trace(
-              go.Scatter(x=subset['Total_distance'], y=subset['n_gear'], name='Gear',
-                         line=dict(color='white', width=1.5),
-                         line_shape='hv'),
-              row=3, col=1
-            )
-
-            # --- Trace 4: Throttle (Green Area) ---
-            fig_tel.add_trace(
-              go.Scatter(x=subset['Total_distance'], y=subset['throttle'], name='Throttle',
-                         line=dict(color='lime', width=1), fill='tozeroy'),
-              row=4, col=1
-            )
-
-            # --- Trace 5: Brake (Red Area) ---
-            fig_tel.add_trace(
-              go.Scatter(x=subset['Total_distance'], y=subset['brake'], name='Brake', line=dict(color='red', width=1),
-                         fill='tozeroy'),
-              row=5, col=1
-            )
-
-            # Layout Polish
-            fig_tel.update_layout(
-              height=800,
-              showlegend=False,
-              hovermode="x unified",
-              margin=dict(l=0, r=0, t=20, b=0),
-              paper_bgcolor="rgba(0,0,0,0)",
-              plot_bgcolor="rgba(0,0,0,0)"
-            )
-
-            # Update Axes
-            fig_tel.update_yaxes(showgrid=True, gridcolor='#333')
-            fig_tel.update_xaxes(showgrid=False, visible=False)  # Hide X on top plots
-            fig_tel.update_xaxes(title_text="Total Distance (m)", visible=True, row=5, col=1)  # Show X only on bottom
-
-            st.plotly_chart(fig_tel, use_container_width=True)
-
-        # === TAB 2: OVERVIEW ===
-        with tab_overview:
-          st.subheader("🏁 Race Progression & Positions")
-
-          # 1. Bar Chart: Grid vs Finish
-          st.markdown("##### Position Changes: Start vs Finish")
-          if not positions_df.empty:
-            fig_pos = px.bar(
-              positions_df,
-              x="full_name",
-              y="position",
-              color="type",
-              barmode="group",
-              title="",
-              text_auto=True,
-              labels={"full_name": "Driver", "position": "Position", "type": "Status"}
-            )
-            st.plotly_chart(fig_pos, use_container_width=True)
-
-          st.divider()
-
-          # --- NEW: Leaderboard Table ---
-          st.subheader("🏆 Championship Standings Impact")
-
-          # Fetch the new tables via the simplified processor
-          df_drivers_standings, df_const_standings = DataProcessor.get_championship_tables(session_key)
-
-          # 1. Constructors Table
-          if not df_const_standings.empty:
-            st.markdown("### 🏎️ Constructors Championship")
-            st.dataframe(
-              df_const_standings,
-              hide_index=True,
-              use_container_width=True,
-              column_config={
-                "Points Added": st.column_config.NumberColumn(
-                  "Added",
-                  format="+%d",  # Shows +25, +18 etc.
-                  help="Points scored in this race"
-                )
-              }
-            )
-
-          st.divider()
-
-          # 2. Drivers Table
-          if not df_drivers_standings.empty:
-            st.markdown("### 🧑‍✈️ Drivers Championship")
-            st.dataframe(
-              df_drivers_standings,
-              hide_index=True,
-              use_container_width=True,
-              column_config={
-                "Points Added": st.column_config.NumberColumn(
-                  "Added",
-                  format="+%d"
-                )
-              }
-            )
-
-        # === TAB 3: HEAD-TO-HEAD COMPARISON ===
-        with tab_compare:
-          st.subheader("⚔️ Fastest Lap Comparison")
-          comp_data = st.session_state.get('comp_data', {})
-
-          # Prepare list of drivers to plot
-          drivers_to_plot = []
-          # Add main driver
-          drivers_to_plot.append((selected_driver, race_df, '#1f77b4'))  # Blue
-
-          # Add comparison drivers
-          colors = ['#ff7f0e', '#2ca02c']  # Orange, Green
-          for i, (name, df) in enumerate(comp_data.items()):
-            color = colors[i % len(colors)]
-            drivers_to_plot.append((name, df, color))
-
-          if race_df is not None:
-            # Create subplots structure
-            fig_comp = make_subplots(
-              rows=3, cols=1,
-              shared_xaxes=True,
-              vertical_spacing=0.08,
-              row_heights=[0.5, 0.25, 0.25],
-              subplot_titles=("Speed Comparison (km/h)", "Throttle (%)", "Brake (Y/N")
-            )
-
-            for name, df, color in drivers_to_plot:
-              if df.empty: continue
-
-              # 1. Safely retrieve driver number from the main drivers list
-              # (Prevent KeyError by looking up via name in master list)
-              current_driver_num = df_driver.loc[df_driver['full_name'] == name, 'driver_number'].iloc[0]
-
-              # 2. Fetch official lap times
-              laps_official, _ = F1_API.get_laps(session_key, current_driver_num)
-              valid_laps = laps_official.dropna(subset=['lap_duration'])
-
-              # Safe variable initialization
-              fastest_lap_num = df['lap_number'].max()
-              raw_time = "N/A"
-
-              # 3. Find the fastest lap based on duration
-              if not valid_laps.empty:
-                fastest_idx = valid_laps['lap_duration'].idxmin()
-                fastest_lap_num = valid_laps.loc[fastest_idx, 'lap_number']
-
-                # Format time string
-                t_str = str(valid_laps.loc[fastest_idx, 'lap_duration'])
-                raw_time = t_str.split('days')[-1].strip()
-                if '.' in raw_time and len(raw_time.split('.')[-1]) > 3:
-                  raw_time = raw_time[:-3]
-
-              # 4. Slice data for specific lap + Normalize X-Axis
-              lap_data = df[df['lap_number'] == fastest_lap_num].copy()
-
-              # Skip if no data exists for this specific lap
-              if lap_data.empty:
-                continue
-
-              # --- Normalization: Create dist_norm column ---
-              # Subtract the starting distance so all laps start at 0m for accurate comparison
-              lap_data['dist_norm'] = lap_data['Total_distance'] - lap_data['Total_distance'].min()
-
-              legend_label = f"{name} (Lap {int(fastest_lap_num)} | {raw_time})"
-
-              # --- Trace 1: Speed ---
-              fig_comp.add_trace(
-                go.Scatter(
-                  x=lap_data['dist_norm'], y=lap_data['speed'],
-                  name=f"{legend_label}", legendgroup=name,
-                  line=dict(color=color, width=2)
-                ), row=1, col=1
+          # Proceed with Tabs and Visualization only if we have valid data
+
+          # --- The Tabs Architecture ---
+          tab_telemetry, tab_overview, tab_compare = st.tabs(
+            ["📉 Car data Deep Dive", "🏁 Race Overview", "⚔️ Head-to-Head"])
+
+          # === TAB 1: TELEMETRY (The slider lives here) ===
+          with tab_telemetry:
+            st.subheader("Lap-by-Lap Analysis")
+
+            # 1. The Slider (Now safe because max_lap > 1)
+            selected_lap = st.slider("Select Lap", min_value=1, max_value=max_lap, value=1)
+
+            # 2. Filter Data (reads only this lap's bytes when telemetry is memory-mapped)
+            subset = DataProcessor.get_lap_telemetry(loaded_session_key, loaded_driver, race_df, selected_lap)
+
+            # 3. Split View (Map vs Graph)
+            col_map, col_graph = st.columns([1, 1])  # 1:1 ratio
+
+            with col_map:
+              st.markdown("**Track Map** (Speed Visualization)")
+
+              # Whole race instead of one lap: every sample binned into a fixed grid (f1_core/heatmap.py)
+              whole_race = st.toggle("Whole race heatmap", help="All laps, binned into a fixed-size grid")
+              if whole_race:
+                heat_scope = st.radio("Drivers", ["Selected", "Selected + rivals", "Whole field"], horizontal=True)
+                heat_stat = st.selectbox("Show", options=list(HEATMAP_STATISTICS),
+                                         format_func=HEATMAP_STATISTICS.get)
+                # Drivers of the loaded session (the sidebar may show another one)
+                heat_drivers = [loaded_driver]
+                if heat_scope == "Selected + rivals":
+                  heat_drivers += [lease.key[2] for lease in st.session_state.get('comp_frames', {}).values()]
+                elif heat_scope == "Whole field":
+                  field = F1_API.get_drivers(loaded_session_key)
+                  if not field.empty:
+                    heat_drivers = sorted(int(d) for d in field['driver_number'])
+
+                with st.spinner("Binning every lap..."):
+                  speed_grid = DataProcessor.get_speed_grid(loaded_session_key, heat_drivers)
+                fig_map = None
+                if speed_grid is None or speed_grid.empty:
+                  st.info("No location data to bin for these drivers.")
+                else:
+                  fig_map = FIGURE_CACHE.get_or_build(f'speed_heatmap:{heat_stat}', loaded_session_key, heat_drivers, None,
+                                                      lambda: charts.speed_heatmap(speed_grid, heat_stat))
+              else:
+                # Built once per (session, driver, lap) for all users, see figure_cache.py
+                fig_map = FIGURE_CACHE.get_or_build('track_map', loaded_session_key, loaded_driver, selected_lap,
+                                                    lambda: charts.track_map(downsample(subset)))
+              if fig_map is not None:
+                with stage("render: track map"):
+                  st.plotly_chart(fig_map, use_container_width=True)
+
+            with col_graph:
+              fig_tel = FIGURE_CACHE.get_or_build('telemetry', loaded_session_key, loaded_driver, selected_lap,
+                                                  lambda: charts.telemetry_chart(downsample(subset)))
+              with stage("render: telemetry chart"):
+                st.plotly_chart(fig_tel, use_container_width=True)
+
+            # 4. Corner by corner (brake point, apex and exit speed, throttle pickup)
+            corners_df = DataProcessor.get_corner_table(loaded_session_key, loaded_driver, selected_lap,
+                                                       loaded_circuit_key)
+            if not corners_df.empty:
+              st.markdown(f"**Corners** (Lap {selected_lap})")
+              st.dataframe(
+                corners_df,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                  "Brake Point": st.column_config.NumberColumn(format="%.0f m", help="Braking starts this far before the apex"),
+                  "Apex Speed": st.column_config.NumberColumn(format="%.0f km/h"),
+                  "Best Apex": st.column_config.NumberColumn(format="%.0f km/h", help="Fastest apex of the race at this corner"),
+                  "Exit Speed": st.column_config.NumberColumn(format="%.0f km/h"),
+                  "Throttle Pickup": st.column_config.NumberColumn(format="%.0f m", help="Full throttle this far after the apex"),
+                }
+              )
+
+          # === TAB 2: OVERVIEW ===
+          with tab_overview:
+            st.subheader("🏁 Race Progression & Positions")
+
+            # 1. Bar Chart: Grid vs Finish
+            st.markdown("##### Position Changes: Start vs Finish")
+            if not positions_df.empty:
+              fig_pos = FIGURE_CACHE.get_or_build('positions_bar', loaded_session_key, (), None,
+                                                  lambda: charts.positions_bar(positions_df))
+              with stage("render: positions bar"):
+                st.plotly_chart(fig_pos, use_container_width=True)
+
+            # 2. Every overtake of the loaded driver (from the session's event index)
+            changes_df = DataProcessor.get_position_changes(loaded_session_key, loaded_driver)
+            if not changes_df.empty:
+              loaded_drivers = F1_API.get_drivers(loaded_session_key)
+              loaded_name = loaded_drivers.loc[loaded_drivers['driver_number'] == loaded_driver, 'full_name']
+              st.markdown(f"##### Overtakes: {loaded_name.iloc[0] if not loaded_name.empty else f'#{loaded_driver}'}")
+              st.dataframe(changes_df, hide_index=True, use_container_width=True)
+
+            st.divider()
+
+            # --- Race Pace (every driver, computed once per session) ---
+            st.subheader("⏱️ Race Pace")
+            pace_df = DataProcessor.get_pace_table(loaded_session_key)
+            if not pace_df.empty:
+              st.dataframe(
+                pace_df,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                  "Best Lap": st.column_config.NumberColumn(format="%.3f s"),
+                  "Theoretical Best": st.column_config.NumberColumn(
+                    format="%.3f s",
+                    help="Sum of the driver's best sectors"
+                  ),
+                  "Race Pace": st.column_config.NumberColumn(
+                    format="%.3f s",
+                    help="Median of clean laps (no opening, pit or safety-car laps)"
+                  ),
+                  "Consistency": st.column_config.NumberColumn(
+                    format="±%.3f s",
+                    help="Standard deviation of clean laps"
+                  ),
+                  "Degradation": st.column_config.NumberColumn(
+                    format="%+.3f s/lap",
+                    help="Lap time lost per lap of tyre age, averaged over stints"
+                  ),
+                }
               )
 
-              # --- Trace 2: Throttle ---
-              fig_comp.add_trace(
-                go.Scatter(
-                  x=lap_data['dist_norm'], y=lap_data['throttle'],
-                  name=f"{name} Throttle", legendgroup=name, showlegend=False,
-                  line=dict(color=color, width=1.5)
-                ), row=2, col=1
+            st.divider()
+
+            # --- NEW: Leaderboard Table ---
+            st.subheader("🏆 Championship Standings Impact")
+
+            # Fetch the new tables via the simplified processor
+            df_drivers_standings, df_const_standings = DataProcessor.get_championship_tables(session_key)
+
+            # 1. Constructors Table
+            if not df_const_standings.empty:
+              st.markdown("### 🏎️ Constructors Championship")
+              st.dataframe(
+                df_const_standings,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                  "Points Added": st.column_config.NumberColumn(
+                    "Added",
+                    format="+%d",  # Shows +25, +18 etc.
+                    help="Points scored in this race"
+                  )
+                }
               )
 
-              # --- Trace 3: Brake ---
-              fig_comp.add_trace(
-                go.Scatter(
-                  x=lap_data['dist_norm'], y=lap_data['brake'],
-                  name=f"{name} Brake", legendgroup=name, showlegend=False,
-                  line=dict(color=color, width=1.5)
-                ), row=3, col=1
+            st.divider()
+
+            # 2. Drivers Table
+            if not df_drivers_standings.empty:
+              st.markdown("### 🧑‍✈️ Drivers Championship")
+              st.dataframe(
+                df_drivers_standings,
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                  "Points Added": st.column_config.NumberColumn(
+                    "Added",
+                    format="+%d"
+                  )
+                }
               )
 
-            # Layout Polish for Comparison Chart
-            fig_comp.update_layout(
-              height=800,
-              hovermode="x unified",
-              margin=dict(l=0, r=0, t=40, b=0),
-              paper_bgcolor="rgba(0,0,0,0)",
-              plot_bgcolor="rgba(0,0,0,0)",
-              legend=dict(orientation="h", y=1.02, x=0.5, xanchor="center")
-            )
-
-            # Update X-axis (Apply to the bottom chart)
-            fig_comp.update_xaxes(title_text="Lap Distance (m)", visible=True, row=3, col=1)
-            fig_comp.update_xaxes(showgrid=False, visible=False, row=1, col=1)
-            fig_comp.update_xaxes(showgrid=False, visible=False, row=2, col=1)
-
-            # Final Render Command (Was missing in previous versions)
-            st.plotly_chart(fig_comp, use_container_width=True)
-
-else:
-  # Initial State (Before clicking button)
-  st.info("👈 Please select a session and click 'Load Data' to begin.")
+          # === TAB 3: HEAD-TO-HEAD COMPARISON ===
+          with tab_compare:
+            st.subheader("⚔️ Fastest Lap Comparison")
+            # Names and numbers come from what was loaded, not from the current sidebar selection
+            loaded_drivers = F1_API.get_drivers(loaded_session_key)
+            loaded_names = dict(zip(loaded_drivers['driver_number'], loaded_drivers['full_name'])) \
+              if not loaded_drivers.empty else {}
+
+            # Prepare list of drivers to plot: (name, number, frame, color)
+            drivers_to_plot = []
+            # Add main driver
+            drivers_to_plot.append(
+              (loaded_names.get(loaded_driver, f"#{loaded_driver}"), loaded_driver, race_df, '#1f77b4'))  # Blue
+
+            # Add comparison drivers
+            colors = ['#ff7f0e', '#2ca02c']  # Orange, Green
+            for i, lease in enumerate(st.session_state.get('comp_frames', {}).values()):
+              color = colors[i % len(colors)]
+              comp_num = lease.key[2]
+              drivers_to_plot.append((loaded_names.get(comp_num, f"#{comp_num}"), comp_num, lease.frame, color))
+
+            if race_df is not None:
+              lap_traces = []
+              traced_laps = []  # (driver number, lap) per trace: the figure cache key
+              for name, current_driver_num, df, color in drivers_to_plot:
+                if df.empty: continue
+
+                # 1. Fetch official lap times
+                laps_official, _ = F1_API.get_laps(loaded_session_key, current_driver_num)
+                valid_laps = laps_official.dropna(subset=['lap_duration'])
+
+                # Safe variable initialization
+                fastest_lap_num = df['lap_number'].max()
+                raw_time = "N/A"
+
+                # 2. Find the fastest lap based on duration
+                if not valid_laps.empty:
+                  fastest_idx = valid_laps['lap_duration'].idxmin()
+                  fastest_lap_num = valid_laps.loc[fastest_idx, 'lap_number']
+
+                  # Format time string
+                  t_str = str(valid_laps.loc[fastest_idx, 'lap_duration'])
+                  raw_time = t_str.split('days')[-1].strip()
+                  if '.' in raw_time and len(raw_time.split('.')[-1]) > 3:
+                    raw_time = raw_time[:-3]
+
+                # 3. Slice data for specific lap + Normalize X-Axis
+                lap_data = df[df['lap_number'] == fastest_lap_num].copy()
+
+                # Skip if no data exists for this specific lap
+                if lap_data.empty:
+                  continue
+
+                # --- Normalization: Create dist_norm column ---
+                # Subtract the starting distance so all laps start at 0m for accurate comparison
+                lap_data['dist_norm'] = lap_data['Total_distance'] - lap_data['Total_distance'].min()
+
+                legend_label = f"{name} (Lap {int(fastest_lap_num)} | {raw_time})"
+                lap_traces.append((name, legend_label, color, lap_data))
+                traced_laps.append((current_driver_num, int(fastest_lap_num)))
+
+              fig_comp = FIGURE_CACHE.get_or_build(
+                'comparison', loaded_session_key, [number for number, _ in traced_laps], tuple(lap for _, lap in traced_laps),
+                lambda: charts.comparison_chart([(n, label, c, downsample(d)) for n, label, c, d in lap_traces]))
+
+              # Final Render Command (Was missing in previous versions)
+              with stage("render: comparison chart"):
+                st.plotly_chart(fig_comp, use_container_width=True)
+
+  else:
+    # Initial State (Before clicking button)
+    st.info("👈 Please select a session and click 'Load Data' to begin.")
+
+  # Debug waterfall for this rerun (no-op unless ?debug=1)
+  render_debug_panel(debug_trace, debug_profiler)
+finally:
+  # st.stop() and exceptions end the rerun early: never leave the profiler running, and count the rerun
+  end_debug_rerun(debug_trace, debug_profiler)
+  metrics.record_rerun(time.perf_counter() - rerun_started)
 
 
 
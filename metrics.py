@@ -0,0 +1,324 @@
+"""
+In-process metrics for the data layer, exported in the Prometheus text format.
+
+Fed automatically from the instrumentation spans (every F1Client fetch and Processor
+step), so nothing has to be attached to see upstream latency, failures, payload sizes,
+cache behaviour and rerun durations.
+
+Export (both optional, configured by environment variables read in main.py):
+    F1_METRICS_PORT=9108               -> scrape endpoint on http://127.0.0.1:9108/metrics
+    F1_METRICS_FILE=/tmp/f1.prom       -> file rewritten every F1_METRICS_INTERVAL seconds (default 15)
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from figure_cache import FIGURE_CACHE
+from f1_core.client import F1Client
+from f1_core.compressed_frames import TELEMETRY_CACHE
+from f1_core.frame_store import SHARED_FRAMES
+from f1_core.instrumentation import add_listener
+from f1_core.scheduler import SCHEDULER
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))  # 1 KB .. 256 MB
+
+log = logging.getLogger(__name__)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=(), func=None):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        # Read at scrape time instead of inc()/set(); a labelled metric's func returns {label values tuple: value}
+        self._func = func
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def _store(self, label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def samples(self):
+        if self._func is not None:
+            value = self._func()
+            if isinstance(value, dict):
+                for label_values, item in value.items():
+                    self._store(label_values, item)
+            elif value is not None:
+                self._store((), value)
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield self.name + _format_labels(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values, value):
+        self._store(label_values, value)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[-1] if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield self.name + "_bucket" + _format_labels(self.labels, label_values, ('le', bound)), cumulative
+            yield self.name + "_bucket" + _format_labels(self.labels, label_values, ('le', '+Inf')), series[-1]
+            yield self.name + "_sum" + _format_labels(self.labels, label_values), series[-2]
+            yield self.name + "_count" + _format_labels(self.labels, label_values), series[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value:g}" if isinstance(value, float) else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _data_cache_bytes():
+    """DataFrame memory of the results F1Client's memoized methods hold right now."""
+    methods = (getattr(F1Client, name) for name in dir(F1Client) if name.startswith('get_'))
+    return sum(method.cache_info()['bytes'] for method in methods if hasattr(method, 'cache_info'))
+
+
+def _process_rss_bytes():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+# --- Metric definitions ---
+UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "f1_upstream_request_seconds", "OpenF1 request latency (download only)", ["endpoint"]))
+UPSTREAM_REQUESTS = REGISTRY.register(Counter(
+    "f1_upstream_requests_total", "OpenF1 requests by HTTP status", ["endpoint", "status"]))
+UPSTREAM_FAILURES = REGISTRY.register(Counter(
+    "f1_upstream_failures_total", "OpenF1 requests that raised or returned a non-200 status", ["endpoint"]))
+UPSTREAM_BYTES = REGISTRY.register(Histogram(
+    "f1_upstream_payload_bytes", "OpenF1 response payload size", ["endpoint"], buckets=SIZE_BUCKETS))
+PARSE_SECONDS = REGISTRY.register(Histogram(
+    "f1_json_parse_seconds", "Time spent decoding OpenF1 JSON payloads"))
+API_CALLS = REGISTRY.register(Counter(
+    "f1_api_calls_total", "F1Client calls by cache result", ["method", "cache"]))
+API_SECONDS = REGISTRY.register(Histogram(
+    "f1_api_call_seconds", "F1Client call duration including cache lookup", ["method"]))
+CACHE_BYTES = REGISTRY.register(Gauge(
+    "f1_cache_frame_bytes", "Memory of the DataFrames held in the data cache (F1Client results)",
+    func=_data_cache_bytes))
+TELEMETRY_CACHE_BYTES = REGISTRY.register(Gauge(
+    "f1_telemetry_cache_bytes", "Memory of the telemetry/location cache: compressed frames plus decompressed hot copies",
+    func=lambda: TELEMETRY_CACHE.stats()['bytes']))
+TELEMETRY_CACHE_HOT_BYTES = REGISTRY.register(Gauge(
+    "f1_telemetry_cache_hot_bytes", "Decompressed hot copies held by the telemetry/location cache",
+    func=lambda: TELEMETRY_CACHE.stats()['hot_bytes']))
+TELEMETRY_CACHE_RAW_BYTES = REGISTRY.register(Gauge(
+    "f1_telemetry_cache_raw_bytes", "Uncompressed size of the frames held in the telemetry/location cache",
+    func=lambda: TELEMETRY_CACHE.stats()['raw_bytes']))
+SHARED_FRAME_BYTES = REGISTRY.register(Gauge(
+    "f1_shared_frame_bytes", "Memory of the frames shared between browser sessions",
+    func=lambda: SHARED_FRAMES.stats()['bytes']))
+SHARED_FRAME_LEASES = REGISTRY.register(Gauge(
+    "f1_shared_frame_leases", "Session references held on shared frames",
+    func=lambda: SHARED_FRAMES.stats()['leases']))
+FIGURE_CACHE_BYTES = REGISTRY.register(Gauge(
+    "f1_figure_cache_bytes", "Trace data held by the Plotly figure cache",
+    func=lambda: FIGURE_CACHE.stats()['bytes']))
+FIGURE_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "f1_figure_cache_lookups_total", "Figure cache lookups", ["result"],
+    func=lambda: {('hit',): FIGURE_CACHE.stats()['hits'], ('miss',): FIGURE_CACHE.stats()['misses']}))
+RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "f1_rate_limit_wait_seconds", "Time requests waited for the rate-limit scheduler", ["priority"]))
+RATE_LIMIT_QUEUE = REGISTRY.register(Gauge(
+    "f1_rate_limit_queue_depth", "Requests waiting for the rate-limit scheduler", ["priority"],
+    func=lambda: {(p,): n for p, n in SCHEDULER.stats()['queued'].items()}))
+RATE_LIMIT_RATE = REGISTRY.register(Gauge(
+    "f1_rate_limit_requests_per_second", "Current (adaptive) upstream request rate, 0 = unlimited",
+    func=lambda: SCHEDULER.stats()['rate']))
+RATE_LIMIT_RETRIES = REGISTRY.register(Counter(
+    "f1_rate_limit_retries_total", "Requests retried after a 429",
+    func=lambda: SCHEDULER.stats()['retries']))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "f1_stage_seconds", "Processor methods and other instrumented stages (merges, figure builds)", ["stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "f1_stage_errors_total", "Instrumented stages that raised", ["stage"]))
+RERUN_SECONDS = REGISTRY.register(Histogram(
+    "f1_script_rerun_seconds", "Full main.py script rerun duration"))
+PROCESS_RSS = REGISTRY.register(Gauge(
+    "process_resident_memory_bytes", "Resident set size of this process", func=_process_rss_bytes))
+
+
+def _on_span(span):
+    """Instrumentation listener: turns finished spans into metric samples."""
+    if span.kind == 'network':
+        endpoint = span.name.split('/', 1)[-1]
+        UPSTREAM_SECONDS.observe(endpoint, value=span.duration)
+        UPSTREAM_BYTES.observe(endpoint, value=span.bytes)
+        status = span.status if span.error is None else 'error'
+        UPSTREAM_REQUESTS.inc(endpoint, str(status))
+        if span.error is not None or status != 200:
+            UPSTREAM_FAILURES.inc(endpoint)
+    elif span.kind == 'parse':
+        PARSE_SECONDS.observe(value=span.duration)
+    elif span.kind == 'queue':
+        RATE_LIMIT_WAIT.observe(span.name.split(':', 1)[-1], value=span.duration)
+    elif span.kind == 'api':
+        method = span.name.split('.', 1)[-1]
+        API_CALLS.inc(method, span.cache or 'unknown')
+        API_SECONDS.observe(method, value=span.duration)
+    else:
+        STAGE_SECONDS.observe(span.name, value=span.duration)
+        if span.error is not None:
+            STAGE_ERRORS.inc(span.name)
+
+
+add_listener(_on_span)
+
+
+def record_rerun(duration):
+    RERUN_SECONDS.observe(value=duration)
+
+
+# --- Exporters ---
+_exporters_lock = threading.Lock()
+_exporters_started = set()
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serves REGISTRY on http://host:port/metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="f1-metrics-http").start()
+    return server
+
+
+def start_file_dump(path, interval=15.0):
+    """Atomically rewrites `path` with the current metrics every `interval` seconds."""
+
+    def loop():
+        while True:
+            # A failed dump (disk full, a metric's callback raising) must not end the thread
+            try:
+                tmp = f"{path}.tmp"
+                with open(tmp, 'w') as f:
+                    f.write(REGISTRY.render())
+                os.replace(tmp, path)
+            except Exception:
+                log.exception("Writing metrics to %s failed", path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, daemon=True, name="f1-metrics-file")
+    thread.start()
+    return thread
+
+
+def start_exporters_from_env():
+    """
+    Idempotent (main.py reruns on every interaction): starts the exporters configured
+    through F1_METRICS_PORT / F1_METRICS_FILE once per process.
+    """
+    with _exporters_lock:
+        port = os.environ.get("F1_METRICS_PORT")
+        if port and 'http' not in _exporters_started:
+            try:
+                start_http_server(int(port))
+                _exporters_started.add('http')
+            except OSError as e:
+                # Another worker process already owns the port
+                print(f"Metrics endpoint not started on port {port}: {e}")
+                _exporters_started.add('http')
+
+        path = os.environ.get("F1_METRICS_FILE")
+        if path and 'file' not in _exporters_started:
+            start_file_dump(path, float(os.environ.get("F1_METRICS_INTERVAL", 15)))
+            _exporters_started.add('file')
@@ -0,0 +1,349 @@
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+
+class OpenF1Stub:
+    """
+    Local stand-in for the OpenF1 API.
+    Serves deterministic synthetic data for every endpoint the app uses, so load tests
+    and benchmarks can run without touching (or being throttled by) the real service.
+    """
+
+    YEARS = (2023, 2024)
+    COUNTRIES = ['Bahrain', 'Saudi Arabia', 'Australia', 'Japan', 'Italy', 'Monaco', 'Canada', 'Spain']
+    SESSION_NAMES = ['Practice 1', 'Qualifying', 'Race']
+    TEAMS = ['Red Bull Racing', 'Ferrari', 'Mercedes', 'McLaren', 'Aston Martin',
+             'Alpine', 'Williams', 'RB', 'Kick Sauber', 'Haas F1 Team']
+    DRIVER_NUMBERS = [1, 11, 16, 55, 44, 63, 4, 81, 14, 18, 10, 31, 23, 2, 22, 3, 77, 24, 20, 27]
+
+    CAR_DATA_INTERVAL = 0.27  # seconds between car_data samples (~3.7 Hz, like OpenF1)
+    LOCATION_INTERVAL = 0.27
+
+    def __init__(self, laps=20, latency=0.0, host="127.0.0.1", port=0, rate_limit=None, no_location=()):
+        self.laps = laps
+        self.latency = latency
+        # Drivers whose /location stream is empty (a car with no tracking data)
+        self.no_location = {int(d) for d in no_location}
+        # Like OpenF1's throttling: above `rate_limit` requests/s (1 s window) answer 429 + Retry-After
+        self.rate_limit = rate_limit
+        self._window = []
+        self.throttled = 0
+        self.request_counts = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._payloads = {}
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    # --- Lifecycle ---
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.request_counts = {}
+            self.bytes_sent = 0
+            self.throttled = 0
+
+    @property
+    def total_requests(self):
+        return sum(self.request_counts.values())
+
+    # --- Request handling ---
+    def _handle(self, handler):
+        parsed = urlparse(handler.path)
+        endpoint = parsed.path.rstrip('/').split('/')[-1]
+        params = dict(parse_qsl(parsed.query))
+
+        builder = getattr(self, f"_build_{endpoint}", None)
+        if builder is None:
+            handler.send_response(404)
+            handler.end_headers()
+            return
+
+        if self.latency:
+            threading.Event().wait(self.latency)
+
+        if self.rate_limit and self._throttle():
+            handler.send_response(429)
+            handler.send_header('Retry-After', '1')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        key = (endpoint, tuple(sorted(params.items())))
+        body = self._payloads.get(key)
+        if body is None:
+            body = json.dumps(builder(params)).encode()
+            self._payloads[key] = body
+
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+            self.bytes_sent += len(body)
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _throttle(self):
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._window.append(now)
+            return False
+
+    # --- Synthetic data helpers ---
+    def sessions(self, year=None):
+        rows = []
+        for y in self.YEARS:
+            if year is not None and int(year) != y:
+                continue
+            for c_idx, country in enumerate(self.COUNTRIES):
+                weekend = datetime(y, 3, 1, tzinfo=timezone.utc) + timedelta(weeks=2 * c_idx)
+                for s_idx, name in enumerate(self.SESSION_NAMES):
+                    rows.append({
+                        'session_key': y * 1000 + c_idx * 10 + s_idx,
+                        'meeting_key': y * 100 + c_idx,
+                        'location': country,
+                        'country_name': country,
+                        'circuit_key': c_idx + 1,
+                        'circuit_short_name': country,
+                        'session_name': name,
+                        'session_type': name.split()[0],
+                        'date_start': self._iso(weekend + timedelta(days=s_idx, hours=13)),
+                        'year': y,
+                    })
+        return rows
+
+    def _session_start(self, session_key):
+        for row in self.sessions():
+            if row['session_key'] == int(session_key):
+                return datetime.fromisoformat(row['date_start'])
+        return datetime(2024, 3, 1, 13, tzinfo=timezone.utc)
+
+    @staticmethod
+    def _iso(dt):
+        return dt.isoformat(timespec='microseconds')
+
+    def _lap_times(self, session_key, driver_number):
+        rng = random.Random(f"{session_key}-{driver_number}")
+        base = 88.0 + self.DRIVER_NUMBERS.index(int(driver_number)) * 0.08
+        pit_lap = self.laps // 2
+        times = []
+        for lap in range(1, self.laps + 1):
+            stint_age = lap if lap < pit_lap else lap - pit_lap
+            t = base + 0.05 * stint_age + rng.gauss(0, 0.25)
+            if lap == 1:
+                t += 4.0
+            if lap == pit_lap:
+                t += 20.0
+            times.append(t)
+        return times, pit_lap
+
+    @staticmethod
+    def _track_point(phase):
+        angle = 2 * math.pi * phase
+        x = 5000 * math.cos(angle) + 900 * math.cos(3 * angle)
+        y = 3000 * math.sin(angle) + 500 * math.sin(5 * angle)
+        speed = 215 + 95 * math.cos(4 * angle)
+        return x, y, speed
+
+    def _samples(self, session_key, driver_number, interval, offset=0.0):
+        start = self._session_start(session_key)
+        times, _ = self._lap_times(session_key, driver_number)
+        rng = random.Random(f"samples-{session_key}-{driver_number}-{interval}")
+        lap_start = 0.0
+        for lap_time in times:
+            t = offset
+            while t < lap_time:
+                phase = t / lap_time
+                x, y, speed = self._track_point(phase)
+                _, _, next_speed = self._track_point(min(phase + 0.005, 1.0))
+                yield start + timedelta(seconds=lap_start + t), phase, x, y, speed, next_speed, rng
+                t += interval
+            lap_start += lap_time
+
+    # --- Endpoint builders ---
+    @staticmethod
+    def _since(rows, params):
+        # OpenF1 comparison filter: ?date_start>=2024-03-01 arrives as key 'date_start>'
+        since = params.get('date_start>')
+        return [row for row in rows if since is None or row['date_start'] >= since]
+
+    def _build_sessions(self, params):
+        return self._since(self.sessions(params.get('year')), params)
+
+    def _build_meetings(self, params):
+        meetings = {}
+        for row in self.sessions(params.get('year')):
+            meetings.setdefault(row['meeting_key'], {
+                'meeting_key': row['meeting_key'],
+                'meeting_name': f"{row['country_name']} Grand Prix",
+                'circuit_key': row['circuit_key'],
+                'circuit_short_name': row['circuit_short_name'],
+                'country_name': row['country_name'],
+                'location': row['location'],
+                'date_start': row['date_start'],
+                'year': row['year'],
+            })
+        return self._since(list(meetings.values()), params)
+
+    def _build_drivers(self, params):
+        rows = []
+        for idx, number in enumerate(self.DRIVER_NUMBERS):
+            rows.append({
+                'driver_number': number,
+                'full_name': f"Driver {number:02d}",
+                'first_name': 'Driver',
+                'last_name': f"{number:02d}",
+                'name_acronym': f"D{number:02d}",
+                'team_name': self.TEAMS[idx // 2],
+                'session_key': int(params['session_key']),
+            })
+        return rows
+
+    def _build_car_data(self, params):
+        rows = []
+        for date, phase, _, _, speed, next_speed, rng in self._samples(
+                params['session_key'], params['driver_number'], self.CAR_DATA_INTERVAL):
+            braking = next_speed < speed - 2
+            rows.append({
+                'date': self._iso(date),
+                'driver_number': int(params['driver_number']),
+                'session_key': int(params['session_key']),
+                'speed': int(speed + rng.uniform(-2, 2)),
+                'rpm': min(12500, int(7000 + speed * 25)),
+                'n_gear': max(1, min(8, int(speed // 40) + 1)),
+                'throttle': 0 if braking else 100,
+                'brake': 100 if braking else 0,
+                'drs': 0,
+            })
+        return rows
+
+    def _build_location(self, params):
+        if int(params['driver_number']) in self.no_location:
+            return []
+        rows = []
+        for date, phase, x, y, _, _, _ in self._samples(
+                params['session_key'], params['driver_number'], self.LOCATION_INTERVAL, offset=0.05):
+            # Real location streams have short dropouts; leave a ~1.5 s hole once per lap
+            if 0.50 < phase < 0.517:
+                continue
+            rows.append({
+                'date': self._iso(date),
+                'driver_number': int(params['driver_number']),
+                'session_key': int(params['session_key']),
+                'x': int(x), 'y': int(y), 'z': 0,
+            })
+        return rows
+
+    def _build_laps(self, params):
+        drivers = [int(params['driver_number'])] if 'driver_number' in params else self.DRIVER_NUMBERS
+        start = self._session_start(params['session_key'])
+        rows = []
+        for number in drivers:
+            times, pit_lap = self._lap_times(params['session_key'], number)
+            elapsed = 0.0
+            for lap, lap_time in enumerate(times, start=1):
+                rows.append({
+                    'date_start': self._iso(start + timedelta(seconds=elapsed)),
+                    'driver_number': number,
+                    'session_key': int(params['session_key']),
+                    'lap_number': lap,
+                    'lap_duration': round(lap_time, 3),
+                    'duration_sector_1': round(lap_time * 0.31, 3),
+                    'duration_sector_2': round(lap_time * 0.38, 3),
+                    'duration_sector_3': round(lap_time * 0.31, 3),
+                    'is_pit_out_lap': lap == pit_lap + 1,
+                })
+                elapsed += lap_time
+        return rows
+
+    def _build_position(self, params):
+        session_key = params['session_key']
+        start = self._session_start(session_key)
+        rng = random.Random(f"position-{session_key}")
+        order = list(self.DRIVER_NUMBERS)
+        rows = [{'date': self._iso(start), 'driver_number': n, 'position': p, 'session_key': int(session_key)}
+                for p, n in enumerate(order, start=1)]
+
+        race_length = 88.0 * self.laps
+        for t in sorted(rng.uniform(30, race_length) for _ in range(self.laps * 2)):
+            p = rng.randrange(1, len(order))
+            order[p - 1], order[p] = order[p], order[p - 1]
+            date = self._iso(start + timedelta(seconds=t))
+            rows.append({'date': date, 'driver_number': order[p - 1], 'position': p, 'session_key': int(session_key)})
+            rows.append({'date': date, 'driver_number': order[p], 'position': p + 1, 'session_key': int(session_key)})
+        return rows
+
+    def _build_session_result(self, params):
+        final = {}
+        for row in self._build_position(params):
+            final[row['driver_number']] = row['position']
+        return [{'driver_number': n, 'position': p, 'dnf': p == len(final), 'session_key': int(params['session_key'])}
+                for n, p in final.items()]
+
+    def _build_championship_drivers(self, params):
+        return [{'driver_number': n, 'points_start': 200 - 10 * i, 'points_current': 225 - 10 * i}
+                for i, n in enumerate(self.DRIVER_NUMBERS)]
+
+    def _build_championship_teams(self, params):
+        return [{'team_name': team, 'points_start': 400 - 30 * i, 'points_current': 440 - 30 * i}
+                for i, team in enumerate(self.TEAMS)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local OpenF1 stand-in server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--laps", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial upstream latency (s)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests/s before answering 429")
+    args = parser.parse_args()
+
+    stub = OpenF1Stub(laps=args.laps, latency=args.latency, port=args.port, rate_limit=args.rate_limit).start()
+    print(f"OpenF1 stub serving on {stub.url}  (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,215 @@
+"""
+Local season-wide analytical store.
+
+Sessions, drivers, laps, positions and merged telemetry are written once (fed by the f1_core
+client) as Parquet files partitioned by year / session_key:
+
+    <root>/telemetry/year=2024/session_key=9472/part-0.parquet
+    <root>/laps/year=2024/session_key=9472/part-0.parquet
+    ...
+
+and queried with an embedded DuckDB. Each table is a view over its Parquet files with hive
+partitioning, so `WHERE year = 2024` prunes whole directories and only the selected columns
+are read from disk (predicate and column pushdown). DuckDB comes from the optional `duckdb`
+dependency group (`poetry install --with duckdb`); ingesting works without it.
+
+Usage:
+    python season_store.py ingest 2024 --types Race
+    python season_store.py example top_speed --year 2024
+    python season_store.py query "SELECT year, count(*) FROM laps GROUP BY year"
+"""
+import argparse
+import glob
+import os
+
+import pandas as pd
+
+from f1_core import F1Client, F1DataError, Processor, request_priority
+
+DEFAULT_ROOT = os.environ.get("F1_STORE_DIR", "f1_store")
+
+TABLES = ('sessions', 'drivers', 'laps', 'positions', 'telemetry')
+
+# Telemetry channels kept in the store, with compact dtypes (smaller files, faster scans)
+TELEMETRY_COLUMNS = {
+    'date': None,
+    'driver_number': 'int16',
+    'lap_number': 'float32',
+    'speed': 'float32',
+    'rpm': 'float32',
+    'n_gear': 'int8',
+    'throttle': 'float32',
+    'brake': 'float32',
+    'drs': 'float32',
+    'x': 'float32',
+    'y': 'float32',
+    'Total_distance': 'float32',
+}
+
+EXAMPLE_QUERIES = {
+    'top_speed': """
+        SELECT s.location, s.session_name, d.full_name, max(t.speed) AS top_speed
+        FROM telemetry t
+        JOIN sessions s USING (year, session_key)
+        JOIN drivers d USING (year, session_key, driver_number)
+        WHERE t.year = $year
+        GROUP BY ALL
+        ORDER BY s.location, top_speed DESC
+    """,
+    'team_lap_time': """
+        SELECT s.location, d.team_name, avg(l.lap_duration) AS avg_lap_s, count(*) AS laps
+        FROM laps l
+        JOIN sessions s USING (year, session_key)
+        JOIN drivers d USING (year, session_key, driver_number)
+        WHERE l.year = $year AND l.lap_duration IS NOT NULL AND NOT coalesce(l.is_pit_out_lap, false)
+        GROUP BY ALL
+        ORDER BY s.location, avg_lap_s
+    """,
+}
+
+
+class SeasonStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._con = None
+
+    # --- Writing ---
+    def _partition_path(self, table, year, session_key=None):
+        parts = [self.root, table, f"year={int(year)}"]
+        if session_key is not None:
+            parts.append(f"session_key={int(session_key)}")
+        return os.path.join(*parts, "part-0.parquet")
+
+    def _write(self, df, table, year, session_key=None):
+        """Atomic Parquet write; partition columns live in the path, not in the file."""
+        if df is None or df.empty:
+            return 0
+        path = self._partition_path(table, year, session_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partition_columns = ('year', 'session_key') if session_key is not None else ('year',)
+        df = df.drop(columns=[c for c in partition_columns if c in df.columns])
+        tmp = f"{path}.tmp"
+        df.to_parquet(tmp, index=False, compression='zstd', row_group_size=256_000)
+        os.replace(tmp, path)
+        return len(df)
+
+    def has_session(self, year, session_key):
+        return os.path.exists(self._partition_path('telemetry', year, session_key))
+
+    @staticmethod
+    def _telemetry_frame(merged):
+        merged = merged.rename(columns={'driver_number_x': 'driver_number'})
+        columns = [c for c in TELEMETRY_COLUMNS if c in merged.columns]
+        telemetry = merged[columns].copy()
+        for column in columns:
+            if TELEMETRY_COLUMNS[column]:
+                telemetry[column] = telemetry[column].astype(TELEMETRY_COLUMNS[column])
+        return telemetry
+
+    def ingest_session(self, year, session_key, driver_numbers=None):
+        """Fetches one session through F1Client and writes every table's partition. Returns row counts."""
+        drivers = F1Client.get_drivers(session_key)
+        laps = F1Client.get_all_laps(session_key)
+        positions = F1Client.get_all_drivers_positions(session_key)
+
+        # Stored in seconds, as the API reports it (the queries average it)
+        if not laps.empty and 'lap_duration' in laps.columns:
+            laps['lap_duration'] = laps['lap_duration'].dt.total_seconds()
+
+        counts = {
+            'drivers': self._write(drivers, 'drivers', year, session_key),
+            'laps': self._write(laps, 'laps', year, session_key),
+            'positions': self._write(positions, 'positions', year, session_key),
+        }
+
+        if driver_numbers is None:
+            driver_numbers = drivers['driver_number'].tolist() if not drivers.empty else []
+        frames = []
+        for driver_number in driver_numbers:
+            try:
+                merged = Processor.get_merged_race_data(session_key, int(driver_number))
+            except F1DataError as e:
+                print(f"Skipping driver {driver_number} of session {session_key}: {e}")
+                continue
+            if not merged.empty:
+                frames.append(self._telemetry_frame(merged))
+        telemetry = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        # Sorted by driver then time, so row-group statistics let DuckDB skip other drivers
+        if not telemetry.empty:
+            telemetry = telemetry.sort_values(['driver_number', 'date'], kind='stable')
+        counts['telemetry'] = self._write(telemetry, 'telemetry', year, session_key)
+        return counts
+
+    def ingest_year(self, year, session_types=('Race', 'Qualifying'), refresh=False):
+        # Backfill traffic: queued behind interactive requests in the rate-limit scheduler
+        with request_priority("batch"):
+            return self._ingest_year(year, session_types, refresh)
+
+    def _ingest_year(self, year, session_types, refresh):
+        sessions = F1Client.get_sessions(year)
+        if sessions.empty:
+            return {}
+        self._write(sessions, 'sessions', year)
+
+        pattern = '|'.join(session_types)
+        selected = sessions[sessions['session_name'].str.contains(pattern, case=False)]
+        done = {}
+        for session_key in selected['session_key']:
+            if not refresh and self.has_session(year, session_key):
+                continue
+            done[int(session_key)] = self.ingest_session(year, session_key)
+            print(f"Ingested {year} session {session_key}: {done[int(session_key)]}")
+        self._con = None  # new files -> rebuild the views on next query
+        return done
+
+    # --- Querying ---
+    def connect(self):
+        """DuckDB connection with one view per table (hive-partitioned Parquet scans)."""
+        if self._con is None:
+            import duckdb
+
+            con = duckdb.connect()
+            for table in TABLES:
+                pattern = os.path.join(self.root, table, '**', '*.parquet')
+                if not glob.glob(pattern, recursive=True):
+                    continue
+                con.execute(
+                    f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM read_parquet("
+                    f"'{pattern}', hive_partitioning = true, union_by_name = true)"
+                )
+            self._con = con
+        return self._con
+
+    def query(self, sql, params=None):
+        """Runs SQL against the store and returns a pandas DataFrame."""
+        return self.connect().execute(sql, params or {}).df()
+
+    def example(self, name, year):
+        return self.query(EXAMPLE_QUERIES[name], {'year': int(year)})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Season-wide Parquet + DuckDB store.")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest = sub.add_parser("ingest", help="Fetch and store every session of a year")
+    ingest.add_argument("year", type=int)
+    ingest.add_argument("--types", nargs="+", default=["Race", "Qualifying"])
+    ingest.add_argument("--refresh", action="store_true", help="Re-fetch sessions already stored")
+
+    query = sub.add_parser("query", help="Run SQL (tables: " + ", ".join(TABLES) + ")")
+    query.add_argument("sql")
+
+    example = sub.add_parser("example", help="Run a built-in query")
+    example.add_argument("name", choices=sorted(EXAMPLE_QUERIES))
+    example.add_argument("--year", type=int, required=True)
+
+    args = parser.parse_args()
+    store = SeasonStore(args.root)
+    if args.command == "ingest":
+        store.ingest_year(args.year, tuple(args.types), refresh=args.refresh)
+    else:
+        result = store.query(args.sql) if args.command == "query" else store.example(args.name, args.year)
+        with pd.option_context('display.max_rows', 200, 'display.width', 200):
+            print(result)
@@ -0,0 +1,38 @@
+"""
+Threads that find the catalogue stale at the same time refresh it once: the ones that waited on
+the refresh lock return without asking OpenF1 again.
+"""
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f1_core import F1Client
+from f1_core.catalogue import SessionCatalogue
+from openf1_stub import OpenF1Stub
+
+
+def test_concurrent_refreshes_fetch_the_sessions_once(tmp_path):
+    with OpenF1Stub(laps=5, latency=0.05) as stub:
+        F1Client.BASE_URL = stub.url
+        catalogue = SessionCatalogue(str(tmp_path / "catalogue.sqlite"))
+        start = threading.Barrier(4)
+        added = []
+
+        def refresh():
+            start.wait()
+            added.append(catalogue.refresh())
+
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert stub.request_counts.get('sessions') == 1
+        assert added.count(0) == 3
+        # A refresh asked for after that one completed still goes upstream
+        catalogue.refresh()
+        assert stub.request_counts['sessions'] == 2
@@ -0,0 +1,48 @@
+"""
+CompressedCache bounds the memory of both its tiers: the compressed frames and the decompressed
+hot copies of the most recently read ones.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f1_core.compressed_frames import CompressedCache, CompressedFrame
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    return CompressedFrame.from_frame(pd.DataFrame({'speed': rng.random(20_000), 'gear': rng.integers(1, 9, 20_000)}))
+
+
+def test_hot_copies_count_toward_the_bound_and_are_dropped_first():
+    frames = {key: _frame(key) for key in range(3)}
+    compressed = sum(frame.nbytes for frame in frames.values())
+    # Room for every compressed frame and one decompressed copy, not two
+    cache = CompressedCache(compressed + max(frame.raw_nbytes for frame in frames.values()) + 1, hot_frames=4)
+    for key, frame in frames.items():
+        cache.put(key, frame)
+
+    cache.get_frame(0)
+    cache.get_frame(1)
+    stats = cache.stats()
+    assert stats['entries'] == 3 and stats['hot'] == 1
+    assert stats['hot_bytes'] == frames[1].raw_nbytes
+    assert stats['bytes'] == stats['compressed_bytes'] + stats['hot_bytes'] <= cache.max_bytes
+
+
+def test_replacing_or_clearing_frees_the_hot_copy():
+    cache = CompressedCache(1 << 30)
+    cache.put('race', _frame(0))
+    cache.get_frame('race')
+    assert cache.stats()['hot_bytes'] > 0
+
+    cache.put('race', _frame(1))
+    assert cache.stats()['hot'] == 0 and cache.stats()['hot_bytes'] == 0
+    cache.get_frame('race')
+    cache.clear()
+    assert cache.stats()['bytes'] == 0
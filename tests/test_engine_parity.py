@@ -0,0 +1,98 @@
+"""
+Parity of the pandas and Polars Processor engines.
+
+Every engine-backed Processor method runs with both engines against the local OpenF1 stand-in,
+and the outputs must be identical: same number of frames, and per frame the same shape, columns,
+dtypes, values and row order (index labels are not part of the contract). Both engines must
+raise NoDataError for a driver without location data. The F1Client frames both engines consume
+must hold the ingest invariants of f1_core/normalize.py. The parity tests are skipped when
+Polars isn't installed.
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("F1_CATALOGUE", os.path.join(tempfile.mkdtemp(), "catalogue.sqlite"))
+
+from f1_core import F1Client, Processor
+from f1_core.errors import NoDataError
+from f1_core.normalize import violations
+from openf1_stub import OpenF1Stub
+
+SESSIONS = 2
+DRIVERS = OpenF1Stub.DRIVER_NUMBERS[:3]
+NO_LOCATION = OpenF1Stub.DRIVER_NUMBERS[3]
+
+SESSION_METHODS = ['get_position_data', 'get_race_positions', 'get_session_fastest_lap']
+CHECKS = [(method, session, None) for session in range(SESSIONS) for method in SESSION_METHODS] + \
+    [('get_merged_race_data', session, driver) for session in range(SESSIONS) for driver in DRIVERS]
+
+
+@pytest.fixture(scope='module')
+def sessions():
+    with OpenF1Stub(laps=12, no_location=[NO_LOCATION]) as stub:
+        original_url = F1Client.BASE_URL
+        F1Client.BASE_URL = stub.url
+        yield [s['session_key'] for s in stub.sessions() if s['session_name'] == 'Race'][:SESSIONS]
+        F1Client.BASE_URL = original_url
+
+
+@pytest.fixture
+def engines():
+    pytest.importorskip('polars')
+
+    def run(engine, method, *args):
+        Processor.set_engine(engine)
+        result = getattr(Processor, method)(*args)
+        assert Processor.ENGINE == engine, f"{engine} engine unavailable"
+        return result
+
+    yield run
+    Processor.set_engine("pandas")
+
+
+def _frames(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+@pytest.mark.parametrize('method, session, driver', CHECKS,
+                         ids=[f"{m}-s{s}" + (f"-d{d}" if d is not None else "") for m, s, d in CHECKS])
+def test_engines_return_identical_results(engines, sessions, method, session, driver):
+    args = (sessions[session],) if driver is None else (sessions[session], driver)
+    expected = engines("pandas", method, *args)
+    actual = engines("polars", method, *args)
+
+    if isinstance(expected, (pd.DataFrame, tuple)):
+        expected, actual = _frames(expected), _frames(actual)
+        assert len(actual) == len(expected)
+        for i, (exp, act) in enumerate(zip(expected, actual)):
+            pd.testing.assert_frame_equal(exp.reset_index(drop=True), act.reset_index(drop=True),
+                                          check_dtype=True, obj=f"{method}[{i}]")
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'polars'])
+def test_engines_raise_no_data_without_location(engines, sessions, engine):
+    with pytest.raises(NoDataError):
+        engines(engine, 'get_merged_race_data', sessions[0], NO_LOCATION)
+
+
+@pytest.mark.parametrize('session', range(SESSIONS))
+def test_client_frames_hold_the_ingest_invariants(sessions, session):
+    session_key = sessions[session]
+    found = violations(F1Client.get_all_laps(session_key), 'laps')
+    found += violations(F1Client.get_all_drivers_positions(session_key), 'position')
+    found += violations(F1Client.get_drivers(session_key), 'drivers')
+    found += violations(F1Client.get_session_result(session_key), 'session_result')
+    for driver_number in DRIVERS:
+        lap_df, date_start_session = F1Client.get_laps(session_key, driver_number)
+        found += violations(lap_df, 'laps', time='date')
+        found += violations(F1Client.get_telemetry(session_key, driver_number, date_start_session), 'car_data')
+        found += violations(F1Client.get_location(session_key, driver_number, date_start_session), 'location')
+    assert not found
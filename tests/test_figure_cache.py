@@ -0,0 +1,49 @@
+"""
+Figures are cached for every user under (kind, session, drivers, lap), so the key must describe
+the frames a figure is drawn from, not the sidebar selection (which can change without a reload).
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("F1_CATALOGUE", os.path.join(tempfile.mkdtemp(), "catalogue.sqlite"))
+
+from streamlit.testing.v1 import AppTest
+
+from f1_core import F1Client, Processor
+from figure_cache import FIGURE_CACHE, POINT_BUDGET
+from openf1_stub import OpenF1Stub
+
+
+def test_switching_driver_without_reload_keeps_cache_keys_honest():
+    with OpenF1Stub(laps=5) as stub:
+        F1Client.BASE_URL = stub.url
+        FIGURE_CACHE.clear()
+
+        at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+        at.run()
+        driver_box = next(box for box in at.sidebar.selectbox if box.label == "Select Driver")
+        loaded_name = driver_box.value
+        at.sidebar.button[0].click().run()
+        assert not at.exception
+
+        # Pick another driver but don't press "Load Data": the page still shows the loaded driver
+        other_name = next(name for name in driver_box.options if name != loaded_name)
+        next(box for box in at.sidebar.selectbox if box.label == "Select Driver").set_value(other_name).run()
+        assert not at.exception
+
+        drivers = F1Client.get_drivers(int(at.session_state['frames']['race_data'].key[1]))
+        numbers = dict(zip(drivers['full_name'], drivers['driver_number']))
+        session_key, loaded_driver = at.session_state['frames']['race_data'].key[1:]
+        assert loaded_driver == numbers[loaded_name]
+
+        track_maps = {key: figure for key, (figure, _) in FIGURE_CACHE._entries.items() if key[0] == 'track_map'}
+        assert ('track_map', session_key, (int(numbers[other_name]),), 1, POINT_BUDGET) not in track_maps
+
+        # The cached figure holds the loaded driver's lap 1
+        figure = track_maps[('track_map', session_key, (loaded_driver,), 1, POINT_BUDGET)]
+        race_df = Processor.get_race_telemetry(session_key, loaded_driver)
+        lap = race_df[race_df['lap_number'] == 1]
+        assert list(figure.data[0].x[:20]) == list(lap['x'].iloc[:20])
@@ -0,0 +1,93 @@
+"""
+Import-time budget of the app's startup path.
+
+Runs `python -X importtime` on exactly the modules main.py imports at module level and checks
+that
+  * no module that must stay lazy (plotting stacks, optional engines) is imported at startup, and
+  * their cumulative import time stays within F1_IMPORT_BUDGET_MS (default DEFAULT_BUDGET_MS),
+    taking the fastest of F1_IMPORT_BUDGET_RUNS measurements, since noise only ever adds time.
+    Set the budget to 0 to skip the timing check on machines too slow or busy for it.
+
+    F1_IMPORT_BUDGET_MS=2000 poetry run pytest tests/test_import_budget.py -s
+"""
+import ast
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Just above the startup path's cost here (about 1.0-1.1 s, most of it pandas via DataProcessor
+# and streamlit), so a new eager import of anything sizeable fails the check
+DEFAULT_BUDGET_MS = 1300
+
+# Must never be imported on the startup path. charts.py imports plotly.express / make_subplots
+# on first render (streamlit itself already loads the plotly base package and graph_objects).
+FORBIDDEN_AT_STARTUP = ('matplotlib', 'seaborn', 'plotly.express', 'plotly.subplots', 'polars')
+
+
+def startup_imports(script=os.path.join(ROOT, 'main.py')):
+    """Module names imported at the top level of main.py (nested/lazy imports are ignored)."""
+    with open(script, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules):
+    """
+    Returns (total cumulative ms of the requested modules, {top-level module: cumulative ms},
+    set of every module imported).
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup imports failed:\n{result.stderr[-2000:]}")
+
+    per_module = {}
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, raw_name = line[len('import time:'):].split('|')
+        raw_name = raw_name.rstrip()
+        module = raw_name.strip()
+        imported.add(module)
+        # Nested imports are indented by two spaces per level after the leading one
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            per_module[module] = int(cumulative_us) / 1000
+    total = sum(ms for module, ms in per_module.items() if module in modules)
+    return total, per_module, imported
+
+
+@pytest.fixture(scope='module')
+def startup():
+    modules = startup_imports()
+    runs = int(os.environ.get("F1_IMPORT_BUDGET_RUNS", 3))
+    return modules, min((measure(modules) for _ in range(runs)), key=lambda run: run[0])
+
+
+def test_lazy_modules_stay_off_the_startup_path(startup):
+    _, (_, _, imported) = startup
+    leaked = sorted({f for f in FORBIDDEN_AT_STARTUP for m in imported if m == f or m.startswith(f + '.')})
+    assert not leaked, f"lazy-only modules imported at startup: {', '.join(leaked)}"
+
+
+def test_startup_imports_fit_the_budget(startup):
+    budget_ms = float(os.environ.get("F1_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS))
+    if not budget_ms:
+        pytest.skip("F1_IMPORT_BUDGET_MS=0")
+    modules, (total, per_module, _) = startup
+    slowest = ", ".join(f"{module} {ms:.0f} ms"
+                        for module, ms in sorted(per_module.items(), key=lambda kv: -kv[1])[:5])
+    print(f"Startup imports of main.py: {', '.join(modules)}\nTotal: {total:.0f} ms (slowest: {slowest})")
+    assert total <= budget_ms, f"import time {total:.0f} ms exceeds budget {budget_ms:.0f} ms ({slowest})"
@@ -0,0 +1,104 @@
+"""
+Everything below the sidebar describes the loaded session and drivers. Changing the sidebar
+without pressing "Load Data" must neither show another driver's tables nor download and merge
+another driver's race in the background.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("F1_CATALOGUE", os.path.join(tempfile.mkdtemp(), "catalogue.sqlite"))
+
+from streamlit.testing.v1 import AppTest
+
+from f1_core import F1Client, Processor
+from figure_cache import FIGURE_CACHE
+from openf1_stub import OpenF1Stub
+
+
+def _count_merges(monkeypatch):
+    merges = []
+    merge = Processor.get_merged_race_data
+    monkeypatch.setattr(Processor, 'get_merged_race_data',
+                        staticmethod(lambda *args: merges.append(args) or merge(*args)))
+    return merges
+
+
+def _load_then_switch_driver(stub):
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+    at.run()
+    at.sidebar.button[0].click().run()
+    assert not at.exception
+
+    driver_box = next(box for box in at.sidebar.selectbox if box.label == "Select Driver")
+    other_name = next(name for name in driver_box.options if name != driver_box.value)
+    before = dict(stub.request_counts)
+    driver_box.set_value(other_name).run()
+    assert not at.exception
+    return at, before
+
+
+def test_switching_driver_without_reload_fetches_nothing(monkeypatch):
+    with OpenF1Stub(laps=5) as stub:
+        F1Client.BASE_URL = stub.url
+        merges = _count_merges(monkeypatch)
+        at, before = _load_then_switch_driver(stub)
+
+        for endpoint in ('car_data', 'location'):
+            assert stub.request_counts.get(endpoint, 0) == before.get(endpoint, 0), endpoint
+        # The corner table reads the leased frame instead of merging the race again
+        assert len(merges) <= 1
+
+        session_key, loaded_driver = at.session_state['frames']['race_data'].key[1:]
+        corners = next(df.value for df in at.dataframe if 'Apex Speed' in df.value.columns)
+        expected = Processor.get_corner_table(session_key, loaded_driver, 1, at.session_state['loaded_circuit_key'])
+        assert corners.reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+
+def test_whole_race_heatmap_bins_the_loaded_driver_from_its_lease(monkeypatch):
+    with OpenF1Stub(laps=5) as stub:
+        F1Client.BASE_URL = stub.url
+        FIGURE_CACHE.clear()
+        merges = _count_merges(monkeypatch)
+        at, before = _load_then_switch_driver(stub)
+
+        at.toggle[0].set_value(True).run()
+        assert not at.exception
+        assert stub.request_counts.get('car_data', 0) == before.get('car_data', 0)
+        assert len(merges) <= 1
+
+        session_key, loaded_driver = at.session_state['frames']['race_data'].key[1:]
+        heatmaps = [key for key in FIGURE_CACHE._entries if key[0].startswith('speed_heatmap')]
+        assert heatmaps and all(key[1:3] == (session_key, (loaded_driver,)) for key in heatmaps)
+
+
+def test_overtakes_table_belongs_to_the_loaded_driver():
+    with OpenF1Stub(laps=5) as stub:
+        F1Client.BASE_URL = stub.url
+        at, _ = _load_then_switch_driver(stub)
+
+        session_key, loaded_driver = at.session_state['frames']['race_data'].key[1:]
+        expected = Processor.get_position_changes(session_key, loaded_driver)
+        shown = [df.value for df in at.dataframe if 'Change' in df.value.columns]
+        if expected.empty:
+            assert not shown
+        else:
+            assert shown[0].reset_index(drop=True).equals(expected.reset_index(drop=True))
+
+
+def test_pace_table_belongs_to_the_loaded_session():
+    with OpenF1Stub(laps=5) as stub:
+        F1Client.BASE_URL = stub.url
+        at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=120)
+        at.run()
+        at.sidebar.button[0].click().run()
+        country_box = next(box for box in at.sidebar.selectbox if box.label == "Select Country")
+        country_box.set_value(next(c for c in country_box.options if c != country_box.value)).run()
+        assert not at.exception
+
+        session_key = at.session_state['frames']['race_data'].key[1]
+        pace = next(df.value for df in at.dataframe if 'Best Lap' in df.value.columns)
+        expected = Processor.get_pace_table(session_key)
+        assert pace.reset_index(drop=True).equals(expected.reset_index(drop=True))